@@ -1,11 +1,9 @@
 from flask import Flask, request, jsonify
-from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from flask_bcrypt import Bcrypt
 import logging
 from logging.handlers import RotatingFileHandler
 import os
@@ -15,11 +13,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from config import config
-from models.user import db as user_db, bcrypt
-from models.module import db as module_db
-from models.challenge import db as challenge_db
-from models.progress import db as progress_db
-from models.leaderboard import db as leaderboard_db
+from database import db
+import models  # registers every table on db.metadata
 
 # Import blueprints
 from routes.auth import auth_bp
@@ -31,24 +26,35 @@ from routes.admin import admin_bp
 from routes.ai import ai_bp
 from routes.docs import docs_bp
 
+from utils.leaderboard_index import init_leaderboard_index
+from utils.leaderboard_stats import init_leaderboard_stats
+from utils.flag_matcher import init_flag_matcher_cache
+from utils.catalog_cache import init_catalog_cache
+from utils.user_loader import init_user_loader
+from utils.password_hashing import init_password_hasher
+from utils.tutor_cache import init_tutor_cache
+from utils.llm_service import init_llm_rate_limiter
+from utils.scoring_worker import init_scoring_queue
+from utils.db_pool import init_db_pool
+from utils.db_routing import init_db_routing
+from utils.json_provider import init_json_provider
+from utils.compression import init_compression
+from utils.scoreboard_stream import init_scoreboard_broadcaster
+
 def create_app(config_name='default'):
     """Application factory pattern"""
     app = Flask(__name__, static_folder='static', static_url_path='/static')
     app.config.from_object(config[config_name])
     
     # Initialize extensions
-    db = SQLAlchemy()
+    init_db_pool(app)
+    init_db_routing(app)
+    # One engine, session and metadata shared by every model
     db.init_app(app)
     
-    # Use the same db instance across all models
-    # user_db.init_app(app)
-    # module_db.init_app(app)
-    # challenge_db.init_app(app)
-    # progress_db.init_app(app)
-    # leaderboard_db.init_app(app)
-    
     migrate = Migrate(app, db)
     jwt = JWTManager(app)
+    init_user_loader(app, jwt)
     
     # Configure CORS with security settings
     CORS(app, 
@@ -62,7 +68,17 @@ def create_app(config_name='default'):
         key_func=get_remote_address,
         default_limits=["200 per day", "50 per hour"]
     )
-    bcrypt.init_app(app)
+    init_password_hasher(app)
+    init_leaderboard_index(app)
+    init_leaderboard_stats(app)
+    init_flag_matcher_cache(app)
+    init_catalog_cache(app)
+    init_tutor_cache(app)
+    init_llm_rate_limiter(app)
+    init_scoring_queue(app)
+    init_scoreboard_broadcaster(app)
+    init_json_provider(app)
+    init_compression(app)
     
     # Security headers middleware
     @app.after_request
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for CipherQuest
+Measures the per-response cost of building and encoding leaderboard and
+catalog payloads, with the previous hand-written to_dict() methods and the
+standard library encoder against the model serializers and orjson
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from models.challenge import Challenge
+from models.leaderboard import LeaderboardEntry
+from models.user import User
+from utils.json_provider import OrjsonProvider, orjson
+
+
+def legacy_entry_dict(entry):
+    """LeaderboardEntry.to_dict_with_user() as it was written before the serializers"""
+    entry_dict = {
+        'id': entry.id,
+        'user_id': entry.user_id,
+        'total_score': entry.total_score,
+        'modules_completed': entry.modules_completed,
+        'challenges_completed': entry.challenges_completed,
+        'rank': entry.rank,
+        'last_updated': entry.last_updated.isoformat() if entry.last_updated else None
+    }
+    entry_dict['user'] = {
+        'username': entry.user.username,
+        'level': entry.user.level,
+        'rank': entry.user.rank,
+        'avatar_url': entry.user.avatar_url
+    }
+    return entry_dict
+
+
+def legacy_challenge_dict(challenge, flag_count):
+    """Challenge.to_dict() as it was written before the serializers"""
+    return {
+        'id': challenge.id,
+        'title': challenge.title,
+        'description': challenge.description,
+        'category': challenge.category,
+        'difficulty': challenge.difficulty,
+        'points': challenge.points,
+        'hints': challenge.hints,
+        'files': challenge.files,
+        'is_active': challenge.is_active,
+        'module_id': challenge.module_id,
+        'created_at': challenge.created_at.isoformat() if challenge.created_at else None,
+        'updated_at': challenge.updated_at.isoformat() if challenge.updated_at else None,
+        'flag_count': flag_count
+    }
+
+
+def make_rows(count):
+    """Detached model instances shaped like production rows"""
+    now = datetime.utcnow()
+    entries, challenges = [], []
+    for i in range(count):
+        user = User(username=f'player{i}', email=f'player{i}@example.com', level=i % 40 + 1,
+                    rank='Expert', avatar_url=f'https://cdn.example.com/avatars/{i}.png')
+        entry = LeaderboardEntry(user_id=i + 1, total_score=10000 - i * 7, modules_completed=i % 12,
+                                 challenges_completed=i % 30, rank=i + 1,
+                                 last_updated=now - timedelta(minutes=i))
+        entry.id = i + 1
+        entry.user = user
+        entries.append(entry)
+
+        challenge = Challenge(title=f'Challenge {i}', description='Decrypt the message ' * 8,
+                              category='Cryptography', difficulty='Intermediate', points=100,
+                              hints=['Look at the key length', 'Frequency analysis'], files=[],
+                              is_active=True, module_id=i % 10 + 1,
+                              created_at=now - timedelta(days=i), updated_at=now)
+        challenge.id = i + 1
+        challenges.append(challenge)
+    return entries, challenges
+
+
+def run_benchmark(rows=100, repeat=2000):
+    """Print the average cost of one response for each payload and path"""
+    entries, challenges = make_rows(rows)
+
+    app = Flask(__name__)
+    legacy = DefaultJSONProvider(app)
+    current = OrjsonProvider(app) if orjson is not None else None
+
+    payloads = {
+        'leaderboard': (
+            lambda: {'leaderboard': [legacy_entry_dict(entry) for entry in entries]},
+            lambda: {'leaderboard': [entry.to_dict_with_user() for entry in entries]}
+        ),
+        'challenges': (
+            lambda: {'challenges': [legacy_challenge_dict(challenge, 2) for challenge in challenges]},
+            lambda: {'challenges': [challenge.to_dict(flag_count=2) for challenge in challenges]}
+        )
+    }
+
+    print(f"Per-response cost, {rows} rows, best of 5 x {repeat} runs (microseconds)")
+    print(f"{'payload':<12} {'path':<8} {'build':>9} {'encode':>9} {'total':>9}")
+
+    with app.app_context():
+        for name, (build_legacy, build_current) in payloads.items():
+            paths = [('before', build_legacy, legacy), ('after', build_current, current or legacy)]
+            for label, build, provider in paths:
+                body = build()
+                build_cost = min(timeit.repeat(build, number=repeat, repeat=5)) / repeat
+                encode_cost = min(timeit.repeat(lambda: provider.response(body), number=repeat, repeat=5)) / repeat
+                print(f"{name:<12} {label:<8} {build_cost * 1e6:>9.1f} {encode_cost * 1e6:>9.1f} "
+                      f"{(build_cost + encode_cost) * 1e6:>9.1f}")
+
+    if current is None:
+        print("orjson is not installed: the 'after' rows use the standard library encoder")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark response serialization')
+    parser.add_argument('--rows', type=int, default=100, help='rows per response')
+    parser.add_argument('--repeat', type=int, default=2000, help='responses per timing run')
+    args = parser.parse_args()
+
+    run_benchmark(rows=args.rows, repeat=args.repeat)
@@ -48,6 +48,21 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection Pool Configuration (per worker process)
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))  # gunicorn workers sharing the connection budget
+    DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', 100))  # connections the database allows this app
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))  # 0 derives it from the budget and worker count
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds, below MySQL/proxy idle timeouts
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true'
+    DB_POOL_SLOW_CHECKOUT = float(os.environ.get('DB_POOL_SLOW_CHECKOUT', 0.1))  # seconds
+    
+    # Read Replica Configuration
+    DB_REPLICA_URIS = [uri.strip() for uri in os.environ.get('DB_REPLICA_URIS', '').split(',') if uri.strip()]
+    DB_REPLICA_STICKY_SECONDS = float(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))  # primary reads after a user's write
+    DB_REPLICA_STICKINESS_BACKEND = os.environ.get('DB_REPLICA_STICKINESS_BACKEND', 'memory')  # memory or redis
+    
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or generate_secure_key()
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES', 1)))
@@ -55,11 +70,61 @@ class Config:
     JWT_TOKEN_LOCATION = ['headers']
     JWT_HEADER_NAME = 'Authorization'
     JWT_HEADER_TYPE = 'Bearer'
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 0))  # seconds to reuse a loaded user on reads, 0 disables
     
     # Security Configuration
     BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # processes per web worker, 0 hashes inline
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 8))  # queued hashes before answering 503
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))  # seconds
+    PASSWORD_HASH_RETRY_AFTER = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER', 1))  # seconds
     RATE_LIMIT_PER_MINUTE = int(os.environ.get('RATE_LIMIT_PER_MINUTE', 60))
     
+    # Redis Configuration
+    REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
+    REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
+    REDIS_DB = int(os.environ.get('REDIS_DB', 0))
+    
+    # Leaderboard Configuration
+    LEADERBOARD_INDEX_BACKEND = os.environ.get('LEADERBOARD_INDEX_BACKEND', 'memory')  # memory or redis (needed to stream with several workers)
+    LEADERBOARD_INDEX_KEY = os.environ.get('LEADERBOARD_INDEX_KEY', 'cipherquest:leaderboard')
+    LEADERBOARD_INDEX_RESYNC_SECONDS = int(os.environ.get('LEADERBOARD_INDEX_RESYNC_SECONDS', 60))
+    LEADERBOARD_INDEX_CHECK_SECONDS = int(os.environ.get('LEADERBOARD_INDEX_CHECK_SECONDS', 5))  # redis only: how often to check the shared set still exists
+    LEADERBOARD_STATS_RECONCILE_SECONDS = int(os.environ.get('LEADERBOARD_STATS_RECONCILE_SECONDS', 300))
+    
+    # Scoring Worker Configuration
+    SCORING_QUEUE_BACKEND = os.environ.get('SCORING_QUEUE_BACKEND', 'thread')  # thread, redis or inline
+    SCORING_QUEUE_KEY = os.environ.get('SCORING_QUEUE_KEY', 'cipherquest:scoring')
+    SCORING_BATCH_SIZE = int(os.environ.get('SCORING_BATCH_SIZE', 100))  # jobs per transaction
+    SCORING_BATCH_INTERVAL = float(os.environ.get('SCORING_BATCH_INTERVAL', 0.5))  # seconds to gather a batch
+    
+    # Challenge Configuration
+    FLAG_MATCHER_CACHE_TTL = int(os.environ.get('FLAG_MATCHER_CACHE_TTL', 60))  # seconds, fallback when the shared catalog version is unavailable
+    
+    # Catalog Cache Configuration
+    CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', 1024))  # entries per worker
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 300))  # seconds, 0 disables
+    CATALOG_CACHE_REDIS = os.environ.get('CATALOG_CACHE_REDIS', 'False').lower() == 'true'  # share entries, not just the version
+    CATALOG_CACHE_VERSION_CHECK = float(os.environ.get('CATALOG_CACHE_VERSION_CHECK', 1.0))  # seconds between shared version reads
+    
+    # JSON Configuration
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')  # orjson or stdlib
+    
+    # Live Scoreboard Configuration
+    SCOREBOARD_STREAM_TOP = int(os.environ.get('SCOREBOARD_STREAM_TOP', 25))  # players pushed to stream clients
+    SCOREBOARD_STREAM_INTERVAL = float(os.environ.get('SCOREBOARD_STREAM_INTERVAL', 1.0))  # seconds between ticks
+    SCOREBOARD_STREAM_MAX_PENDING = int(os.environ.get('SCOREBOARD_STREAM_MAX_PENDING', 16))  # frames before a slow client is resynced
+    SCOREBOARD_STREAM_MAX_CLIENTS = int(os.environ.get('SCOREBOARD_STREAM_MAX_CLIENTS', 128))  # per worker, each holds a thread (see Dockerfile)
+    SCOREBOARD_STREAM_HEARTBEAT = int(os.environ.get('SCOREBOARD_STREAM_HEARTBEAT', 15))  # seconds between keep-alives
+    
+    # Compression Configuration
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))  # bytes, smaller bodies are sent as is
+    COMPRESSION_MIMETYPES = os.environ.get('COMPRESSION_MIMETYPES', 'application/json,text/csv,text/plain,text/html').split(',')
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))  # 1-9
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))  # 0-11, used when brotli is installed
+    COMPRESSION_CACHE_BYTES = int(os.environ.get('COMPRESSION_CACHE_BYTES', 16 * 1024 * 1024))  # per worker, 0 disables
+    
     # CORS Configuration
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
     CORS_METHODS = os.environ.get('CORS_METHODS', 'GET,POST,PUT,DELETE,OPTIONS').split(',')
@@ -85,6 +150,18 @@ class Config:
     
     # OpenAI Configuration
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+    LLM_BASE_URL = os.environ.get('LLM_BASE_URL')  # defaults to the OpenAI API
+    LLM_MODEL = os.environ.get('LLM_MODEL', 'gpt-3.5-turbo')
+    LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', 30))  # seconds
+    LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 8))  # in-flight completions per worker
+    LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 1))
+    LLM_RATE_LIMIT = int(os.environ.get('LLM_RATE_LIMIT', 60))  # upstream calls per period, all users (0 = no limit)
+    LLM_USER_RATE_LIMIT = int(os.environ.get('LLM_USER_RATE_LIMIT', 10))  # upstream calls per period, per user/IP (0 = no limit)
+    LLM_RATE_LIMIT_PERIOD = int(os.environ.get('LLM_RATE_LIMIT_PERIOD', 60))  # seconds
+    LLM_RATE_LIMIT_BACKEND = os.environ.get('LLM_RATE_LIMIT_BACKEND', 'redis')  # redis, or memory for per-worker budgets (limits x workers)
+    TUTOR_CACHE_SIZE = int(os.environ.get('TUTOR_CACHE_SIZE', 2048))  # cached answers per worker
+    TUTOR_CACHE_TTL = int(os.environ.get('TUTOR_CACHE_TTL', 86400))  # seconds, 0 disables
+    TUTOR_CACHE_SIMILARITY_THRESHOLD = float(os.environ.get('TUTOR_CACHE_SIMILARITY_THRESHOLD', 0))  # 0 = exact matches only
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -105,6 +182,15 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    LEADERBOARD_INDEX_BACKEND = 'memory'
+    LEADERBOARD_INDEX_RESYNC_SECONDS = 0
+    LEADERBOARD_STATS_RECONCILE_SECONDS = 0
+    FLAG_MATCHER_CACHE_TTL = 0
+    CATALOG_CACHE_TTL = 0
+    PASSWORD_HASH_WORKERS = 0
+    SCORING_QUEUE_BACKEND = 'inline'
+    SCOREBOARD_STREAM_INTERVAL = 0
+    LLM_RATE_LIMIT_BACKEND = 'memory'
 
 config = {
     'development': DevelopmentConfig,
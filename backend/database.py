@@ -1,4 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 
-# Create a single SQLAlchemy instance to be shared across all models
-db = SQLAlchemy() 
\ No newline at end of file
+from utils.db_routing import RoutingSession
+
+# Create a single SQLAlchemy instance to be shared across all models.
+# Its session sends reads in read-only requests to a replica, if configured.
+db = SQLAlchemy(session_options={'class_': RoutingSession})
@@ -12,11 +12,12 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app
-from models.user import db as user_db, User
-from models.module import db as module_db, Module
-from models.challenge import db as challenge_db, Challenge, Flag
-from models.progress import db as progress_db, UserProgress
-from models.leaderboard import db as leaderboard_db, LeaderboardEntry
+from database import db
+from models.user import User
+from models.module import Module
+from models.challenge import Challenge, Flag
+from models.progress import UserProgress
+from models.leaderboard import LeaderboardEntry
 
 def init_database():
     """Initialize database with tables and seed data"""
@@ -25,11 +26,7 @@ def init_database():
     with app.app_context():
         # Create all tables
         print("Creating database tables...")
-        user_db.create_all()
-        module_db.create_all()
-        challenge_db.create_all()
-        progress_db.create_all()
-        leaderboard_db.create_all()
+        db.create_all()
         
         print("Database tables created successfully!")
         
@@ -53,7 +50,7 @@ def init_database():
             experience=10000,
             rank='Master'
         )
-        user_db.session.add(admin_user)
+        db.session.add(admin_user)
         
         # Create sample users
         sample_users = [
@@ -90,9 +87,9 @@ def init_database():
         ]
         
         for user in sample_users:
-            user_db.session.add(user)
+            db.session.add(user)
         
-        user_db.session.commit()
+        db.session.commit()
         print("Users created successfully!")
         
         # Create modules
@@ -206,9 +203,9 @@ Reverse engineering is the process of analyzing software to understand its funct
         ]
         
         for module in modules:
-            module_db.session.add(module)
+            db.session.add(module)
         
-        module_db.session.commit()
+        db.session.commit()
         print("Modules created successfully!")
         
         # Create challenges
@@ -270,9 +267,9 @@ Reverse engineering is the process of analyzing software to understand its funct
         ]
         
         for challenge in challenges:
-            challenge_db.session.add(challenge)
+            db.session.add(challenge)
         
-        challenge_db.session.commit()
+        db.session.commit()
         print("Challenges created successfully!")
         
         # Create flags for challenges
@@ -286,9 +283,9 @@ Reverse engineering is the process of analyzing software to understand its funct
         ]
         
         for flag in flags:
-            challenge_db.session.add(flag)
+            db.session.add(flag)
         
-        challenge_db.session.commit()
+        db.session.commit()
         print("Flags created successfully!")
         
         # Create some sample progress
@@ -331,9 +328,9 @@ Reverse engineering is the process of analyzing software to understand its funct
         ]
         
         for progress in progress_entries:
-            progress_db.session.add(progress)
+            db.session.add(progress)
         
-        progress_db.session.commit()
+        db.session.commit()
         print("Progress entries created successfully!")
         
         # Create leaderboard entries
@@ -369,9 +366,9 @@ Reverse engineering is the process of analyzing software to understand its funct
         ]
         
         for entry in leaderboard_entries:
-            leaderboard_db.session.add(entry)
+            db.session.add(entry)
         
-        leaderboard_db.session.commit()
+        db.session.commit()
         print("Leaderboard entries created successfully!")
         
         print("\n🎉 Database initialization completed successfully!")
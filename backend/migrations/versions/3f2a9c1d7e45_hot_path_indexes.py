@@ -0,0 +1,141 @@
+"""Add indexes for hot query paths and unique progress rows
+
+Revision ID: 3f2a9c1d7e45
+Revises:
+Create Date: 2026-10-17 22:50:00.000000
+
+The schema itself predates migrations (init_db.py creates it with
+create_all), so this revision only adds what is missing: it is safe to run
+against a database created by an older create_all as well as a new one.
+Like the indexes, the event log tables are only added when the tables they
+reference already exist.
+
+Duplicate user_progress rows left by concurrent first submissions are
+merged into one row (the completed one if any, otherwise the oldest, with
+attempts and time spent summed) before the unique indexes are created.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7e45'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, unique)
+INDEXES = [
+    ('uq_user_progress_user_challenge', 'user_progress', ['user_id', 'challenge_id'], True),
+    ('uq_user_progress_user_module', 'user_progress', ['user_id', 'module_id'], True),
+    ('ix_user_progress_user_completed', 'user_progress', ['user_id', 'completed'], False),
+    ('ix_leaderboard_entries_score_user', 'leaderboard_entries', [sa.text('total_score DESC'), 'user_id'], False),
+    ('ix_challenges_active_category_difficulty', 'challenges', ['is_active', 'category', 'difficulty'], False),
+    ('ix_modules_active_category_difficulty', 'modules', ['is_active', 'category', 'difficulty'], False),
+    ('ix_modules_order_id', 'modules', ['order', 'id'], False),
+    ('ix_flags_challenge_active', 'flags', ['challenge_id', 'is_active'], False),
+]
+
+
+def _event_columns():
+    return [
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('module_id', sa.Integer(), nullable=True),
+        sa.Column('challenge_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['module_id'], ['modules.id']),
+        sa.ForeignKeyConstraint(['challenge_id'], ['challenges.id']),
+        sa.PrimaryKeyConstraint('id')
+    ]
+
+
+# Tables the event log references; they come from create_all, not a revision
+EVENT_PARENT_TABLES = ('users', 'modules', 'challenges')
+
+
+def _create_event_tables(tables):
+    if not all(parent in tables for parent in EVENT_PARENT_TABLES):
+        # No base schema yet: create_all will create the event tables with it
+        return
+    for name, columns in (
+        ('solve_events', [
+            sa.Column('score', sa.Integer(), nullable=False),
+            sa.Column('experience', sa.Integer(), nullable=False)
+        ]),
+        ('attempt_events', [
+            sa.Column('correct', sa.Boolean(), nullable=True),
+            sa.Column('counted', sa.Boolean(), nullable=False),
+            sa.Column('time_spent', sa.Integer(), nullable=False)
+        ])
+    ):
+        if name in tables:
+            continue
+        op.create_table(name, *columns, *_event_columns())
+        op.create_index(f'ix_{name}_created_at', name, ['created_at'])
+        op.create_index(f'ix_{name}_user_id', name, ['user_id'])
+
+
+def _merge_duplicate_progress(item):
+    """Collapse duplicate (user_id, <item>) progress rows into one"""
+    conn = op.get_bind()
+    progress = sa.table(
+        'user_progress',
+        sa.column('id'), sa.column('user_id'), sa.column(item),
+        sa.column('completed'), sa.column('attempts'), sa.column('time_spent')
+    )
+    item_column = progress.c[item]
+
+    duplicates = conn.execute(
+        sa.select(progress.c.user_id, item_column)
+        .where(item_column.isnot(None))
+        .group_by(progress.c.user_id, item_column)
+        .having(sa.func.count() > 1)
+    ).all()
+
+    for user_id, item_id in duplicates:
+        rows = conn.execute(
+            sa.select(progress.c.id, progress.c.completed, progress.c.attempts, progress.c.time_spent)
+            .where(progress.c.user_id == user_id, item_column == item_id)
+            .order_by(progress.c.id)
+        ).all()
+        keep = next((row for row in rows if row.completed), rows[0])
+
+        conn.execute(progress.update().where(progress.c.id == keep.id).values(
+            attempts=sum(row.attempts or 0 for row in rows),
+            time_spent=sum(row.time_spent or 0 for row in rows)
+        ))
+        conn.execute(progress.delete().where(
+            progress.c.id.in_([row.id for row in rows if row.id != keep.id])
+        ))
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    _create_event_tables(tables)
+
+    if 'user_progress' in tables:
+        _merge_duplicate_progress('challenge_id')
+        _merge_duplicate_progress('module_id')
+
+    for name, table, columns, unique in INDEXES:
+        if table not in tables:
+            continue
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            continue
+        op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    for name, table, columns, unique in reversed(INDEXES):
+        if table in tables and name in {index['name'] for index in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
+
+    # The event tables are kept: dropping them would lose the solve history
@@ -3,6 +3,7 @@ from .module import Module
 from .challenge import Challenge, Flag
 from .progress import UserProgress
 from .leaderboard import LeaderboardEntry
+from .events import SolveEvent, AttemptEvent
 
 __all__ = [
     'User',
@@ -10,5 +11,7 @@ __all__ = [
     'Challenge',
     'Flag',
     'UserProgress',
-    'LeaderboardEntry'
+    'LeaderboardEntry',
+    'SolveEvent',
+    'AttemptEvent'
 ] 
\ No newline at end of file
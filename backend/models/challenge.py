@@ -1,7 +1,8 @@
 from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import load_only
 
-db = SQLAlchemy()
+from database import db
+from utils.serializers import ModelSerializer
 
 class Challenge(db.Model):
     """CTF Challenge model"""
@@ -26,23 +27,30 @@ class Challenge(db.Model):
     flags = db.relationship('Flag', backref='challenge', lazy='dynamic', cascade='all, delete-orphan')
     progress = db.relationship('UserProgress', backref='challenge', lazy='dynamic', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Convert challenge to dictionary for API responses"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'category': self.category,
-            'difficulty': self.difficulty,
-            'points': self.points,
-            'hints': self.hints,
-            'files': self.files,
-            'is_active': self.is_active,
-            'module_id': self.module_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'flag_count': self.flags.count()
-        }
+    # Keys served by to_dict(), read in one pass
+    _serializer = ModelSerializer(
+        ('id', 'title', 'description', 'category', 'difficulty', 'points', 'hints',
+         'files', 'is_active', 'module_id', 'created_at', 'updated_at'),
+        datetime_keys=('created_at', 'updated_at')
+    )
+    # Keys a listing can select with ?fields=, and the ?view=summary projection
+    FIELDS = _serializer.keys + ('flag_count',)
+    SUMMARY_FIELDS = ('id', 'title', 'category', 'difficulty', 'points', 'module_id')
+    
+    def to_dict(self, flag_count=None, fields=None):
+        """Convert challenge to dictionary for API responses
+        
+        Pass ``flag_count`` (e.g. from get_flag_counts) to avoid a count query per challenge,
+        and ``fields`` to serve only those keys.
+        """
+        serializer = self._serializer if fields is None else self._serializer.only(fields)
+        challenge_dict = serializer(self)
+        
+        if fields is None or 'flag_count' in fields:
+            if flag_count is None:
+                flag_count = self.flags.count()
+            challenge_dict['flag_count'] = flag_count
+        return challenge_dict
     
     def to_dict_with_flags(self):
         """Convert challenge to dictionary including flags (admin only)"""
@@ -50,6 +58,24 @@ class Challenge(db.Model):
         challenge_dict['flags'] = [flag.to_dict() for flag in self.flags.all()]
         return challenge_dict
     
+    @classmethod
+    def load_fields(cls, query, fields):
+        """Load only the columns ``fields`` needs, plus the listing's sort key"""
+        if fields is None:
+            return query
+        columns = [getattr(cls, key) for key in cls._serializer.keys if key in fields]
+        return query.options(load_only(*columns, cls.id))
+    
+    @classmethod
+    def get_flag_counts(cls, challenge_ids):
+        """Count flags for several challenges with one grouped query"""
+        if not challenge_ids:
+            return {}
+        rows = db.session.query(Flag.challenge_id, db.func.count(Flag.id)).filter(
+            Flag.challenge_id.in_(challenge_ids)
+        ).group_by(Flag.challenge_id).all()
+        return dict(rows)
+    
     @classmethod
     def get_by_category(cls, category):
         """Get all challenges by category"""
@@ -112,4 +138,8 @@ class Flag(db.Model):
         return False
     
     def __repr__(self):
-        return f'<Flag {self.id} for Challenge {self.challenge_id}>' 
\ No newline at end of file
+        return f'<Flag {self.id} for Challenge {self.challenge_id}>'
+
+# Catalog filters and the flag lookup for each submission
+db.Index('ix_challenges_active_category_difficulty', Challenge.is_active, Challenge.category, Challenge.difficulty)
+db.Index('ix_flags_challenge_active', Flag.challenge_id, Flag.is_active)
@@ -0,0 +1,92 @@
+from datetime import datetime
+from sqlalchemy import event
+
+from database import db
+
+class AppendOnlyError(Exception):
+    """Raised when an event row is modified or deleted through the ORM"""
+
+class SolveEvent(db.Model):
+    """Append-only record of a first solve of a challenge or completion of a module"""
+    __tablename__ = 'solve_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    score = db.Column(db.Integer, default=0, nullable=False)  # leaderboard points
+    experience = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    # Foreign Keys
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    module_id = db.Column(db.Integer, db.ForeignKey('modules.id'), nullable=True)
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id'), nullable=True)
+
+    def __init__(self, user_id, **kwargs):
+        self.user_id = user_id
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def to_dict(self):
+        """Convert event to dictionary for API responses"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'module_id': self.module_id,
+            'challenge_id': self.challenge_id,
+            'score': self.score,
+            'experience': self.experience,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    @classmethod
+    def get_user_events(cls, user_id, since_id=None):
+        """Get a user's solve events in the order they happened"""
+        query = cls.query.filter_by(user_id=user_id)
+        if since_id is not None:
+            query = query.filter(cls.id > since_id)
+        return query.order_by(cls.id).all()
+
+    def __repr__(self):
+        return f'<SolveEvent {self.id} for User {self.user_id}>'
+
+class AttemptEvent(db.Model):
+    """Append-only record of a flag submission or a progress update"""
+    __tablename__ = 'attempt_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    correct = db.Column(db.Boolean)  # None for progress updates without a submission
+    counted = db.Column(db.Boolean, default=True, nullable=False)  # whether it added to the attempt counter
+    time_spent = db.Column(db.Integer, default=0, nullable=False)  # in seconds
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    # Foreign Keys
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    module_id = db.Column(db.Integer, db.ForeignKey('modules.id'), nullable=True)
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id'), nullable=True)
+
+    def __init__(self, user_id, **kwargs):
+        self.user_id = user_id
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def to_dict(self):
+        """Convert event to dictionary for API responses"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'module_id': self.module_id,
+            'challenge_id': self.challenge_id,
+            'correct': self.correct,
+            'counted': self.counted,
+            'time_spent': self.time_spent,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<AttemptEvent {self.id} for User {self.user_id}>'
+
+def _reject_change(mapper, connection, target):
+    raise AppendOnlyError(f'{type(target).__name__} rows are append-only')
+
+for _model in (SolveEvent, AttemptEvent):
+    event.listen(_model, 'before_update', _reject_change)
+    event.listen(_model, 'before_delete', _reject_change)
@@ -1,7 +1,10 @@
 from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, select, update, bindparam, case, and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
-db = SQLAlchemy()
+from database import db
+from utils.serializers import ModelSerializer
 
 class LeaderboardEntry(db.Model):
     """Leaderboard entry model for user rankings"""
@@ -17,48 +20,175 @@ class LeaderboardEntry(db.Model):
     # Foreign Keys
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
     
+    # Keys served by to_dict(), read in one pass
+    _serializer = ModelSerializer(
+        ('id', 'user_id', 'total_score', 'modules_completed', 'challenges_completed',
+         'rank', 'last_updated'),
+        datetime_keys=('last_updated',)
+    )
+    # The user fields shown next to each entry
+    _user_serializer = ModelSerializer(('username', 'level', 'rank', 'avatar_url'))
+    
     def __init__(self, user_id, **kwargs):
         self.user_id = user_id
         for key, value in kwargs.items():
             setattr(self, key, value)
     
-    def update_score(self, score):
+    def update_score(self, score, commit=True):
         """Update total score"""
         self.total_score = score
         self.last_updated = datetime.utcnow()
-        db.session.commit()
+        if commit:
+            db.session.commit()
     
-    def update_completed_counts(self, modules_count, challenges_count):
+    def update_completed_counts(self, modules_count, challenges_count, commit=True):
         """Update completed counts"""
         self.modules_completed = modules_count
         self.challenges_completed = challenges_count
         self.last_updated = datetime.utcnow()
-        db.session.commit()
+        if commit:
+            db.session.commit()
+    
+    @classmethod
+    def apply_score_delta(cls, user_id, score_delta, modules_delta=0, challenges_delta=0, commit=True):
+        """Atomically add points and completion counts to a user's entry
+        
+        Issues a single ``UPDATE ... SET total_score = total_score + :delta``
+        so concurrent solves never overwrite each other, and creates the
+        entry on the user's first solve. Returns the new total score, as
+        seen inside the current transaction when ``commit=False``.
+        """
+        updated = cls.query.filter_by(user_id=user_id).update({
+            'total_score': func.coalesce(cls.total_score, 0) + score_delta,
+            'modules_completed': func.coalesce(cls.modules_completed, 0) + modules_delta,
+            'challenges_completed': func.coalesce(cls.challenges_completed, 0) + challenges_delta,
+            'last_updated': datetime.utcnow()
+        }, synchronize_session=False)
+        
+        if not updated:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(cls(
+                        user_id=user_id,
+                        total_score=score_delta,
+                        modules_completed=modules_delta,
+                        challenges_completed=challenges_delta
+                    ))
+            except IntegrityError:
+                # A concurrent first solve created the entry; add to it instead
+                return cls.apply_score_delta(user_id, score_delta, modules_delta, challenges_delta, commit)
+        
+        if commit:
+            db.session.commit()
+        return db.session.query(cls.total_score).filter_by(user_id=user_id).scalar()
+    
+    @classmethod
+    def totals_from_progress(cls):
+        """Recompute totals and completion counts per user from completed progress"""
+        from models.progress import UserProgress
+        from models.module import Module
+        from models.challenge import Challenge
+        
+        expected = {}
+        
+        module_totals = db.session.query(
+            UserProgress.user_id, func.sum(Module.points), func.count(UserProgress.id)
+        ).join(Module, Module.id == UserProgress.module_id).filter(
+            UserProgress.completed.is_(True)
+        ).group_by(UserProgress.user_id)
+        
+        for user_id, points, count in module_totals:
+            totals = expected.setdefault(user_id, {'total_score': 0, 'modules_completed': 0, 'challenges_completed': 0})
+            totals['total_score'] += points or 0
+            totals['modules_completed'] = count
+        
+        challenge_totals = db.session.query(
+            UserProgress.user_id, func.sum(Challenge.points), func.count(UserProgress.id)
+        ).join(Challenge, Challenge.id == UserProgress.challenge_id).filter(
+            UserProgress.completed.is_(True)
+        ).group_by(UserProgress.user_id)
+        
+        for user_id, points, count in challenge_totals:
+            totals = expected.setdefault(user_id, {'total_score': 0, 'modules_completed': 0, 'challenges_completed': 0})
+            totals['total_score'] += points or 0
+            totals['challenges_completed'] = count
+        
+        return expected
+    
+    @classmethod
+    def reconcile(cls, fix=False, expected=None):
+        """Compare stored totals against recomputed totals
+        
+        ``expected`` maps user ids to recomputed totals and defaults to
+        totals_from_progress(). Returns a list of mismatches. With
+        ``fix=True`` the stored totals and counts are overwritten with the
+        recomputed values.
+        """
+        if expected is None:
+            expected = cls.totals_from_progress()
+        
+        entries = {entry.user_id: entry for entry in cls.query.all()}
+        mismatches = []
+        
+        for user_id in set(expected) | set(entries):
+            totals = expected.get(user_id, {'total_score': 0, 'modules_completed': 0, 'challenges_completed': 0})
+            entry = entries.get(user_id)
+            stored = {
+                'total_score': entry.total_score or 0,
+                'modules_completed': entry.modules_completed or 0,
+                'challenges_completed': entry.challenges_completed or 0
+            } if entry else None
+            
+            if stored == totals:
+                continue
+            
+            mismatches.append({'user_id': user_id, 'stored': stored, 'expected': totals})
+            
+            if fix:
+                if not entry:
+                    entry = cls(user_id=user_id)
+                    db.session.add(entry)
+                entry.total_score = totals['total_score']
+                entry.modules_completed = totals['modules_completed']
+                entry.challenges_completed = totals['challenges_completed']
+                entry.last_updated = datetime.utcnow()
+        
+        if fix and mismatches:
+            db.session.commit()
+        
+        return mismatches
     
     def to_dict(self):
         """Convert leaderboard entry to dictionary for API responses"""
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'total_score': self.total_score,
-            'modules_completed': self.modules_completed,
-            'challenges_completed': self.challenges_completed,
-            'rank': self.rank,
-            'last_updated': self.last_updated.isoformat() if self.last_updated else None
-        }
+        return self._serializer(self)
     
     def to_dict_with_user(self):
         """Convert leaderboard entry to dictionary including user info"""
         entry_dict = self.to_dict()
         if hasattr(self, 'user') and self.user:
-            entry_dict['user'] = {
-                'username': self.user.username,
-                'level': self.user.level,
-                'rank': self.user.rank,
-                'avatar_url': self.user.avatar_url
-            }
+            entry_dict['user'] = self._user_serializer(self.user)
         return entry_dict
     
+    @classmethod
+    def serialize_ranked(cls, ranked_players, ranks):
+        """Entries with user info for ranked (user_id, score) pairs and their ranks, in index order, from one query"""
+        user_ids = [user_id for user_id, _ in ranked_players]
+        if not user_ids:
+            return []
+        
+        entries = cls.query.options(joinedload(cls.user)).filter(cls.user_id.in_(user_ids)).all()
+        entries_by_user = {entry.user_id: entry for entry in entries}
+        
+        players = []
+        for (user_id, _), rank in zip(ranked_players, ranks):
+            entry = entries_by_user.get(user_id)
+            if not entry:
+                continue
+            entry_dict = entry.to_dict_with_user()
+            entry_dict['rank'] = rank
+            players.append(entry_dict)
+        return players
+    
     @classmethod
     def get_top_players(cls, limit=10):
         """Get top players by score"""
@@ -75,12 +205,234 @@ class LeaderboardEntry(db.Model):
         return None
     
     @classmethod
-    def update_all_ranks(cls):
-        """Update ranks for all entries based on total score"""
-        entries = cls.query.order_by(cls.total_score.desc()).all()
-        for i, entry in enumerate(entries):
-            entry.rank = i + 1
+    def get_page_stamp(cls, user_ids):
+        """Latest entry and user profile updates among ``user_ids``, for validating a cached page"""
+        from models.user import User
+        
+        if not user_ids:
+            return None, None
+        return db.session.query(func.max(cls.last_updated), func.max(User.updated_at)).join(
+            User, User.id == cls.user_id
+        ).filter(cls.user_id.in_(user_ids)).one()
+    
+    @classmethod
+    def _supports_window_functions(cls, sqlite_version=(3, 25, 0)):
+        """Whether the database has window functions (SQLite from ``sqlite_version``)"""
+        dialect = db.session.get_bind().dialect
+        if dialect.name == 'sqlite':
+            return dialect.dbapi.sqlite_version_info >= sqlite_version
+        if dialect.name in ('mysql', 'mariadb'):
+            version = dialect.server_version_info or ()
+            return version >= ((10, 2) if dialect.is_mariadb else (8, 0))
+        return dialect.name == 'postgresql'
+    
+    @classmethod
+    def _supports_window_update(cls):
+        """Whether the database can run ``UPDATE ... FROM`` a window-function subquery"""
+        return cls._supports_window_functions(sqlite_version=(3, 33, 0))
+    
+    @classmethod
+    def _ordered_before(cls, total_score, user_id):
+        """Filter for entries that sort before (total_score, user_id) on the leaderboard"""
+        # The leading range condition lets the database seek the score index
+        return and_(
+            cls.total_score >= total_score,
+            or_(cls.total_score > total_score, cls.user_id < user_id)
+        )
+    
+    @classmethod
+    def _ordered_after(cls, total_score, user_id):
+        """Filter for entries that sort after (total_score, user_id) on the leaderboard"""
+        return and_(
+            cls.total_score <= total_score,
+            or_(cls.total_score < total_score, cls.user_id > user_id)
+        )
+    
+    @classmethod
+    def _position_of(cls, total_score, user_id):
+        """Zero-based leaderboard position of an entry with this score and user id"""
+        return cls.query.filter(cls._ordered_before(total_score, user_id)).count()
+    
+    @classmethod
+    def _positions_in_score_range(cls, changed):
+        """Zero-based positions of ``changed`` (sorted in leaderboard order) in two queries
+        
+        Entries above the best changed score are counted; the rest are
+        numbered with ROW_NUMBER() over the changed score range only.
+        """
+        top_score, bottom_score = changed[0].total_score, changed[-1].total_score
+        above = cls.query.filter(cls.total_score > top_score).count()
+        
+        numbered = select(
+            cls.user_id,
+            func.row_number().over(order_by=(cls.total_score.desc(), cls.user_id)).label('row_number')
+        ).where(cls.total_score.between(bottom_score, top_score)).subquery('numbered')
+        rows = db.session.execute(
+            select(numbered.c.user_id, numbered.c.row_number).where(
+                numbered.c.user_id.in_([user_id for _, user_id, _ in changed])
+            )
+        ).all()
+        return {user_id: above + row_number - 1 for user_id, row_number in rows}
+    
+    @classmethod
+    def _changed_rank_spans(cls, since, max_tracked=200):
+        """Position ranges [start, end) whose ranks may have changed since ``since``
+        
+        An entry that moved from its stored rank to a new position only
+        shifts the entries in between, so only those spans (padded by the
+        number of moved entries, which bounds how far concurrent moves can
+        skew positions) are recomputed. New entries shift everything below
+        them (end is None). With more than ``max_tracked`` changes a single
+        span covering all of them is used. Without window functions to
+        locate the changed entries the whole leaderboard is refreshed.
+        """
+        changed = cls.query.with_entities(cls.total_score, cls.user_id, cls.rank).filter(
+            cls.last_updated >= since
+        ).order_by(cls.total_score.desc(), cls.user_id).limit(max_tracked + 1).all()
+        if not changed:
+            return []
+        
+        if len(changed) > max_tracked:
+            min_rank, max_rank, unranked = cls.query.filter(cls.last_updated >= since).with_entities(
+                func.min(cls.rank), func.max(cls.rank), func.count(case((cls.rank.is_(None), 1)))
+            ).one()
+            worst = cls.query.with_entities(cls.total_score, cls.user_id).filter(
+                cls.last_updated >= since
+            ).order_by(cls.total_score, cls.user_id.desc()).first()
+            start = cls._position_of(changed[0].total_score, changed[0].user_id)
+            if min_rank is not None:
+                start = min(start, min_rank - 1)
+            end = None if unranked else max(max_rank, cls._position_of(*worst) + 1)
+            return [(start, end)]
+        
+        if not cls._supports_window_functions():
+            return [(0, None)]
+        
+        positions = cls._positions_in_score_range(changed)
+        padding = len(changed)
+        spans = []
+        for total_score, user_id, rank in changed:
+            position = positions[user_id]
+            if rank is None:
+                spans.append((max(position - padding, 0), None))
+            else:
+                spans.append((
+                    max(min(position, rank - 1) - padding, 0),
+                    max(position, rank - 1) + 1 + padding
+                ))
+        
+        # Merge overlapping spans
+        spans.sort(key=lambda span: span[0])
+        merged = [spans[0]]
+        for start, end in spans[1:]:
+            last_start, last_end = merged[-1]
+            if last_end is None or start <= last_end:
+                merged[-1] = (last_start, None if last_end is None or end is None else max(last_end, end))
+            else:
+                merged.append((start, end))
+        return merged
+    
+    @classmethod
+    def _assign_ranks(cls, start, end, chunk_size, use_window):
+        """Write ranks for positions [start, end) (to the last entry if end is None)"""
+        cursor = None
+        if start > 0:
+            cursor = cls.query.with_entities(cls.total_score, cls.user_id).order_by(
+                cls.total_score.desc(), cls.user_id
+            ).offset(start - 1).first()
+            if cursor is None:
+                return 0
+        
+        table = cls.__table__
+        position = start
+        changed = 0
+        
+        while end is None or position < end:
+            limit = chunk_size if end is None else min(chunk_size, end - position)
+            page = select(cls.id, cls.total_score, cls.user_id, cls.rank)
+            if cursor is not None:
+                page = page.where(cls._ordered_after(*cursor))
+            page = page.order_by(cls.total_score.desc(), cls.user_id).limit(limit)
+            
+            if use_window:
+                # Last entry of this chunk, or None if the leaderboard ends inside it
+                boundary = db.session.execute(
+                    page.with_only_columns(cls.total_score, cls.user_id).offset(limit - 1).limit(1)
+                ).first()
+                
+                page = page.subquery('page')
+                ranked = select(
+                    page.c.id,
+                    (position + func.row_number().over(
+                        order_by=(page.c.total_score.desc(), page.c.user_id)
+                    )).label('new_rank')
+                ).subquery('ranked')
+                
+                result = db.session.execute(
+                    update(table).values(
+                        rank=ranked.c.new_rank,
+                        # Keep rank refreshes out of the incremental change set
+                        last_updated=table.c.last_updated
+                    ).where(table.c.id == ranked.c.id).where(
+                        or_(table.c.rank.is_(None), table.c.rank != ranked.c.new_rank)
+                    ),
+                    execution_options={'synchronize_session': False}
+                )
+                changed += result.rowcount
+            else:
+                rows = db.session.execute(page).all()
+                updates = [
+                    {'entry_id': row.id, 'new_rank': position + offset + 1}
+                    for offset, row in enumerate(rows)
+                    if row.rank != position + offset + 1
+                ]
+                if updates:
+                    db.session.execute(
+                        update(table).where(table.c.id == bindparam('entry_id')).values(
+                            rank=bindparam('new_rank'),
+                            last_updated=table.c.last_updated
+                        ),
+                        updates,
+                        execution_options={'synchronize_session': False}
+                    )
+                changed += len(updates)
+                boundary = (rows[-1].total_score, rows[-1].user_id) if len(rows) == limit else None
+            
+            db.session.commit()
+            
+            if boundary is None:
+                break
+            position += limit
+            cursor = tuple(boundary)
+        
+        return changed
+    
+    @classmethod
+    def update_all_ranks(cls, chunk_size=10000, since=None):
+        """Materialize leaderboard positions into the ``rank`` column
+        
+        Ranks follow the leaderboard order (score descending, ties by user
+        id) and are assigned in chunks of ``chunk_size`` positions, each in
+        its own short transaction. Where supported, each chunk is a single
+        ``UPDATE`` from a ``ROW_NUMBER()`` subquery over an index-ordered
+        page; otherwise ranks are computed in Python from (id, rank) pairs.
+        Only entries whose rank actually changes are written.
+        
+        With ``since`` set (normally the start time of the previous pass),
+        only positions that entries updated since then can have disturbed
+        are recomputed. Deleted entries are only accounted for by a full pass.
+        
+        Returns the number of entries whose rank changed.
+        """
+        # Keyset paging needs comparable scores
+        cls.query.filter(cls.total_score.is_(None)).update(
+            {'total_score': 0}, synchronize_session=False
+        )
         db.session.commit()
+        
+        spans = [(0, None)] if since is None else cls._changed_rank_spans(since)
+        use_window = cls._supports_window_update()
+        return sum(cls._assign_ranks(start, end, chunk_size, use_window) for start, end in spans)
     
     @classmethod
     def get_leaderboard(cls, limit=50):
@@ -88,4 +440,7 @@ class LeaderboardEntry(db.Model):
         return cls.query.order_by(cls.total_score.desc()).limit(limit).all()
     
     def __repr__(self):
-        return f'<LeaderboardEntry {self.id} for User {self.user_id}>' 
\ No newline at end of file
+        return f'<LeaderboardEntry {self.id} for User {self.user_id}>'
+
+# Leaderboard order; lets rank refreshes and keyset pages walk the index
+db.Index('ix_leaderboard_entries_score_user', LeaderboardEntry.total_score.desc(), LeaderboardEntry.user_id)
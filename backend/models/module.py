@@ -1,7 +1,8 @@
 from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import load_only
 
-db = SQLAlchemy()
+from database import db
+from utils.serializers import ModelSerializer
 
 class Module(db.Model):
     """Learning module model"""
@@ -24,30 +25,65 @@ class Module(db.Model):
     challenges = db.relationship('Challenge', backref='module', lazy='dynamic', cascade='all, delete-orphan')
     progress = db.relationship('UserProgress', backref='module', lazy='dynamic', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Convert module to dictionary for API responses"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'content': self.content,
-            'difficulty': self.difficulty,
-            'category': self.category,
-            'order': self.order,
-            'estimated_time': self.estimated_time,
-            'points': self.points,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'challenge_count': self.challenges.count()
-        }
+    # Keys served by to_dict(), read in one pass
+    _serializer = ModelSerializer(
+        ('id', 'title', 'description', 'content', 'difficulty', 'category', 'order',
+         'estimated_time', 'points', 'is_active', 'created_at', 'updated_at'),
+        datetime_keys=('created_at', 'updated_at')
+    )
+    # Keys a listing can select with ?fields=, and the ?view=summary projection
+    FIELDS = _serializer.keys + ('challenge_count',)
+    SUMMARY_FIELDS = ('id', 'title', 'difficulty', 'category', 'order', 'estimated_time', 'points', 'challenge_count')
+    
+    def to_dict(self, challenge_count=None, fields=None):
+        """Convert module to dictionary for API responses
+        
+        Pass ``challenge_count`` (e.g. from get_challenge_counts) to avoid a count query per module,
+        and ``fields`` to serve only those keys.
+        """
+        serializer = self._serializer if fields is None else self._serializer.only(fields)
+        module_dict = serializer(self)
+        
+        if fields is None or 'challenge_count' in fields:
+            if challenge_count is None:
+                challenge_count = self.challenges.count()
+            module_dict['challenge_count'] = challenge_count
+        return module_dict
+    
+    @classmethod
+    def load_fields(cls, query, fields):
+        """Load only the columns ``fields`` needs, plus the listing's sort key"""
+        if fields is None:
+            return query
+        columns = [getattr(cls, key) for key in cls._serializer.keys if key in fields]
+        return query.options(load_only(*columns, cls.order, cls.id))
     
     def to_dict_with_challenges(self):
         """Convert module to dictionary including challenges"""
-        module_dict = self.to_dict()
-        module_dict['challenges'] = [challenge.to_dict() for challenge in self.challenges.all()]
+        from models.challenge import Challenge
+        
+        challenges = self.challenges.all()
+        flag_counts = Challenge.get_flag_counts([challenge.id for challenge in challenges])
+        
+        module_dict = self.to_dict(challenge_count=len(challenges))
+        module_dict['challenges'] = [
+            challenge.to_dict(flag_count=flag_counts.get(challenge.id, 0))
+            for challenge in challenges
+        ]
         return module_dict
     
+    @classmethod
+    def get_challenge_counts(cls, module_ids):
+        """Count challenges for several modules with one grouped query"""
+        from models.challenge import Challenge
+        
+        if not module_ids:
+            return {}
+        rows = db.session.query(Challenge.module_id, db.func.count(Challenge.id)).filter(
+            Challenge.module_id.in_(module_ids)
+        ).group_by(Challenge.module_id).all()
+        return dict(rows)
+    
     @classmethod
     def get_by_category(cls, category):
         """Get all modules by category"""
@@ -59,4 +95,8 @@ class Module(db.Model):
         return cls.query.filter_by(difficulty=difficulty, is_active=True).order_by(cls.order).all()
     
     def __repr__(self):
-        return f'<Module {self.title}>' 
\ No newline at end of file
+        return f'<Module {self.title}>'
+
+# Catalog filters and keyset pagination of the module list
+db.Index('ix_modules_active_category_difficulty', Module.is_active, Module.category, Module.difficulty)
+db.Index('ix_modules_order_id', Module.order, Module.id)
@@ -1,7 +1,10 @@
 from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
 
-db = SQLAlchemy()
+from database import db
+from utils.serializers import ModelSerializer
 
 class UserProgress(db.Model):
     """User progress tracking model"""
@@ -21,43 +24,66 @@ class UserProgress(db.Model):
     module_id = db.Column(db.Integer, db.ForeignKey('modules.id'), nullable=True)
     challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id'), nullable=True)
     
+    # Keys served by to_dict(), read in one pass
+    _serializer = ModelSerializer(
+        ('id', 'completed', 'completed_at', 'score', 'attempts', 'time_spent',
+         'user_id', 'module_id', 'challenge_id', 'created_at', 'updated_at'),
+        datetime_keys=('completed_at', 'created_at', 'updated_at')
+    )
+    
     def __init__(self, user_id, **kwargs):
         self.user_id = user_id
         for key, value in kwargs.items():
             setattr(self, key, value)
     
-    def mark_completed(self, score=0):
+    def mark_completed(self, score=0, commit=True):
         """Mark progress as completed"""
         self.completed = True
         self.completed_at = datetime.utcnow()
         self.score = score
-        db.session.commit()
+        if commit:
+            db.session.commit()
+    
+    def claim_completion(self, score=0):
+        """Mark progress as completed unless another request already has
+        
+        Concurrent first submissions both read ``completed=False``; the
+        conditional UPDATE lets exactly one of them win. Returns True only
+        for that one, which is the request that may award points. Nothing
+        is committed.
+        """
+        now = datetime.utcnow()
+        values = {'completed': True, 'completed_at': now, 'score': score, 'updated_at': now}
+        result = db.session.execute(
+            update(UserProgress)
+            .where(UserProgress.id == self.id, UserProgress.completed.isnot(True))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            # Someone else completed it; reload their values when next read
+            db.session.expire(self, list(values))
+            return False
+        
+        for key, value in values.items():
+            set_committed_value(self, key, value)
+        return True
     
-    def increment_attempts(self):
+    def increment_attempts(self, commit=True):
         """Increment attempt counter"""
-        self.attempts += 1
-        db.session.commit()
+        self.attempts = (self.attempts or 0) + 1
+        if commit:
+            db.session.commit()
     
-    def add_time_spent(self, seconds):
+    def add_time_spent(self, seconds, commit=True):
         """Add time spent on this item"""
-        self.time_spent += seconds
-        db.session.commit()
+        self.time_spent = (self.time_spent or 0) + seconds
+        if commit:
+            db.session.commit()
     
     def to_dict(self):
         """Convert progress to dictionary for API responses"""
-        return {
-            'id': self.id,
-            'completed': self.completed,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'score': self.score,
-            'attempts': self.attempts,
-            'time_spent': self.time_spent,
-            'user_id': self.user_id,
-            'module_id': self.module_id,
-            'challenge_id': self.challenge_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return self._serializer(self)
     
     @classmethod
     def get_user_module_progress(cls, user_id, module_id):
@@ -69,6 +95,49 @@ class UserProgress(db.Model):
         """Get user progress for a specific challenge"""
         return cls.query.filter_by(user_id=user_id, challenge_id=challenge_id).first()
     
+    @classmethod
+    def get_or_create(cls, user_id, module_id=None, challenge_id=None):
+        """Get user progress for a module or challenge, creating it if missing
+        
+        The insert runs in a savepoint, so when a concurrent first request
+        wins the unique constraint its row is returned instead of failing.
+        """
+        filters = {'module_id': module_id} if module_id is not None else {'challenge_id': challenge_id}
+        progress = cls.query.filter_by(user_id=user_id, **filters).first()
+        if progress:
+            return progress
+        
+        try:
+            with db.session.begin_nested():
+                progress = cls(user_id=user_id, **filters)
+                db.session.add(progress)
+        except IntegrityError:
+            progress = cls.query.filter_by(user_id=user_id, **filters).first()
+        return progress
+    
+    @classmethod
+    def get_user_module_progress_map(cls, user_id, module_ids):
+        """Get user progress for several modules in one query, keyed by module id"""
+        if not module_ids:
+            return {}
+        rows = cls.query.filter(cls.user_id == user_id, cls.module_id.in_(module_ids)).all()
+        return {progress.module_id: progress for progress in rows}
+    
+    @classmethod
+    def get_user_challenge_progress_map(cls, user_id, challenge_ids):
+        """Get user progress for several challenges in one query, keyed by challenge id"""
+        if not challenge_ids:
+            return {}
+        rows = cls.query.filter(cls.user_id == user_id, cls.challenge_id.in_(challenge_ids)).all()
+        return {progress.challenge_id: progress for progress in rows}
+    
+    @classmethod
+    def get_user_stamp(cls, user_id):
+        """(row count, latest update) of a user's progress, which changes whenever any of it does"""
+        return db.session.query(db.func.count(cls.id), db.func.max(cls.updated_at)).filter(
+            cls.user_id == user_id
+        ).one()
+    
     @classmethod
     def get_user_all_progress(cls, user_id):
         """Get all progress for a user"""
@@ -85,4 +154,10 @@ class UserProgress(db.Model):
         return cls.query.filter_by(user_id=user_id, completed=True).filter(cls.challenge_id.isnot(None)).all()
     
     def __repr__(self):
-        return f'<UserProgress {self.id} for User {self.user_id}>' 
\ No newline at end of file
+        return f'<UserProgress {self.id} for User {self.user_id}>'
+
+# One progress row per user and item; concurrent first submissions can't
+# create duplicates. NULLs are distinct, so module and challenge rows don't clash.
+db.Index('uq_user_progress_user_challenge', UserProgress.user_id, UserProgress.challenge_id, unique=True)
+db.Index('uq_user_progress_user_module', UserProgress.user_id, UserProgress.module_id, unique=True)
+db.Index('ix_user_progress_user_completed', UserProgress.user_id, UserProgress.completed)
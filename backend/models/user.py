@@ -1,10 +1,8 @@
 from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
 from sqlalchemy.sql import func
 
-db = SQLAlchemy()
-bcrypt = Bcrypt()
+from database import db
+from utils.serializers import ModelSerializer
 
 class User(db.Model):
     """User model for authentication and profile management"""
@@ -34,6 +32,14 @@ class User(db.Model):
     progress = db.relationship('UserProgress', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     leaderboard_entries = db.relationship('LeaderboardEntry', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Keys served by to_dict(), read in one pass
+    _serializer = ModelSerializer(
+        ('id', 'username', 'email', 'first_name', 'last_name', 'avatar_url', 'bio',
+         'level', 'experience', 'rank', 'is_active', 'is_admin', 'email_verified',
+         'oauth_provider', 'created_at', 'last_login'),
+        datetime_keys=('created_at', 'last_login')
+    )
+    
     def __init__(self, username, email, password=None, **kwargs):
         self.username = username
         self.email = email
@@ -44,56 +50,81 @@ class User(db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        from utils.password_hashing import get_password_hasher
+        self.password_hash = get_password_hasher().hash_password(password)
     
     def check_password(self, password):
         """Check if provided password matches hash"""
-        return bcrypt.check_password_hash(self.password_hash, password)
+        from utils.password_hashing import get_password_hasher
+        return get_password_hasher().check_password(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Check if the password hash was made with a different cost than configured"""
+        from utils.password_hashing import get_password_hasher
+        return get_password_hasher().needs_rehash(self.password_hash)
     
     def to_dict(self):
         """Convert user to dictionary for API responses"""
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'avatar_url': self.avatar_url,
-            'bio': self.bio,
-            'level': self.level,
-            'experience': self.experience,
-            'rank': self.rank,
-            'is_active': self.is_active,
-            'is_admin': self.is_admin,
-            'email_verified': self.email_verified,
-            'oauth_provider': self.oauth_provider,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'last_login': self.last_login.isoformat() if self.last_login else None
-        }
+        return self._serializer(self)
     
-    def update_last_login(self):
+    def update_last_login(self, commit=True):
         """Update last login timestamp"""
         self.last_login = datetime.utcnow()
-        db.session.commit()
+        if commit:
+            db.session.commit()
     
-    def add_experience(self, points):
-        """Add experience points and update level"""
-        self.experience += points
-        self.level = (self.experience // 100) + 1
+    @staticmethod
+    def level_and_rank(experience):
+        """Level and rank title for an amount of experience"""
+        level = (experience // 100) + 1
         
-        # Update rank based on level
-        if self.level >= 20:
-            self.rank = 'Master'
-        elif self.level >= 15:
-            self.rank = 'Expert'
-        elif self.level >= 10:
-            self.rank = 'Advanced'
-        elif self.level >= 5:
-            self.rank = 'Intermediate'
+        # Rank based on level
+        if level >= 20:
+            rank = 'Master'
+        elif level >= 15:
+            rank = 'Expert'
+        elif level >= 10:
+            rank = 'Advanced'
+        elif level >= 5:
+            rank = 'Intermediate'
         else:
-            self.rank = 'Novice'
+            rank = 'Novice'
+        
+        return level, rank
+    
+    def add_experience(self, points, commit=True):
+        """Add experience points and update level"""
+        self.experience = (self.experience or 0) + points
+        self.level, self.rank = self.level_and_rank(self.experience)
+        
+        if commit:
+            db.session.commit()
+    
+    @classmethod
+    def apply_experience_delta(cls, user_id, points, commit=True):
+        """Atomically add experience to a user and recompute level and rank
+        
+        Uses ``UPDATE ... SET experience = experience + :points`` so that
+        concurrent awards never overwrite each other. Returns the new
+        experience, or None if the user doesn't exist.
+        """
+        updated = cls.query.filter_by(id=user_id).update({
+            'experience': func.coalesce(cls.experience, 0) + points
+        }, synchronize_session=False)
+        if not updated:
+            return None
+        
+        # The row is locked by the update above until this transaction ends
+        experience = db.session.query(cls.experience).filter_by(id=user_id).scalar()
+        level, rank = cls.level_and_rank(experience)
+        cls.query.filter_by(id=user_id).update({
+            'level': level,
+            'rank': rank
+        }, synchronize_session=False)
         
-        db.session.commit()
+        if commit:
+            db.session.commit()
+        return experience
     
     def __repr__(self):
         return f'<User {self.username}>' 
\ No newline at end of file
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Leaderboard reconciliation job for CipherQuest
+Verifies incrementally maintained leaderboard totals against completed progress
+or the solve event log
+"""
+
+import argparse
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from models.leaderboard import LeaderboardEntry
+from utils.event_projections import leaderboard_totals, backfill_solve_events
+
+def reconcile_scores(fix=False, from_events=False, backfill=False):
+    """Report (and optionally repair) leaderboard entries that drifted from progress"""
+    app = create_app(os.environ.get('FLASK_CONFIG', 'default'))
+
+    with app.app_context():
+        if backfill:
+            print(f"Backfilled {backfill_solve_events()} solve events from completed progress.")
+
+        print("Reconciling leaderboard totals...")
+        expected = leaderboard_totals() if from_events else None
+        mismatches = LeaderboardEntry.reconcile(fix=fix, expected=expected)
+
+        for mismatch in mismatches:
+            print(f"User {mismatch['user_id']}: stored={mismatch['stored']} expected={mismatch['expected']}")
+
+        if not mismatches:
+            print("All leaderboard totals match.")
+        elif fix:
+            print(f"Repaired {len(mismatches)} leaderboard entries.")
+        else:
+            print(f"Found {len(mismatches)} mismatched entries. Re-run with --fix to repair them.")
+
+        return mismatches
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fix', action='store_true', help='overwrite drifted totals with recomputed values')
+    parser.add_argument('--from-events', action='store_true', help='recompute totals from the solve event log')
+    parser.add_argument('--backfill-events', action='store_true', help='log solve events for completed progress that has none')
+    args = parser.parse_args()
+
+    mismatches = reconcile_scores(fix=args.fix, from_events=args.from_events, backfill=args.backfill_events)
+    sys.exit(1 if mismatches and not args.fix else 0)
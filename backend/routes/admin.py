@@ -1,5 +1,7 @@
+from datetime import datetime
+from functools import wraps
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_current_user
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
@@ -9,15 +11,21 @@ from models.challenge import Challenge, Flag
 from models.progress import UserProgress
 from models.leaderboard import LeaderboardEntry
 from utils.validators import sanitize_input
+from utils.flag_matcher import invalidate_flag_matcher
+from utils.catalog_cache import invalidate_catalog
+from utils.tutor_cache import get_tutor_cache
+from utils.pagination import paginate_keyset, InvalidCursor
+from utils.db_pool import get_db_pool_stats
+from utils.compression import get_response_compressor
 
 admin_bp = Blueprint('admin', __name__)
 limiter = Limiter(key_func=get_remote_address)
 
 def admin_required(f):
     """Decorator to check if user is admin"""
+    @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_current_user()
         
         if not user or not user.is_admin:
             return jsonify({'error': 'Admin access required'}), 403
@@ -69,8 +77,12 @@ def get_users():
         # Get query parameters
         limit = request.args.get('limit', 50, type=int)
         offset = request.args.get('offset', 0, type=int)
+        cursor = request.args.get('cursor')
         search = request.args.get('search', '')
         
+        # Counting every matching user is optional once clients page by cursor
+        include_total = request.args.get('include_total', 'false' if cursor else 'true').lower() == 'true'
+        
         # Build query
         query = User.query
         
@@ -82,14 +94,18 @@ def get_users():
                 )
             )
         
-        # Apply pagination
-        users = query.offset(offset).limit(limit).all()
+        # Apply keyset pagination on the primary key
+        try:
+            users, next_cursor = paginate_keyset(query, [(User.id, False)], cursor, limit, offset)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'users': [user.to_dict() for user in users],
-            'total': query.count(),
+            'total': query.count() if include_total else None,
             'limit': limit,
-            'offset': offset
+            'offset': offset,
+            'next_cursor': next_cursor
         }), 200
     except Exception as e:
         return jsonify({'error': 'Failed to fetch users'}), 500
@@ -166,6 +182,7 @@ def create_module():
         
         db.session.add(module)
         db.session.commit()
+        invalidate_catalog()
         
         return jsonify({
             'message': 'Module created successfully',
@@ -219,6 +236,7 @@ def update_module(module_id):
             module.is_active = data['is_active']
         
         db.session.commit()
+        invalidate_catalog()
         
         return jsonify({
             'message': 'Module updated successfully',
@@ -277,6 +295,8 @@ def create_challenge():
                 db.session.add(flag)
         
         db.session.commit()
+        invalidate_flag_matcher(challenge.id)
+        invalidate_catalog()
         
         return jsonify({
             'message': 'Challenge created successfully',
@@ -327,6 +347,8 @@ def update_challenge(challenge_id):
             challenge.is_active = data['is_active']
         
         db.session.commit()
+        invalidate_flag_matcher(challenge_id)
+        invalidate_catalog()
         
         return jsonify({
             'message': 'Challenge updated successfully',
@@ -361,6 +383,8 @@ def add_flag(challenge_id):
         
         db.session.add(flag)
         db.session.commit()
+        invalidate_flag_matcher(challenge_id)
+        invalidate_catalog()
         
         return jsonify({
             'message': 'Flag added successfully',
@@ -377,11 +401,64 @@ def add_flag(challenge_id):
 def update_ranks():
     """Update all user ranks (admin only)"""
     try:
-        # Update all ranks
-        LeaderboardEntry.update_all_ranks()
+        data = request.get_json(silent=True) or {}
+        
+        # Only recompute ranks disturbed since a previous pass, if given
+        since = None
+        if data.get('since'):
+            try:
+                since = datetime.fromisoformat(data['since'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
+        
+        refreshed_at = datetime.utcnow()
+        updated = LeaderboardEntry.update_all_ranks(since=since)
         
         return jsonify({
-            'message': 'Ranks updated successfully'
+            'message': 'Ranks updated successfully',
+            'updated': updated,
+            'refreshed_at': refreshed_at.isoformat()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to update ranks'}), 500
+
+@admin_bp.route('/system/ai-cache', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_ai_cache_stats():
+    """Get AI tutor response cache metrics (admin only)"""
+    try:
+        return jsonify({
+            'ai_cache': get_tutor_cache().stats()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch AI cache stats'}), 500
+
+@admin_bp.route('/system/db-pool', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_db_pool_metrics():
+    """Get database connection pool metrics for this worker (admin only)"""
+    try:
+        return jsonify({
+            'db_pool': get_db_pool_stats()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch database pool stats'}), 500
+
+@admin_bp.route('/system/compression', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_compression_stats():
+    """Get compressed response cache metrics for this worker (admin only)"""
+    try:
+        compressor = get_response_compressor()
+        return jsonify({
+            'compression': dict(
+                compressor.cache.stats(),
+                encodings=list(compressor.encoders),
+                min_size=compressor.min_size
+            )
         }), 200
     except Exception as e:
-        return jsonify({'error': 'Failed to update ranks'}), 500 
\ No newline at end of file
+        return jsonify({'error': 'Failed to fetch compression stats'}), 500
@@ -1,15 +1,78 @@
-from flask import Blueprint, request, jsonify
-from utils.llm_service import send_prompt_to_llm
+import json
+
+from flask import Blueprint, request, jsonify, Response
+from database import db
+from utils.llm_service import send_prompt_to_llm, check_api_key, check_rate_limit, get_cached_response
+from utils.tutor_service import get_tutor_service, TutorServiceError
+from utils.tutor_cache import get_tutor_cache
 
 ai_bp = Blueprint('ai', __name__)
 
-@ai_bp.route('/api/ai/chat', methods=['POST'])
+def _error_status(error):
+    return 429 if 'rate limit' in error.lower() else 500
+
+def _sse(data, event=None):
+    message = f'event: {event}\n' if event else ''
+    return message + f'data: {json.dumps(data)}\n\n'
+
+def _event_stream(events):
+    # The events need no request state, so release the session (and the pooled
+    # connection the JWT user lookup checked out) before the model responds
+    db.session.remove()
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@ai_bp.route('/chat', methods=['POST'])
 def chat():
+    """Answer a tutor prompt in one response; waits up to LLM_TIMEOUT for the whole completion, so the UI uses /chat/stream"""
     data = request.get_json()
     prompt = data.get('prompt')
     if not prompt:
         return jsonify({'error': 'Prompt is required.'}), 400
     result = send_prompt_to_llm(prompt)
     if 'error' in result:
-        return jsonify({'error': result['error']}), 429 if 'rate limit' in result['error'].lower() else 500
-    return jsonify({'response': result['response']}) 
\ No newline at end of file
+        return jsonify({'error': result['error']}), _error_status(result['error'])
+    return jsonify({'response': result['response'], 'cached': result.get('cached', False)})
+
+@ai_bp.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream a tutor response as server-sent events"""
+    data = request.get_json()
+    prompt = data.get('prompt')
+    if not prompt:
+        return jsonify({'error': 'Prompt is required.'}), 400
+    unavailable = check_api_key()
+    if unavailable:
+        return jsonify(unavailable), _error_status(unavailable['error'])
+
+    cached = get_cached_response(prompt)
+    if cached is not None:
+        def replay():
+            yield _sse({'delta': cached})
+            yield _sse({'cached': True}, event='done')
+        return _event_stream(replay())
+
+    limited = check_rate_limit()
+    if limited:
+        return jsonify(limited), _error_status(limited['error'])
+
+    service = get_tutor_service()
+    tutor_cache = get_tutor_cache()
+    deltas = service.stream(prompt)
+
+    def generate():
+        parts = []
+        try:
+            for delta in deltas:
+                parts.append(delta)
+                yield _sse({'delta': delta})
+            tutor_cache.set(prompt, service.model, ''.join(parts))
+            yield _sse({}, event='done')
+        except TutorServiceError as e:
+            yield _sse({'error': str(e)}, event='error')
+        finally:
+            deltas.close()
+
+    return _event_stream(generate())
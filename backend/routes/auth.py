@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt, current_user
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from werkzeug.security import generate_password_hash
@@ -13,6 +13,7 @@ from utils.validators import (
     sanitize_user_input, validate_json_data, ValidationError
 )
 from utils.rate_limiting import auth_rate_limit, sensitive_rate_limit
+from utils.password_hashing import PasswordHashingBusy, hashing_busy_response
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -89,6 +90,9 @@ def register():
             'refresh_token': refresh_token
         }), 201
         
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return hashing_busy_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Registration failed'}), 500
@@ -138,6 +142,13 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Account is deactivated'}), 403
         
+        # Upgrade the hash if the configured cost changed since it was made
+        if user.password_needs_rehash():
+            try:
+                user.set_password(password)
+            except PasswordHashingBusy:
+                pass  # Keep the old hash; it will be upgraded on a later login
+        
         # Update last login
         user.update_last_login()
         
@@ -152,6 +163,8 @@ def login():
             'refresh_token': refresh_token
         }), 200
         
+    except PasswordHashingBusy as e:
+        return hashing_busy_response(e)
     except Exception as e:
         return jsonify({'error': 'Login failed'}), 500
 
@@ -315,8 +328,7 @@ def github_oauth():
 def get_current_user():
     """Get current user information"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_user
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
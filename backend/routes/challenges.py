@@ -3,11 +3,17 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
-from models.challenge import Challenge, Flag, db
+from models.challenge import Challenge, db
 from models.progress import UserProgress
-from models.user import User
+from models.events import SolveEvent, AttemptEvent
 from utils.validators import validate_flag_format, sanitize_user_input, validate_json_data, ValidationError
 from utils.rate_limiting import sensitive_rate_limit, api_rate_limit
+from utils.scoring_worker import submit_scoring_job, ScoringJob
+from utils.flag_matcher import get_flag_matcher
+from utils.catalog_cache import get_catalog_cache
+from utils.pagination import paginate_keyset, decode_cursor, InvalidCursor
+from utils.serializers import parse_fields, InvalidFields
+from utils.conditional import catalog_validators, not_modified, add_validators
 
 challenges_bp = Blueprint('challenges', __name__)
 limiter = Limiter(key_func=get_remote_address)
@@ -23,45 +29,108 @@ def get_challenges():
         module_id = request.args.get('module_id', type=int)
         limit = request.args.get('limit', 50, type=int)
         offset = request.args.get('offset', 0, type=int)
+        cursor = request.args.get('cursor')
         
-        # Build query
-        query = Challenge.query.filter_by(is_active=True)
+        if cursor:
+            try:
+                decode_cursor(cursor, 1)
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
         
-        if category:
-            query = query.filter_by(category=category)
-        
-        if difficulty:
-            query = query.filter_by(difficulty=difficulty)
-        
-        if module_id:
-            query = query.filter_by(module_id=module_id)
-        
-        # Apply pagination
-        challenges = query.offset(offset).limit(limit).all()
-        
-        # Get current user for progress tracking
-        current_user_id = get_jwt_identity()
+        # Sparse fieldsets: ?fields=id,title or ?view=summary for list views
+        try:
+            fields = parse_fields(
+                request.args.get('fields'), request.args.get('view'),
+                Challenge.FIELDS + ('user_progress',), Challenge.SUMMARY_FIELDS + ('user_progress',)
+            )
+        except InvalidFields as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Add progress information to each challenge
-        challenges_with_progress = []
-        for challenge in challenges:
-            challenge_data = challenge.to_dict()
+        include_progress = fields is None or 'user_progress' in fields
+        
+        # Answer polls for an unchanged page before loading or serializing anything
+        etag = catalog_validators(
+            'challenges:list', get_jwt_identity() if include_progress else None
+        )
+        cached_response = not_modified(etag)
+        if cached_response is not None:
+            return cached_response
+        
+        filters = {
+            'category': category,
+            'difficulty': difficulty,
+            'module_id': module_id
+        }
+        
+        def filtered_query():
+            # Build query
+            query = Challenge.query.filter_by(is_active=True)
+            
+            if category:
+                query = query.filter_by(category=category)
             
-            # Get user progress for this challenge
-            progress = UserProgress.get_user_challenge_progress(current_user_id, challenge.id)
-            if progress:
-                challenge_data['user_progress'] = progress.to_dict()
-            else:
-                challenge_data['user_progress'] = None
+            if difficulty:
+                query = query.filter_by(difficulty=difficulty)
             
-            challenges_with_progress.append(challenge_data)
+            if module_id:
+                query = query.filter_by(module_id=module_id)
+            
+            return query
         
-        return jsonify({
+        def build_page():
+            # Keyset pagination on the primary key keeps deep pages as cheap as the first
+            # Columns outside the fieldset (descriptions, hints, files) are never selected
+            challenges, next_cursor = paginate_keyset(
+                Challenge.load_fields(filtered_query(), fields), [(Challenge.id, False)], cursor, limit, offset
+            )
+            flag_counts = {}
+            if fields is None or 'flag_count' in fields:
+                flag_counts = Challenge.get_flag_counts([challenge.id for challenge in challenges])
+            
+            return {
+                'challenges': [
+                    challenge.to_dict(flag_count=flag_counts.get(challenge.id, 0), fields=fields)
+                    for challenge in challenges
+                ],
+                'next_cursor': next_cursor
+            }
+        
+        # The catalog page is shared by all users; only progress is per user
+        page = get_catalog_cache().get_or_set('challenges:list', dict(
+            filters, limit=limit, offset=offset, cursor=cursor,
+            fields=sorted(fields) if fields is not None else None
+        ), build_page)
+        
+        # The total depends only on the filters, so it is counted once per cache period,
+        # over the ids alone
+        total = get_catalog_cache().get_or_set('challenges:count', filters, lambda: filtered_query().with_entities(db.func.count(Challenge.id)).scalar())
+        
+        challenges_with_progress = page['challenges']
+        if include_progress:
+            # Get current user for progress tracking
+            current_user_id = get_jwt_identity()
+            
+            # Fetch progress for the whole page at once
+            challenge_ids = [challenge_data['id'] for challenge_data in page['challenges']]
+            progress_by_challenge = UserProgress.get_user_challenge_progress_map(current_user_id, challenge_ids)
+            
+            # Add progress information to each challenge
+            challenges_with_progress = []
+            for challenge_data in page['challenges']:
+                progress = progress_by_challenge.get(challenge_data['id'])
+                challenges_with_progress.append(dict(
+                    challenge_data,
+                    user_progress=progress.to_dict() if progress else None
+                ))
+        
+        response = jsonify({
             'challenges': challenges_with_progress,
-            'total': query.count(),
+            'total': total,
             'limit': limit,
-            'offset': offset
-        }), 200
+            'offset': offset,
+            'next_cursor': page['next_cursor']
+        })
+        return add_validators(response, etag), 200
     except Exception as e:
         return jsonify({'error': 'Failed to fetch challenges'}), 500
 
@@ -70,9 +139,13 @@ def get_challenges():
 def get_challenge(challenge_id):
     """Get specific challenge details"""
     try:
-        challenge = Challenge.query.filter_by(id=challenge_id, is_active=True).first()
+        def build_challenge():
+            challenge = Challenge.query.filter_by(id=challenge_id, is_active=True).first()
+            return challenge.to_dict() if challenge else None
         
-        if not challenge:
+        cached_challenge = get_catalog_cache().get_or_set('challenges:detail', {'id': challenge_id}, build_challenge)
+        
+        if not cached_challenge:
             return jsonify({'error': 'Challenge not found'}), 404
         
         # Get current user
@@ -81,12 +154,7 @@ def get_challenge(challenge_id):
         # Get user progress for this challenge
         progress = UserProgress.get_user_challenge_progress(current_user_id, challenge_id)
         
-        challenge_data = challenge.to_dict()
-        
-        if progress:
-            challenge_data['user_progress'] = progress.to_dict()
-        else:
-            challenge_data['user_progress'] = None
+        challenge_data = dict(cached_challenge, user_progress=progress.to_dict() if progress else None)
         
         return jsonify({
             'challenge': challenge_data
@@ -127,56 +195,43 @@ def submit_flag(challenge_id):
             return jsonify({'error': 'Challenge not found'}), 404
         
         # Get or create progress entry
-        progress = UserProgress.get_user_challenge_progress(current_user_id, challenge_id)
-        
-        if not progress:
-            progress = UserProgress(
-                user_id=current_user_id,
-                challenge_id=challenge_id
-            )
-            db.session.add(progress)
+        progress = UserProgress.get_or_create(current_user_id, challenge_id=challenge_id)
         
-        # Increment attempts
-        progress.increment_attempts()
+        # Stage all changes and commit them once at the end of the request
+        progress.increment_attempts(commit=False)
         
-        # Check if flag is correct
-        flags = Flag.query.filter_by(challenge_id=challenge_id, is_active=True).all()
-        correct_flag = None
+        # Check if flag is correct against the cached, pre-compiled flags
+        correct_flag = get_flag_matcher(challenge_id).match(submitted_flag)
         
-        for flag in flags:
-            if flag.check_flag(submitted_flag):
-                correct_flag = flag
-                break
+        db.session.add(AttemptEvent(
+            user_id=current_user_id,
+            challenge_id=challenge_id,
+            correct=correct_flag is not None
+        ))
         
         if correct_flag:
-            # Mark as completed if not already
-            if not progress.completed:
-                progress.mark_completed(correct_flag.points)
-                
-                # Update user experience
-                user = User.query.get(current_user_id)
-                user.add_experience(correct_flag.points)
-                
-                # Update leaderboard
-                from models.leaderboard import LeaderboardEntry
-                leaderboard_entry = LeaderboardEntry.query.filter_by(user_id=current_user_id).first()
-                
-                if not leaderboard_entry:
-                    leaderboard_entry = LeaderboardEntry(user_id=current_user_id)
-                    db.session.add(leaderboard_entry)
-                
-                # Recalculate total score and counts
-                completed_modules = UserProgress.get_completed_modules(current_user_id)
-                completed_challenges = UserProgress.get_completed_challenges(current_user_id)
-                
-                total_score = sum([m.module.points for m in completed_modules if m.module]) + \
-                             sum([c.challenge.points for c in completed_challenges if c.challenge])
-                
-                leaderboard_entry.update_score(total_score)
-                leaderboard_entry.update_completed_counts(len(completed_modules), len(completed_challenges))
+            # Only the request that flips the row to completed awards points
+            first_solve = not progress.completed and progress.claim_completion(correct_flag.points)
+            
+            if first_solve:
+                db.session.add(SolveEvent(
+                    user_id=current_user_id,
+                    challenge_id=challenge_id,
+                    score=challenge.points or 0,
+                    experience=correct_flag.points or 0
+                ))
             
             db.session.commit()
             
+            # The solve is recorded; XP and leaderboard updates happen in the background
+            if first_solve:
+                submit_scoring_job(ScoringJob(
+                    user_id=int(current_user_id),
+                    score_delta=challenge.points or 0,
+                    experience_delta=correct_flag.points or 0,
+                    challenges_delta=1
+                ))
+            
             return jsonify({
                 'success': True,
                 'message': 'Flag is correct!',
@@ -210,19 +265,6 @@ def get_hint(challenge_id):
         if not challenge.hints:
             return jsonify({'error': 'No hints available for this challenge'}), 404
         
-        # Get current user
-        current_user_id = get_jwt_identity()
-        
-        # Get user progress to track hint usage
-        progress = UserProgress.get_user_challenge_progress(current_user_id, challenge_id)
-        
-        if not progress:
-            progress = UserProgress(
-                user_id=current_user_id,
-                challenge_id=challenge_id
-            )
-            db.session.add(progress)
-        
         # For now, return the first hint
         # In a more advanced implementation, you might want to unlock hints progressively
         hint = challenge.hints[0] if isinstance(challenge.hints, list) else challenge.hints
@@ -239,8 +281,11 @@ def get_hint(challenge_id):
 def get_categories():
     """Get all challenge categories"""
     try:
-        categories = db.session.query(Challenge.category).distinct().filter_by(is_active=True).all()
-        category_list = [cat[0] for cat in categories]
+        def build_categories():
+            categories = db.session.query(Challenge.category).distinct().filter_by(is_active=True).all()
+            return [cat[0] for cat in categories]
+        
+        category_list = get_catalog_cache().get_or_set('challenges:categories', None, build_categories)
         
         return jsonify({
             'categories': category_list
@@ -253,8 +298,11 @@ def get_categories():
 def get_difficulties():
     """Get all challenge difficulties"""
     try:
-        difficulties = db.session.query(Challenge.difficulty).distinct().filter_by(is_active=True).all()
-        difficulty_list = [diff[0] for diff in difficulties]
+        def build_difficulties():
+            difficulties = db.session.query(Challenge.difficulty).distinct().filter_by(is_active=True).all()
+            return [diff[0] for diff in difficulties]
+        
+        difficulty_list = get_catalog_cache().get_or_set('challenges:difficulties', None, build_difficulties)
         
         return jsonify({
             'difficulties': difficulty_list
@@ -280,18 +328,17 @@ def update_challenge_progress(challenge_id):
             return jsonify({'error': 'Challenge not found'}), 404
         
         # Get or create progress entry
-        progress = UserProgress.get_user_challenge_progress(current_user_id, challenge_id)
-        
-        if not progress:
-            progress = UserProgress(
-                user_id=current_user_id,
-                challenge_id=challenge_id
-            )
-            db.session.add(progress)
+        progress = UserProgress.get_or_create(current_user_id, challenge_id=challenge_id)
         
         # Update progress fields
         if 'time_spent' in data:
-            progress.add_time_spent(data['time_spent'])
+            progress.add_time_spent(data['time_spent'], commit=False)
+            db.session.add(AttemptEvent(
+                user_id=current_user_id,
+                challenge_id=challenge_id,
+                counted=False,
+                time_spent=data['time_spent']
+            ))
         
         db.session.commit()
         
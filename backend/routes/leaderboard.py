@@ -1,38 +1,77 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_current_user
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
 from models.leaderboard import LeaderboardEntry, db
-from models.user import User
+from utils.leaderboard_index import get_leaderboard_index
+from utils.pagination import encode_cursor, decode_cursor, InvalidCursor
+from utils.leaderboard_stats import get_leaderboard_stats as get_stats_aggregate
+from utils.conditional import leaderboard_validators, make_etag, not_modified, add_validators
+from utils.scoreboard_stream import get_scoreboard_broadcaster, TooManySubscribers, ScoreboardUnavailable
 
 leaderboard_bp = Blueprint('leaderboard', __name__)
 limiter = Limiter(key_func=get_remote_address)
 
+# Largest page and window a client may ask for
+MAX_PAGE_SIZE = 100
+MAX_AROUND_RANGE = 50
+
+def clamp(value, lowest, highest):
+    """Keep a client-supplied number within [lowest, highest]"""
+    return max(lowest, min(value, highest))
+
+def serialize_ranked_players(ranked_players, ranks):
+    """Load leaderboard entries for ranked (user_id, score) pairs, keeping index order"""
+    return LeaderboardEntry.serialize_ranked(ranked_players, ranks)
+
 @leaderboard_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_leaderboard():
     """Get leaderboard rankings"""
     try:
         # Get query parameters
-        limit = request.args.get('limit', 50, type=int)
-        offset = request.args.get('offset', 0, type=int)
-        
-        # Get leaderboard entries with user information
-        entries = LeaderboardEntry.query.order_by(LeaderboardEntry.total_score.desc()).offset(offset).limit(limit).all()
-        
-        # Convert to dictionary with user info
-        leaderboard_data = []
-        for entry in entries:
-            entry_dict = entry.to_dict_with_user()
-            leaderboard_data.append(entry_dict)
-        
-        return jsonify({
+        limit = clamp(request.args.get('limit', 50, type=int), 1, MAX_PAGE_SIZE)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        cursor = request.args.get('cursor')
+        
+        index = get_leaderboard_index()
+        
+        # A (total_score, user_id) cursor resumes right after the last player served
+        if cursor:
+            try:
+                score, user_id = decode_cursor(cursor, 2)
+                offset = index.position_after(int(score), int(user_id))
+            except (InvalidCursor, TypeError, ValueError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+        
+        # Get the requested page from the ranked index
+        ranked_players = index.page(offset, limit)
+        ranks = index.competition_ranks(ranked_players, offset)
+        total = index.count()
+        
+        # Scoreboards poll: skip loading and serializing a page the client already has
+        # (ties above the page can change its first rank without changing the page)
+        etag = leaderboard_validators('leaderboard', ranked_players, offset, total, ranks[:1])
+        cached_response = not_modified(etag)
+        if cached_response is not None:
+            return cached_response
+        
+        leaderboard_data = serialize_ranked_players(ranked_players, ranks)
+        
+        next_cursor = None
+        if ranked_players and offset + len(ranked_players) < total:
+            last_user_id, last_score = ranked_players[-1]
+            next_cursor = encode_cursor([last_score, last_user_id])
+        
+        response = jsonify({
             'leaderboard': leaderboard_data,
-            'total': LeaderboardEntry.query.count(),
+            'total': total,
             'limit': limit,
-            'offset': offset
-        }), 200
+            'offset': offset,
+            'next_cursor': next_cursor
+        })
+        return add_validators(response, etag), 200
     except Exception as e:
         return jsonify({'error': 'Failed to fetch leaderboard'}), 500
 
@@ -41,20 +80,23 @@ def get_leaderboard():
 def get_top_players():
     """Get top players"""
     try:
-        limit = request.args.get('limit', 10, type=int)
+        limit = clamp(request.args.get('limit', 10, type=int), 1, MAX_PAGE_SIZE)
         
-        # Get top players
-        top_entries = LeaderboardEntry.get_top_players(limit)
+        index = get_leaderboard_index()
+        ranked_players = index.top(limit)
         
-        # Convert to dictionary with user info
-        top_players = []
-        for entry in top_entries:
-            entry_dict = entry.to_dict_with_user()
-            top_players.append(entry_dict)
+        etag = leaderboard_validators('leaderboard:top', ranked_players)
+        cached_response = not_modified(etag)
+        if cached_response is not None:
+            return cached_response
         
-        return jsonify({
+        # Get top players
+        top_players = serialize_ranked_players(ranked_players, index.competition_ranks(ranked_players))
+        
+        response = jsonify({
             'top_players': top_players
-        }), 200
+        })
+        return add_validators(response, etag), 200
     except Exception as e:
         return jsonify({'error': 'Failed to fetch top players'}), 500
 
@@ -75,10 +117,13 @@ def get_my_rank():
             }), 200
         
         # Get user info
-        user = User.query.get(current_user_id)
+        user = get_current_user()
+        
+        # Tied players share a rank
+        rank = get_leaderboard_index().rank_of(current_user_id)
         
         rank_data = {
-            'rank': entry.rank,
+            'rank': rank if rank is not None else entry.rank,
             'total_score': entry.total_score,
             'modules_completed': entry.modules_completed,
             'challenges_completed': entry.challenges_completed,
@@ -102,69 +147,75 @@ def get_around_me():
     """Get players around current user's rank"""
     try:
         current_user_id = get_jwt_identity()
-        range_size = request.args.get('range', 5, type=int)
+        range_size = clamp(request.args.get('range', 5, type=int), 0, MAX_AROUND_RANGE)
         
-        # Get user's leaderboard entry
-        user_entry = LeaderboardEntry.query.filter_by(user_id=current_user_id).first()
+        # Get the window of players around the user from the ranked index
+        index = get_leaderboard_index()
+        start, ranked_players = index.around(current_user_id, range_size)
         
-        if not user_entry:
+        if start is None:
             return jsonify({
                 'around_me': [],
                 'message': 'No ranking data available'
             }), 200
         
-        # Calculate range
-        start_rank = max(1, user_entry.rank - range_size)
-        end_rank = user_entry.rank + range_size
+        my_rank = index.rank_of(current_user_id)
+        ranks = index.competition_ranks(ranked_players, start)
         
-        # Get entries in range
-        entries = LeaderboardEntry.query.filter(
-            LeaderboardEntry.rank >= start_rank,
-            LeaderboardEntry.rank <= end_rank
-        ).order_by(LeaderboardEntry.rank).all()
+        etag = leaderboard_validators('leaderboard:around-me', ranked_players, start, my_rank, ranks[:1])
+        cached_response = not_modified(etag)
+        if cached_response is not None:
+            return cached_response
         
-        # Convert to dictionary with user info
-        around_me = []
-        for entry in entries:
-            entry_dict = entry.to_dict_with_user()
-            around_me.append(entry_dict)
+        around_me = serialize_ranked_players(ranked_players, ranks)
         
-        return jsonify({
+        response = jsonify({
             'around_me': around_me,
-            'my_rank': user_entry.rank,
+            'my_rank': my_rank,
             'range': range_size
-        }), 200
+        })
+        return add_validators(response, etag), 200
     except Exception as e:
         return jsonify({'error': 'Failed to get players around you'}), 500
 
+@leaderboard_bp.route('/stream', methods=['GET'])
+@jwt_required()
+def stream_scoreboard():
+    """Stream top player changes as server-sent events"""
+    try:
+        broadcaster = get_scoreboard_broadcaster()
+        subscriber = broadcaster.subscribe()
+    except TooManySubscribers:
+        response = jsonify({'error': 'Too many scoreboard viewers, poll /api/leaderboard/top instead'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    except ScoreboardUnavailable:
+        return jsonify({'error': 'Scoreboard streaming is unavailable, poll /api/leaderboard/top instead'}), 503
+    except Exception as e:
+        return jsonify({'error': 'Failed to open scoreboard stream'}), 500
+    
+    heartbeat = current_app.config.get('SCOREBOARD_STREAM_HEARTBEAT', 15)
+    response = Response(broadcaster.stream(subscriber, heartbeat), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Ask nginx not to buffer, so every event goes out as soon as it is published
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @leaderboard_bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_leaderboard_stats():
     """Get leaderboard statistics"""
     try:
-        # Get total number of players
-        total_players = LeaderboardEntry.query.count()
+        # Served from the maintained aggregate instead of scanning every entry
+        stats = get_stats_aggregate().snapshot()
         
-        # Get average score
-        avg_score = db.session.query(db.func.avg(LeaderboardEntry.total_score)).scalar() or 0
+        etag = make_etag('leaderboard:stats', stats)
+        cached_response = not_modified(etag)
+        if cached_response is not None:
+            return cached_response
         
-        # Get highest score
-        highest_score = db.session.query(db.func.max(LeaderboardEntry.total_score)).scalar() or 0
-        
-        # Get total modules and challenges completed across all users
-        total_modules = db.session.query(db.func.sum(LeaderboardEntry.modules_completed)).scalar() or 0
-        total_challenges = db.session.query(db.func.sum(LeaderboardEntry.challenges_completed)).scalar() or 0
-        
-        stats = {
-            'total_players': total_players,
-            'average_score': round(avg_score, 2),
-            'highest_score': highest_score,
-            'total_modules_completed': total_modules,
-            'total_challenges_completed': total_challenges
-        }
-        
-        return jsonify({
+        return add_validators(jsonify({
             'stats': stats
-        }), 200
+        }), etag), 200
     except Exception as e:
         return jsonify({'error': 'Failed to get leaderboard stats'}), 500 
\ No newline at end of file
@@ -5,7 +5,12 @@ from flask_limiter.util import get_remote_address
 
 from models.module import Module, db
 from models.progress import UserProgress
-from models.user import User
+from models.events import SolveEvent, AttemptEvent
+from utils.scoring_worker import submit_scoring_job, ScoringJob
+from utils.catalog_cache import get_catalog_cache
+from utils.pagination import paginate_keyset, decode_cursor, InvalidCursor
+from utils.serializers import parse_fields, InvalidFields
+from utils.conditional import catalog_validators, not_modified, add_validators
 
 modules_bp = Blueprint('modules', __name__)
 limiter = Limiter(key_func=get_remote_address)
@@ -20,46 +25,105 @@ def get_modules():
         difficulty = request.args.get('difficulty')
         limit = request.args.get('limit', 50, type=int)
         offset = request.args.get('offset', 0, type=int)
-        
-        # Build query
-        query = Module.query.filter_by(is_active=True)
-        
-        if category:
-            query = query.filter_by(category=category)
-        
-        if difficulty:
-            query = query.filter_by(difficulty=difficulty)
-        
-        # Order by order field
-        query = query.order_by(Module.order)
-        
-        # Apply pagination
-        modules = query.offset(offset).limit(limit).all()
-        
-        # Get current user for progress tracking
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        # Add progress information to each module
-        modules_with_progress = []
-        for module in modules:
-            module_data = module.to_dict()
+        cursor = request.args.get('cursor')
+        
+        if cursor:
+            try:
+                decode_cursor(cursor, 2)
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
+        
+        # Sparse fieldsets: ?fields=id,title or ?view=summary for list views
+        try:
+            fields = parse_fields(
+                request.args.get('fields'), request.args.get('view'),
+                Module.FIELDS + ('user_progress',), Module.SUMMARY_FIELDS + ('user_progress',)
+            )
+        except InvalidFields as e:
+            return jsonify({'error': str(e)}), 400
+        
+        include_progress = fields is None or 'user_progress' in fields
+        
+        # Answer polls for an unchanged page before loading or serializing anything
+        etag = catalog_validators(
+            'modules:list', get_jwt_identity() if include_progress else None
+        )
+        cached_response = not_modified(etag)
+        if cached_response is not None:
+            return cached_response
+        
+        filters = {
+            'category': category,
+            'difficulty': difficulty
+        }
+        
+        def filtered_query():
+            # Build query
+            query = Module.query.filter_by(is_active=True)
             
-            # Get user progress for this module
-            progress = UserProgress.get_user_module_progress(current_user_id, module.id)
-            if progress:
-                module_data['user_progress'] = progress.to_dict()
-            else:
-                module_data['user_progress'] = None
+            if category:
+                query = query.filter_by(category=category)
             
-            modules_with_progress.append(module_data)
-        
-        return jsonify({
+            if difficulty:
+                query = query.filter_by(difficulty=difficulty)
+            
+            return query
+        
+        def build_page():
+            # Order by order field, with the id as a unique tie-breaker for the cursor
+            # Columns outside the fieldset (e.g. the markdown content) are never selected
+            modules, next_cursor = paginate_keyset(
+                Module.load_fields(filtered_query(), fields),
+                [(Module.order, False), (Module.id, False)], cursor, limit, offset
+            )
+            challenge_counts = {}
+            if fields is None or 'challenge_count' in fields:
+                challenge_counts = Module.get_challenge_counts([module.id for module in modules])
+            
+            return {
+                'modules': [
+                    module.to_dict(challenge_count=challenge_counts.get(module.id, 0), fields=fields)
+                    for module in modules
+                ],
+                'next_cursor': next_cursor
+            }
+        
+        # The catalog page is shared by all users; only progress is per user
+        page = get_catalog_cache().get_or_set('modules:list', dict(
+            filters, limit=limit, offset=offset, cursor=cursor,
+            fields=sorted(fields) if fields is not None else None
+        ), build_page)
+        
+        # The total depends only on the filters, so it is counted once per cache period,
+        # over the ids alone
+        total = get_catalog_cache().get_or_set('modules:count', filters, lambda: filtered_query().with_entities(db.func.count(Module.id)).scalar())
+        
+        modules_with_progress = page['modules']
+        if include_progress:
+            # Get current user for progress tracking
+            current_user_id = get_jwt_identity()
+            
+            # Fetch progress for the whole page at once
+            module_ids = [module_data['id'] for module_data in page['modules']]
+            progress_by_module = UserProgress.get_user_module_progress_map(current_user_id, module_ids)
+            
+            # Add progress information to each module
+            modules_with_progress = []
+            for module_data in page['modules']:
+                progress = progress_by_module.get(module_data['id'])
+                modules_with_progress.append(dict(
+                    module_data,
+                    user_progress=progress.to_dict() if progress else None
+                ))
+        
+        response = jsonify({
             'modules': modules_with_progress,
-            'total': query.count(),
+            'total': total,
             'limit': limit,
-            'offset': offset
-        }), 200
+            'offset': offset,
+            'next_cursor': page['next_cursor']
+        })
+        return add_validators(response, etag), 200
     except Exception as e:
         return jsonify({'error': 'Failed to fetch modules'}), 500
 
@@ -68,28 +132,32 @@ def get_modules():
 def get_module(module_id):
     """Get specific module details"""
     try:
-        module = Module.query.filter_by(id=module_id, is_active=True).first()
+        # Module content is the largest catalog payload; unchanged modules get a 304
+        current_user_id = get_jwt_identity()
+        etag = catalog_validators(f'modules:detail:{module_id}', current_user_id)
+        cached_response = not_modified(etag)
+        if cached_response is not None:
+            return cached_response
         
-        if not module:
-            return jsonify({'error': 'Module not found'}), 404
+        def build_module():
+            module = Module.query.filter_by(id=module_id, is_active=True).first()
+            return module.to_dict_with_challenges() if module else None
         
-        # Get current user
-        current_user_id = get_jwt_identity()
+        # Get module with challenges
+        cached_module = get_catalog_cache().get_or_set('modules:detail', {'id': module_id}, build_module)
+        
+        if not cached_module:
+            return jsonify({'error': 'Module not found'}), 404
         
         # Get user progress for this module
         progress = UserProgress.get_user_module_progress(current_user_id, module_id)
         
-        # Get module with challenges
-        module_data = module.to_dict_with_challenges()
-        
-        if progress:
-            module_data['user_progress'] = progress.to_dict()
-        else:
-            module_data['user_progress'] = None
+        module_data = dict(cached_module, user_progress=progress.to_dict() if progress else None)
         
-        return jsonify({
+        response = jsonify({
             'module': module_data
-        }), 200
+        })
+        return add_validators(response, etag), 200
     except Exception as e:
         return jsonify({'error': 'Failed to fetch module'}), 500
 
@@ -98,8 +166,11 @@ def get_module(module_id):
 def get_categories():
     """Get all module categories"""
     try:
-        categories = db.session.query(Module.category).distinct().filter_by(is_active=True).all()
-        category_list = [cat[0] for cat in categories]
+        def build_categories():
+            categories = db.session.query(Module.category).distinct().filter_by(is_active=True).all()
+            return [cat[0] for cat in categories]
+        
+        category_list = get_catalog_cache().get_or_set('modules:categories', None, build_categories)
         
         return jsonify({
             'categories': category_list
@@ -112,8 +183,11 @@ def get_categories():
 def get_difficulties():
     """Get all module difficulties"""
     try:
-        difficulties = db.session.query(Module.difficulty).distinct().filter_by(is_active=True).all()
-        difficulty_list = [diff[0] for diff in difficulties]
+        def build_difficulties():
+            difficulties = db.session.query(Module.difficulty).distinct().filter_by(is_active=True).all()
+            return [diff[0] for diff in difficulties]
+        
+        difficulty_list = get_catalog_cache().get_or_set('modules:difficulties', None, build_difficulties)
         
         return jsonify({
             'difficulties': difficulty_list
@@ -135,46 +209,38 @@ def complete_module(module_id):
             return jsonify({'error': 'Module not found'}), 404
         
         # Get or create progress entry
-        progress = UserProgress.get_user_module_progress(current_user_id, module_id)
-        
-        if not progress:
-            progress = UserProgress(
-                user_id=current_user_id,
-                module_id=module_id
-            )
-            db.session.add(progress)
-        
-        # Mark as completed
-        progress.mark_completed(module.points)
-        
-        # Update user experience
-        user = User.query.get(current_user_id)
-        user.add_experience(module.points)
+        progress = UserProgress.get_or_create(current_user_id, module_id=module_id)
         
-        # Update leaderboard
-        from models.leaderboard import LeaderboardEntry
-        leaderboard_entry = LeaderboardEntry.query.filter_by(user_id=current_user_id).first()
+        experience_gained = 0
         
-        if not leaderboard_entry:
-            leaderboard_entry = LeaderboardEntry(user_id=current_user_id)
-            db.session.add(leaderboard_entry)
-        
-        # Recalculate total score and counts
-        completed_modules = UserProgress.get_completed_modules(current_user_id)
-        completed_challenges = UserProgress.get_completed_challenges(current_user_id)
-        
-        total_score = sum([m.module.points for m in completed_modules if m.module]) + \
-                     sum([c.challenge.points for c in completed_challenges if c.challenge])
-        
-        leaderboard_entry.update_score(total_score)
-        leaderboard_entry.update_completed_counts(len(completed_modules), len(completed_challenges))
+        # Only the first completion awards points, and only the request that
+        # flips the row to completed counts as the first
+        first_completion = not progress.completed and progress.claim_completion(module.points)
+        if first_completion:
+            experience_gained = module.points or 0
+            db.session.add(SolveEvent(
+                user_id=current_user_id,
+                module_id=module_id,
+                score=experience_gained,
+                experience=experience_gained
+            ))
         
         db.session.commit()
         
+        # The completion is recorded; XP and leaderboard updates happen in the
+        # background. A module worth no points still counts as completed
+        if first_completion:
+            submit_scoring_job(ScoringJob(
+                user_id=int(current_user_id),
+                score_delta=experience_gained,
+                experience_delta=experience_gained,
+                modules_delta=1
+            ))
+        
         return jsonify({
             'message': 'Module completed successfully',
             'progress': progress.to_dict(),
-            'experience_gained': module.points
+            'experience_gained': experience_gained
         }), 200
     except Exception as e:
         db.session.rollback()
@@ -198,21 +264,25 @@ def update_module_progress(module_id):
             return jsonify({'error': 'Module not found'}), 404
         
         # Get or create progress entry
-        progress = UserProgress.get_user_module_progress(current_user_id, module_id)
-        
-        if not progress:
-            progress = UserProgress(
-                user_id=current_user_id,
-                module_id=module_id
-            )
-            db.session.add(progress)
+        progress = UserProgress.get_or_create(current_user_id, module_id=module_id)
         
         # Update progress fields
+        time_spent = data.get('time_spent', 0)
+        counted = bool(data.get('increment_attempts'))
+        
         if 'time_spent' in data:
-            progress.add_time_spent(data['time_spent'])
+            progress.add_time_spent(time_spent, commit=False)
+        
+        if counted:
+            progress.increment_attempts(commit=False)
         
-        if 'increment_attempts' in data and data['increment_attempts']:
-            progress.increment_attempts()
+        if time_spent or counted:
+            db.session.add(AttemptEvent(
+                user_id=current_user_id,
+                module_id=module_id,
+                counted=counted,
+                time_spent=time_spent
+            ))
         
         db.session.commit()
         
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_current_user
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
@@ -7,6 +7,7 @@ from models.user import User, db
 from models.progress import UserProgress
 from models.leaderboard import LeaderboardEntry
 from utils.validators import validate_email, validate_username, sanitize_input
+from utils.password_hashing import PasswordHashingBusy, hashing_busy_response
 
 user_bp = Blueprint('user', __name__)
 limiter = Limiter(key_func=get_remote_address)
@@ -16,8 +17,7 @@ limiter = Limiter(key_func=get_remote_address)
 def get_profile():
     """Get user profile"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -34,8 +34,7 @@ def get_profile():
 def update_profile():
     """Update user profile"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -73,8 +72,7 @@ def update_profile():
 def change_password():
     """Change user password"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -100,6 +98,9 @@ def change_password():
         return jsonify({
             'message': 'Password changed successfully'
         }), 200
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return hashing_busy_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to change password'}), 500
@@ -157,7 +158,7 @@ def get_stats():
     """Get user statistics"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
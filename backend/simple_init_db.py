@@ -62,7 +62,9 @@ def create_tables():
                     estimated_time INT,
                     points INT DEFAULT 0,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX ix_modules_category_difficulty (category, difficulty),
+                    INDEX ix_modules_order_id (order_num, id)
                 )
             """)
             
@@ -79,6 +81,7 @@ def create_tables():
                     module_id INT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX ix_challenges_category_difficulty (category, difficulty),
                     FOREIGN KEY (module_id) REFERENCES modules(id)
                 )
             """)
@@ -109,6 +112,9 @@ def create_tables():
                     time_spent INT DEFAULT 0,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    UNIQUE KEY uq_user_progress_user_challenge (user_id, challenge_id),
+                    UNIQUE KEY uq_user_progress_user_module (user_id, module_id),
+                    INDEX ix_user_progress_user_completed (user_id, completed),
                     FOREIGN KEY (user_id) REFERENCES users(id),
                     FOREIGN KEY (module_id) REFERENCES modules(id),
                     FOREIGN KEY (challenge_id) REFERENCES challenges(id)
@@ -126,6 +132,7 @@ def create_tables():
                     leaderboard_rank INT DEFAULT 0,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX ix_leaderboard_entries_score_user (total_score DESC, user_id),
                     FOREIGN KEY (user_id) REFERENCES users(id)
                 )
             """)
@@ -1,34 +1,83 @@
 import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import pytest
-from unittest.mock import patch
 from flask import Flask
+from sqlalchemy import event, text
+from backend.database import db
 from backend.routes.ai import ai_bp
 from backend.utils import llm_service
 
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible chat completions endpoint"""
+    pieces = ['Test ', 'AI ', 'response']
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.requests.append(body)
+        if body.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.end_headers()
+            for piece in self.pieces:
+                chunk = {
+                    'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk', 'created': 0, 'model': body['model'],
+                    'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]
+                }
+                self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+                self.wfile.flush()
+            self.wfile.write(b'data: [DONE]\n\n')
+            return
+
+        payload = json.dumps({
+            'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': ''.join(self.pieces)}, 'finish_reason': 'stop'}]
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def llm_stub():
+    StubLLMHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubLLMHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/v1'
+    server.shutdown()
+    server.server_close()
+
 # Set up a test Flask app
 @pytest.fixture
-def app():
+def app(llm_stub):
     app = Flask(__name__)
     app.register_blueprint(ai_bp, url_prefix='/api/ai')
     app.config['TESTING'] = True
-    return app
+    app.config['OPENAI_API_KEY'] = 'test-key'
+    app.config['LLM_BASE_URL'] = llm_stub
+    app.config['LLM_TIMEOUT'] = 5
+    yield app
+    service = app.extensions.get('tutor_service')
+    if service is not None:
+        service.close()
 
 @pytest.fixture
 def client(app):
     return app.test_client()
 
 # --- LLM Service Tests ---
-def test_llm_service_success(monkeypatch):
-    class DummyResponse:
-        def __getitem__(self, key):
-            if key == 'choices':
-                return [{'message': {'content': 'Test AI response'}}]
-    
-    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
-    with patch('openai.ChatCompletion.create', return_value=DummyResponse()):
+def test_llm_service_success(app):
+    with app.app_context():
         result = llm_service.send_prompt_to_llm('Hello')
-        assert 'response' in result
-        assert result['response'] == 'Test AI response'
+    assert 'response' in result
+    assert result['response'] == 'Test AI response'
 
 def test_llm_service_no_api_key(monkeypatch):
     monkeypatch.delenv('OPENAI_API_KEY', raising=False)
@@ -36,28 +85,77 @@ def test_llm_service_no_api_key(monkeypatch):
     assert 'error' in result
     assert 'API key' in result['error']
 
-def test_llm_service_rate_limit(monkeypatch):
-    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
-    # Exhaust the rate limiter
-    llm_service.llm_rate_limiter.calls = [llm_service.llm_rate_limiter.calls.append(0) for _ in range(llm_service.llm_rate_limiter.max_calls)]
-    result = llm_service.send_prompt_to_llm('Hello')
+def test_llm_service_rate_limit(app):
+    # Spend the whole global budget
+    app.config['LLM_RATE_LIMIT'] = 1
+    with app.app_context():
+        assert 'response' in llm_service.send_prompt_to_llm('Hello')
+        result = llm_service.send_prompt_to_llm('Something else')
     assert 'error' in result
     assert 'rate limit' in result['error'].lower()
-    llm_service.llm_rate_limiter.calls.clear()
+
+def test_llm_service_rate_limit_zero_disables_it(app):
+    app.config['LLM_RATE_LIMIT'] = 0
+    app.config['LLM_USER_RATE_LIMIT'] = 0
+    with app.app_context():
+        for prompt in ('Hello', 'Something else', 'A third question'):
+            assert 'response' in llm_service.send_prompt_to_llm(prompt)
 
 # --- Endpoint Tests ---
-def test_ai_chat_success(client, monkeypatch):
-    class DummyResponse:
-        def __getitem__(self, key):
-            if key == 'choices':
-                return [{'message': {'content': 'Test AI response'}}]
-    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
-    with patch('openai.ChatCompletion.create', return_value=DummyResponse()):
-        resp = client.post('/api/ai/chat', json={'prompt': 'Hello'})
-        data = resp.get_json()
-        assert resp.status_code == 200
-        assert 'response' in data
-        assert data['response'] == 'Test AI response'
+def test_ai_chat_success(client):
+    resp = client.post('/api/ai/chat', json={'prompt': 'Hello'})
+    data = resp.get_json()
+    assert resp.status_code == 200
+    assert 'response' in data
+    assert data['response'] == 'Test AI response'
+
+def test_ai_chat_stream(client):
+    resp = client.post('/api/ai/chat/stream', json={'prompt': 'Hello'})
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/event-stream'
+    events = [event for event in resp.get_data(as_text=True).split('\n\n') if event]
+    deltas = [json.loads(event[len('data: '):])['delta'] for event in events if event.startswith('data: ')]
+    assert ''.join(deltas) == 'Test AI response'
+    assert events[-1].startswith('event: done')
+
+def test_ai_chat_repeat_question_is_cached(client):
+    first = client.post('/api/ai/chat', json={'prompt': 'What is a Caesar cipher?'})
+    second = client.post('/api/ai/chat', json={'prompt': 'what is a caesar cipher'})
+    assert first.get_json() == {'response': 'Test AI response', 'cached': False}
+    assert second.get_json() == {'response': 'Test AI response', 'cached': True}
+    assert len(StubLLMHandler.requests) == 1
+
+def test_ai_chat_stream_releases_db_connection(app, client, monkeypatch):
+    # The JWT user lookup checks out a connection before the stream starts
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        engine = db.engine
+    held = []
+    event.listen(engine, 'checkout', lambda *args: held.append(1))
+    event.listen(engine, 'checkin', lambda *args: held.pop())
+    check_rate_limit = llm_service.check_rate_limit
+
+    def check_after_user_lookup():
+        db.session.execute(text('SELECT 1'))
+        return check_rate_limit()
+
+    monkeypatch.setattr('backend.routes.ai.check_rate_limit', check_after_user_lookup)
+    resp = client.post('/api/ai/chat/stream', json={'prompt': 'Hello'}, buffered=False)
+    chunks = iter(resp.response)
+    assert 'delta' in next(chunks).decode()
+    assert held == []
+    resp.close()
+
+def test_ai_chat_stream_caches_response(client):
+    client.post('/api/ai/chat/stream', json={'prompt': 'Hello'}).get_data()
+    resp = client.post('/api/ai/chat/stream', json={'prompt': 'Hello'})
+    assert 'Test AI response' in resp.get_data(as_text=True)
+    assert len(StubLLMHandler.requests) == 1
+
+def test_ai_chat_stream_no_prompt(client):
+    resp = client.post('/api/ai/chat/stream', json={})
+    assert resp.status_code == 400
 
 def test_ai_chat_no_prompt(client):
     resp = client.post('/api/ai/chat', json={})
@@ -65,12 +163,11 @@ def test_ai_chat_no_prompt(client):
     assert resp.status_code == 400
     assert 'error' in data
 
-def test_ai_chat_rate_limit(client, monkeypatch):
-    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
-    # Exhaust the rate limiter
-    llm_service.llm_rate_limiter.calls = [llm_service.llm_rate_limiter.calls.append(0) for _ in range(llm_service.llm_rate_limiter.max_calls)]
-    resp = client.post('/api/ai/chat', json={'prompt': 'Hello'})
+def test_ai_chat_rate_limit(client, app):
+    # Spend the caller's budget
+    app.config['LLM_USER_RATE_LIMIT'] = 1
+    assert client.post('/api/ai/chat', json={'prompt': 'Hello'}).status_code == 200
+    resp = client.post('/api/ai/chat', json={'prompt': 'Something else'})
     data = resp.get_json()
     assert resp.status_code == 429
     assert 'error' in data
-    llm_service.llm_rate_limiter.calls.clear() 
\ No newline at end of file
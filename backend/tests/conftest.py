@@ -1,12 +1,50 @@
 import pytest
+import importlib
+import importlib.abc
+import importlib.util
 import os
+import sys
 import tempfile
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# The app imports its own packages as top-level modules (``models.user``)
+# while the tests import them through ``backend.`` (``backend.models.user``).
+# Both names must give the same module, or every model would be declared a
+# second time on the shared metadata.
+APP_MODULES = {'app', 'config', 'database', 'models', 'routes', 'utils'}
+
+
+class _AliasLoader(importlib.abc.Loader):
+    def __init__(self, name):
+        self.name = name
+
+    def create_module(self, spec):
+        module = importlib.import_module(self.name)
+        self.spec = module.__spec__
+        return module
+
+    def exec_module(self, module):
+        # The import system has pointed __spec__ at the alias; restore it
+        module.__spec__ = self.spec
+
+
+class _BackendAliasFinder(importlib.abc.MetaPathFinder):
+    """Import ``backend.<name>`` as the module already known as ``<name>``"""
+
+    def find_spec(self, fullname, path, target=None):
+        prefix, _, name = fullname.partition('.')
+        if prefix != 'backend' or name.split('.')[0] not in APP_MODULES:
+            return None
+        return importlib.util.spec_from_loader(fullname, _AliasLoader(name))
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.meta_path.insert(0, _BackendAliasFinder())
+
 from backend.app import create_app
-from backend.models.user import db as user_db
-from backend.models.module import db as module_db
-from backend.models.challenge import db as challenge_db
-from backend.models.progress import db as progress_db
-from backend.models.leaderboard import db as leaderboard_db
+from backend.database import db
 
 @pytest.fixture(scope='session')
 def app():
@@ -20,19 +58,7 @@ def app():
     
     # Create the database and load test data
     with app.app_context():
-        # Initialize all database instances
-        user_db.init_app(app)
-        module_db.init_app(app)
-        challenge_db.init_app(app)
-        progress_db.init_app(app)
-        leaderboard_db.init_app(app)
-        
-        # Create all tables
-        user_db.create_all()
-        module_db.create_all()
-        challenge_db.create_all()
-        progress_db.create_all()
-        leaderboard_db.create_all()
+        db.create_all()
     
     yield app
     
@@ -55,26 +81,35 @@ def db_session(app):
     """Database session for testing."""
     with app.app_context():
         # Start a transaction
-        user_db.session.begin_nested()
-        module_db.session.begin_nested()
-        challenge_db.session.begin_nested()
-        progress_db.session.begin_nested()
-        leaderboard_db.session.begin_nested()
+        db.session.begin_nested()
         
-        yield {
-            'user_db': user_db,
-            'module_db': module_db,
-            'challenge_db': challenge_db,
-            'progress_db': progress_db,
-            'leaderboard_db': leaderboard_db
-        }
+        yield db
         
         # Rollback the transaction
-        user_db.session.rollback()
-        module_db.session.rollback()
-        challenge_db.session.rollback()
-        progress_db.session.rollback()
-        leaderboard_db.session.rollback()
+        db.session.rollback()
+
+        # Routes commit, so also clear whatever they wrote
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+
+@pytest.fixture(scope='function')
+def count_queries():
+    """Return a context manager that records SQL statements executed inside it."""
+    @contextmanager
+    def counter():
+        statements = []
+        
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(Engine, 'before_cursor_execute', record_statement)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, 'before_cursor_execute', record_statement)
+    
+    return counter
 
 @pytest.fixture(scope='function')
 def auth_headers(client, db_session):
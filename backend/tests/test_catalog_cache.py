@@ -0,0 +1,76 @@
+from backend.utils.catalog_cache import CatalogCache
+
+class TestCatalogCache:
+    def test_builds_once_until_invalidated(self):
+        """Test values are built on the first miss and reused afterwards"""
+        cache = CatalogCache(max_entries=10, ttl=60)
+        calls = []
+
+        def build():
+            calls.append(1)
+            return {'modules': [], 'total': len(calls)}
+
+        assert cache.get_or_set('modules:list', {'limit': 50}, build) == {'modules': [], 'total': 1}
+        assert cache.get_or_set('modules:list', {'limit': 50}, build) == {'modules': [], 'total': 1}
+        assert len(calls) == 1
+
+        cache.invalidate()
+        assert cache.get_or_set('modules:list', {'limit': 50}, build)['total'] == 2
+
+    def test_params_are_part_of_the_key(self):
+        """Test different filters are cached separately"""
+        cache = CatalogCache(max_entries=10, ttl=60)
+        assert cache.get_or_set('challenges:list', {'category': 'web'}, lambda: 'web') == 'web'
+        assert cache.get_or_set('challenges:list', {'category': 'crypto'}, lambda: 'crypto') == 'crypto'
+        assert cache.get_or_set('challenges:list', {'category': 'web'}, lambda: 'other') == 'web'
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full"""
+        cache = CatalogCache(max_entries=2, ttl=60)
+        cache.get_or_set('ns', {'id': 1}, lambda: 1)
+        cache.get_or_set('ns', {'id': 2}, lambda: 2)
+        cache.get_or_set('ns', {'id': 1}, lambda: 'stale')
+        cache.get_or_set('ns', {'id': 3}, lambda: 3)
+
+        assert cache.get_or_set('ns', {'id': 1}, lambda: 'rebuilt') == 1
+        assert cache.get_or_set('ns', {'id': 2}, lambda: 'rebuilt') == 'rebuilt'
+
+    def test_expired_entries_are_rebuilt(self, monkeypatch):
+        """Test entries expire after the TTL"""
+        now = [1000.0]
+        monkeypatch.setattr('backend.utils.catalog_cache.time.monotonic', lambda: now[0])
+        cache = CatalogCache(max_entries=10, ttl=5)
+
+        assert cache.get_or_set('ns', None, lambda: 'first') == 'first'
+        now[0] += 6
+        assert cache.get_or_set('ns', None, lambda: 'second') == 'second'
+
+    def test_disabled_cache_always_builds(self):
+        """Test a zero TTL disables caching"""
+        cache = CatalogCache(max_entries=10, ttl=0)
+        assert cache.get_or_set('ns', None, lambda: 'first') == 'first'
+        assert cache.get_or_set('ns', None, lambda: 'second') == 'second'
+
+    def test_invalidation_reaches_other_workers(self):
+        """Test a version bumped through Redis by one worker invalidates another's local entries"""
+        class VersionStore:
+            def __init__(self):
+                self.values = {}
+
+            def get(self, key):
+                return self.values.get(key)
+
+            def incr(self, key):
+                self.values[key] = int(self.values.get(key, 0)) + 1
+                return self.values[key]
+
+        redis_client = VersionStore()
+        worker_a = CatalogCache(max_entries=10, ttl=60, redis_client=redis_client, share_entries=False,
+                                version_check_interval=0)
+        worker_b = CatalogCache(max_entries=10, ttl=60, redis_client=redis_client, share_entries=False,
+                                version_check_interval=0)
+
+        assert worker_b.get_or_set('ns', None, lambda: 'stale') == 'stale'
+        worker_a.invalidate()
+        assert worker_b.get_or_set('ns', None, lambda: 'fresh') == 'fresh'
+        assert list(redis_client.values) == ['cipherquest:catalog:version']
@@ -1,8 +1,14 @@
 import pytest
 import json
 from unittest.mock import patch
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 from backend.app import create_app
-from backend.models.challenge import Challenge, db
+from backend.models.challenge import Challenge, Flag, db
+from backend.models.module import Module
+from backend.models.progress import UserProgress
+from backend.models.user import User
+from backend.models.leaderboard import LeaderboardEntry
 
 @pytest.fixture
 def app():
@@ -42,6 +48,61 @@ def auth_headers(client, db_session):
     
     return {'Authorization': f'Bearer {token}'}
 
+@pytest.fixture
+def sample_challenge(db_session):
+    """Create a module with one challenge and its flag"""
+    module = Module(
+        title='Cryptography Basics',
+        description='Learn encryption fundamentals',
+        category='Cryptography'
+    )
+    db.session.add(module)
+    db.session.commit()
+    
+    challenge = Challenge(
+        title='Caesar Cipher',
+        description='Decrypt the message',
+        category='Cryptography',
+        points=50,
+        module_id=module.id
+    )
+    db.session.add(challenge)
+    db.session.commit()
+    
+    db.session.add(Flag(flag_value='flag{caesar}', points=50, challenge_id=challenge.id))
+    db.session.commit()
+    return challenge
+
+@pytest.fixture
+def many_challenges(db_session):
+    """Create a module with ten challenges, each with two flags"""
+    module = Module(
+        title='Web Security',
+        description='Web application security',
+        category='Web Security'
+    )
+    db.session.add(module)
+    db.session.commit()
+    
+    challenges = []
+    for number in range(10):
+        challenge = Challenge(
+            title=f'Challenge {number}',
+            description='Find the flag',
+            category='Web',
+            points=10,
+            module_id=module.id
+        )
+        db.session.add(challenge)
+        challenges.append(challenge)
+    db.session.commit()
+    
+    for challenge in challenges:
+        db.session.add(Flag(flag_value=f'flag{{{challenge.id}}}', challenge_id=challenge.id))
+        db.session.add(Flag(flag_value=f'FLAG{{{challenge.id}}}', challenge_id=challenge.id))
+    db.session.commit()
+    return challenges
+
 class TestChallengeRoutes:
     def test_get_challenges(self, client, db_session, auth_headers):
         """Test getting all challenges"""
@@ -223,4 +284,93 @@ class TestChallengeRoutes:
         assert response.status_code == 200
         data = response.get_json()
         assert len(data['challenges']) == 1
-        assert data['challenges'][0]['difficulty'] == 'medium' 
\ No newline at end of file
+        assert data['challenges'][0]['difficulty'] == 'medium' 
+
+    def test_submit_flag_survives_a_failing_queue(self, app, client, auth_headers, sample_challenge, monkeypatch):
+        """Test that a recorded solve is scored inline when the queue rejects its job"""
+        class BrokenQueue:
+            def submit(self, job):
+                raise ConnectionError('queue unavailable')
+        
+        monkeypatch.setitem(app.extensions, 'scoring_queue', BrokenQueue())
+        response = client.post(f'/api/challenges/{sample_challenge.id}/submit',
+                               json={'flag': 'flag{caesar}'}, headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.get_json()['success'] is True
+        user = User.query.filter_by(username='testuser').first()
+        entry = LeaderboardEntry.query.filter_by(user_id=user.id).first()
+        assert (entry.total_score, entry.challenges_completed) == (50, 1)
+    
+    def test_get_hint_does_not_write(self, client, auth_headers, sample_challenge):
+        """Test that reading a hint leaves the user's progress untouched"""
+        sample_challenge.hints = ['Shift each letter back by three']
+        db.session.commit()
+        
+        response = client.get(f'/api/challenges/{sample_challenge.id}/hint', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.get_json()['hint'] == 'Shift each letter back by three'
+        assert UserProgress.query.filter_by(challenge_id=sample_challenge.id).count() == 0
+    
+    def test_submit_flag_commits_once(self, app, client, auth_headers, sample_challenge, monkeypatch):
+        """Test that a correct submission is recorded in one transaction and scoring is queued"""
+        commits = []
+        jobs = []
+        
+        def count_commit(session):
+            # Releasing the get_or_create savepoint fires after_commit too
+            if not session.in_nested_transaction():
+                commits.append(session)
+        
+        class RecordingQueue:
+            def submit(self, job):
+                jobs.append(job)
+        
+        monkeypatch.setitem(app.extensions, 'scoring_queue', RecordingQueue())
+        event.listen(Session, 'after_commit', count_commit)
+        try:
+            response = client.post(f'/api/challenges/{sample_challenge.id}/submit',
+                                   json={'flag': 'flag{caesar}'}, headers=auth_headers)
+        finally:
+            event.remove(Session, 'after_commit', count_commit)
+        
+        assert response.status_code == 200
+        assert response.get_json()['success'] is True
+        assert len(commits) == 1
+        assert len(jobs) == 1
+        assert jobs[0].score_delta == 50
+        assert jobs[0].challenges_delta == 1
+
+    def test_get_challenges_query_count_is_flat(self, client, auth_headers, many_challenges, count_queries):
+        """Test that listing challenges does not issue queries per row"""
+        client.get('/api/challenges/?limit=2', headers=auth_headers)
+        
+        # Start each request with an empty identity map so both load the same rows
+        db.session.remove()
+        with count_queries() as small_page:
+            response = client.get('/api/challenges/?limit=2', headers=auth_headers)
+        assert response.status_code == 200
+        assert len(response.get_json()['challenges']) == 2
+        
+        db.session.remove()
+        with count_queries() as full_page:
+            response = client.get('/api/challenges/?limit=10', headers=auth_headers)
+        assert response.status_code == 200
+        challenges = response.get_json()['challenges']
+        assert len(challenges) == 10
+        assert all(challenge['flag_count'] == 2 for challenge in challenges)
+        
+        assert len(full_page) == len(small_page)
+    
+    def test_get_challenges_with_fields(self, client, auth_headers, many_challenges, count_queries):
+        """Test that a fieldset trims the challenge listing query and payload"""
+        with count_queries() as statements:
+            response = client.get('/api/challenges/?fields=title,points', headers=auth_headers)
+        assert response.status_code == 200
+        
+        challenges = response.get_json()['challenges']
+        assert all(set(challenge) == {'id', 'title', 'points'} for challenge in challenges)
+        assert not any('challenges.description' in statement for statement in statements)
+        
+        response = client.get('/api/challenges/?view=everything', headers=auth_headers)
+        assert response.status_code == 400
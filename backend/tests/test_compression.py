@@ -0,0 +1,103 @@
+import gzip
+import pytest
+from flask import Flask, Response, jsonify
+from backend.utils.compression import init_compression, get_response_compressor, CompressedBodyCache, GzipEncoder
+from backend.utils.conditional import make_etag, not_modified, add_validators
+
+ITEMS = [{'id': i, 'title': f'Module {i}', 'content': 'Substitution ciphers ' * 5} for i in range(20)]
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(COMPRESSION_MIN_SIZE=500, COMPRESSION_MIMETYPES=['application/json', 'text/csv'])
+
+    @app.route('/items')
+    def items():
+        etag = make_etag('items', len(ITEMS))
+        cached_response = not_modified(etag)
+        if cached_response is not None:
+            return cached_response
+        return add_validators(jsonify({'items': ITEMS}), etag)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/export')
+    def export():
+        return Response((f'{item["id"]},{item["title"]}\n' for item in ITEMS), mimetype='text/csv')
+
+    @app.route('/image')
+    def image():
+        return Response(b'\x89PNG' * 500, mimetype='image/png')
+
+    init_compression(app)
+    return app
+
+
+class TestResponseCompression:
+    """Test Accept-Encoding negotiation and the compressed body cache"""
+
+    def test_gzip_response(self, app):
+        response = app.test_client().get('/items', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.vary
+        assert int(response.headers['Content-Length']) == len(response.data)
+        assert gzip.decompress(response.data).startswith(b'{"items"')
+
+    def test_identity_without_accept_encoding(self, app):
+        response = app.test_client().get('/items')
+
+        assert 'Content-Encoding' not in response.headers
+        assert 'Accept-Encoding' in response.vary
+        assert response.get_json()['items'] == ITEMS
+
+    def test_refused_encoding(self, app):
+        response = app.test_client().get('/items', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+        assert 'Content-Encoding' not in response.headers
+
+    def test_small_and_binary_bodies_are_not_compressed(self, app):
+        client = app.test_client()
+
+        assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+        assert 'Content-Encoding' not in client.get('/image', headers={'Accept-Encoding': 'gzip'}).headers
+
+    def test_streamed_response(self, app):
+        response = app.test_client().get('/export', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in response.headers
+        assert gzip.decompress(response.data).decode() == ''.join(
+            f'{item["id"]},{item["title"]}\n' for item in ITEMS
+        )
+
+    def test_etag_responses_are_compressed_once(self, app):
+        client = app.test_client()
+        first = client.get('/items', headers={'Accept-Encoding': 'gzip'})
+        second = client.get('/items', headers={'Accept-Encoding': 'gzip'})
+
+        with app.app_context():
+            stats = get_response_compressor().cache.stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+        assert first.data == second.data
+
+    def test_compressed_etag_is_weak_and_still_matches(self, app):
+        client = app.test_client()
+        etag = client.get('/items', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+        assert etag.startswith('W/')
+
+        response = client.get('/items', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert response.status_code == 304
+
+    def test_cache_is_bounded_by_size(self):
+        cache = CompressedBodyCache(max_bytes=100)
+        encoder = GzipEncoder()
+        for i in range(10):
+            cache.get_or_compress(f'etag-{i}', encoder, str(i).encode() * 50)
+
+        stats = cache.stats()
+        assert stats['bytes'] <= 100
+        assert stats['evictions'] > 0
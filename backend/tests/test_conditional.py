@@ -0,0 +1,64 @@
+import pytest
+from datetime import datetime
+from flask import Flask, jsonify
+from backend.utils.conditional import make_etag, not_modified, add_validators
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    stamp = {'etag': make_etag('items', 1)}
+
+    @app.route('/items')
+    def items():
+        cached_response = not_modified(stamp['etag'])
+        if cached_response is not None:
+            return cached_response
+        return add_validators(jsonify({'items': [1, 2, 3]}), stamp['etag'])
+
+    app.stamp = stamp
+    return app
+
+
+class TestConditionalRequests:
+    """Test ETag validation"""
+
+    def test_full_response_carries_validators(self, app):
+        response = app.test_client().get('/items')
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] == f'"{app.stamp["etag"]}"'
+        assert 'Last-Modified' not in response.headers
+        assert response.cache_control.private
+        assert response.cache_control.no_cache
+
+    def test_matching_etag_is_not_modified(self, app):
+        client = app.test_client()
+        etag = client.get('/items').headers['ETag']
+
+        response = client.get('/items', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
+        response = client.get('/items', headers={'If-None-Match': f'W/{etag}, "other"'})
+        assert response.status_code == 304
+
+    def test_changed_etag_sends_body(self, app):
+        client = app.test_client()
+        etag = client.get('/items').headers['ETag']
+        app.stamp['etag'] = make_etag('items', 2)
+
+        response = client.get('/items', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.get_json() == {'items': [1, 2, 3]}
+
+    def test_if_modified_since_is_ignored(self, app):
+        """Dates cannot see deleted rows, so only the ETag can yield a 304"""
+        response = app.test_client().get('/items', headers={'If-Modified-Since': 'Sat, 17 Oct 2099 12:00:00 GMT'})
+        assert response.status_code == 200
+
+    def test_etag_depends_on_every_part(self):
+        assert make_etag('a', [1, 2]) == make_etag('a', [1, 2])
+        assert make_etag('a', [1, 2]) != make_etag('a', [2, 1])
+        assert make_etag('a', datetime(2026, 1, 1)) != make_etag('a', datetime(2026, 1, 2))
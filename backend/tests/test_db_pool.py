@@ -0,0 +1,87 @@
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from backend.utils.db_pool import PoolMetrics, metered_pool_class, pool_sizing, init_db_pool
+
+class TestPoolSizing:
+    def test_budget_split_between_workers(self):
+        """Test each worker gets its share of the connection budget"""
+        assert pool_sizing(100, 4, 10) == (15, 10)
+        assert pool_sizing(20, 4, 10) == (3, 2)
+
+    def test_minimum_pool(self):
+        """Test tiny budgets still leave every worker a connection"""
+        assert pool_sizing(3, 8, 10) == (1, 1)
+
+    def test_engine_options(self):
+        """Test pool options are derived from config without overriding explicit ones"""
+        app = Flask(__name__)
+        app.config.update(
+            SQLALCHEMY_DATABASE_URI='mysql+pymysql://user:pw@db/cipherquest',
+            WEB_CONCURRENCY=4,
+            DB_MAX_CONNECTIONS=40,
+            DB_MAX_OVERFLOW=4,
+            SQLALCHEMY_ENGINE_OPTIONS={'pool_recycle': 300}
+        )
+        init_db_pool(app)
+        options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+        assert (options['pool_size'], options['max_overflow']) == (6, 4)
+        assert options['pool_pre_ping'] is True
+        assert options['pool_recycle'] == 300
+
+    def test_sqlite_keeps_default_pool(self):
+        """Test SQLite URIs are left alone"""
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        init_db_pool(app)
+        assert 'SQLALCHEMY_ENGINE_OPTIONS' not in app.config
+
+class TestPoolMetrics:
+    @pytest.fixture
+    def engine(self, tmp_path):
+        metrics = PoolMetrics(slow_checkout=10)
+        engine = create_engine(
+            f'sqlite:///{tmp_path / "pool.db"}',
+            poolclass=metered_pool_class(metrics),
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05
+        )
+        yield engine, metrics
+        engine.dispose()
+
+    def test_checkouts_and_gauges(self, engine):
+        """Test checkouts are counted and the live pool state is reported"""
+        engine, metrics = engine
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            stats = metrics.snapshot()
+            assert stats['checked_out'] == 1
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+
+        stats = metrics.snapshot()
+        assert stats['checkouts'] == 2
+        assert stats['connects'] == 1
+        assert stats['checked_out'] == 0
+        assert stats['pool_size'] == 1
+
+    def test_timeouts_are_counted(self, engine):
+        """Test an exhausted pool records the checkout timeout"""
+        engine, metrics = engine
+        with engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+        assert metrics.snapshot()['timeouts'] == 1
+
+    def test_metrics_survive_dispose(self, engine):
+        """Test a recreated pool keeps reporting to the same metrics"""
+        engine, metrics = engine
+        with engine.connect():
+            pass
+        engine.dispose()
+        with engine.connect():
+            pass
+        assert metrics.snapshot()['checkouts'] == 2
+        assert metrics.snapshot()['connects'] == 2
@@ -0,0 +1,82 @@
+import pytest
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, text
+from backend.utils.db_routing import RoutingSession, init_db_routing
+
+@pytest.fixture
+def routed_app(tmp_path):
+    """App with a primary and one replica, each holding a different row"""
+    primary = tmp_path / 'primary.db'
+    replica = tmp_path / 'replica.db'
+    for path, name in ((primary, 'primary'), (replica, 'replica')):
+        engine = create_engine(f'sqlite:///{path}')
+        with engine.begin() as connection:
+            connection.execute(text('CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)'))
+            connection.execute(text('INSERT INTO notes (body) VALUES (:body)'), {'body': name})
+        engine.dispose()
+
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{primary}',
+        DB_REPLICA_URIS=[f'sqlite:///{replica}'],
+        DB_REPLICA_STICKY_SECONDS=60,
+        JWT_SECRET_KEY='test-secret'
+    )
+    JWTManager(app)
+    db = SQLAlchemy(session_options={'class_': RoutingSession})
+    init_db_routing(app)
+    db.init_app(app)
+
+    class Note(db.Model):
+        __tablename__ = 'notes'
+        id = db.Column(db.Integer, primary_key=True)
+        body = db.Column(db.Text)
+
+    @app.route('/notes', methods=['GET'])
+    def list_notes():
+        return jsonify([note.body for note in Note.query.order_by(Note.id)])
+
+    @app.route('/notes', methods=['POST'])
+    def add_note():
+        db.session.add(Note(body='written'))
+        db.session.commit()
+        return jsonify([note.body for note in Note.query.order_by(Note.id)]), 201
+
+    with app.app_context():
+        tokens = {user: create_access_token(identity=user) for user in ('alice', 'bob')}
+    return app, tokens
+
+def _headers(tokens, user):
+    return {'Authorization': f'Bearer {tokens[user]}'}
+
+class TestReplicaRouting:
+    def test_reads_go_to_replica(self, routed_app):
+        """Test GET requests read from the replica"""
+        app, tokens = routed_app
+        response = app.test_client().get('/notes', headers=_headers(tokens, 'alice'))
+        assert response.get_json() == ['replica']
+
+    def test_writes_go_to_primary(self, routed_app):
+        """Test writes and reads in a write request use the primary"""
+        app, tokens = routed_app
+        response = app.test_client().post('/notes', headers=_headers(tokens, 'alice'))
+        assert response.status_code == 201
+        assert response.get_json() == ['primary', 'written']
+
+    def test_writer_reads_own_writes(self, routed_app):
+        """Test a user who just wrote reads from the primary while other users don't"""
+        app, tokens = routed_app
+        client = app.test_client()
+        client.post('/notes', headers=_headers(tokens, 'alice'))
+
+        assert client.get('/notes', headers=_headers(tokens, 'alice')).get_json() == ['primary', 'written']
+        assert client.get('/notes', headers=_headers(tokens, 'bob')).get_json() == ['replica']
+
+    def test_no_replicas_configured(self):
+        """Test routing is a no-op without replica URIs"""
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        assert init_db_routing(app) is None
+        assert 'SQLALCHEMY_BINDS' not in app.config
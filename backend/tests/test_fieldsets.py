@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import select
+from backend.utils.serializers import ModelSerializer, parse_fields, InvalidFields
+from backend.models.challenge import Challenge
+from backend.models.module import Module
+
+
+class TestParseFields:
+    """Test resolving ?fields= and ?view= into a fieldset"""
+
+    def test_defaults_to_every_field(self):
+        assert parse_fields(None, None, Module.FIELDS, Module.SUMMARY_FIELDS) is None
+        assert parse_fields('', 'full', Module.FIELDS, Module.SUMMARY_FIELDS) is None
+
+    def test_summary_view(self):
+        assert parse_fields(None, 'summary', Module.FIELDS, Module.SUMMARY_FIELDS) == set(Module.SUMMARY_FIELDS)
+
+    def test_fields_always_include_id(self):
+        fields = parse_fields('title, difficulty,', 'summary', Module.FIELDS, Module.SUMMARY_FIELDS)
+        assert fields == {'id', 'title', 'difficulty'}
+
+    def test_unknown_field(self):
+        with pytest.raises(InvalidFields, match='password_hash'):
+            parse_fields('title,password_hash', None, Module.FIELDS, Module.SUMMARY_FIELDS)
+
+    def test_unknown_view(self):
+        with pytest.raises(InvalidFields):
+            parse_fields(None, 'compact', Module.FIELDS, Module.SUMMARY_FIELDS)
+
+
+class TestSparseSerialization:
+    """Test that fieldsets trim both the SQL and the payload"""
+
+    def test_only_keeps_declared_order(self):
+        serializer = ModelSerializer(('id', 'title', 'created_at'), datetime_keys=('created_at',))
+        subset = serializer.only({'created_at', 'id'})
+
+        assert subset.keys == ('id', 'created_at')
+        assert subset.datetime_keys == ('created_at',)
+        assert serializer.only(['id', 'created_at']) is subset
+
+    def test_module_summary_query_skips_content(self):
+        statement = str(Module.load_fields(select(Module), frozenset(Module.SUMMARY_FIELDS)))
+
+        assert 'modules.title' in statement
+        assert 'modules.content' not in statement
+        assert 'modules.description' not in statement
+
+    def test_challenge_query_keeps_sort_key(self):
+        statement = str(Challenge.load_fields(select(Challenge), frozenset({'title'})))
+
+        assert 'challenges.id' in statement
+        assert 'challenges.hints' not in statement
+
+    def test_full_query_is_unchanged(self):
+        assert str(Module.load_fields(select(Module), None)) == str(select(Module))
+
+    def test_to_dict_serves_only_fields(self):
+        module = Module(id=3, title='Ciphers', content='# Long markdown', category='Cryptography',
+                        created_at=datetime(2026, 1, 1))
+
+        assert module.to_dict(challenge_count=4, fields={'id', 'title', 'challenge_count'}) == {
+            'id': 3, 'title': 'Ciphers', 'challenge_count': 4
+        }
+        assert 'content' not in module.to_dict(fields={'id', 'created_at'})
@@ -0,0 +1,94 @@
+import pytest
+from types import SimpleNamespace
+from backend.models.challenge import Flag
+from backend.utils.flag_matcher import CompiledFlagMatcher, FlagMatcherCache
+
+def make_flag(flag_id, value, flag_type='exact', points=10):
+    """Build an unmapped stand-in for a Flag row"""
+    return SimpleNamespace(id=flag_id, flag_value=value, flag_type=flag_type, points=points, is_active=True)
+
+class TestCompiledFlagMatcher:
+    def test_exact_flag(self):
+        """Test exact flags ignore surrounding whitespace"""
+        matcher = CompiledFlagMatcher([make_flag(1, ' flag{exact} ')])
+        assert matcher.match('flag{exact}\n').flag_id == 1
+        assert matcher.match('flag{EXACT}') is None
+
+    def test_regex_flag(self):
+        """Test regex flags match from the start of the submission"""
+        matcher = CompiledFlagMatcher([make_flag(1, r'flag\{\d+\}', 'regex')])
+        assert matcher.match('  flag{123}').flag_id == 1
+        assert matcher.match('xflag{123}') is None
+
+    def test_invalid_regex_never_matches(self):
+        """Test an invalid pattern is skipped instead of raising"""
+        matcher = CompiledFlagMatcher([make_flag(1, 'flag{(', 'regex'), make_flag(2, 'flag{ok}')])
+        assert matcher.match('flag{(') is None
+        assert matcher.match('flag{ok}').flag_id == 2
+
+    def test_contains_flag(self):
+        """Test contains flags are case-insensitive"""
+        matcher = CompiledFlagMatcher([make_flag(1, 'Secret', 'contains')])
+        assert matcher.match('the SECRET is out').flag_id == 1
+        assert matcher.match('nothing here') is None
+
+    def test_first_matching_flag_wins(self):
+        """Test flag order decides which flag is awarded"""
+        flags = [
+            make_flag(1, 'flag', 'contains', points=5),
+            make_flag(2, 'flag{bonus}', points=50),
+        ]
+        assert CompiledFlagMatcher(flags).match('flag{bonus}') == (1, 5)
+        assert CompiledFlagMatcher(list(reversed(flags))).match('flag{bonus}') == (2, 50)
+
+    def test_matches_check_flag(self):
+        """Test the matcher agrees with Flag.check_flag"""
+        flags = [
+            make_flag(1, 'flag{a}'),
+            make_flag(2, r'^flag\{b+\}$', 'regex'),
+            make_flag(3, 'needle', 'contains'),
+        ]
+        matcher = CompiledFlagMatcher(flags)
+        for submission in ['flag{a}', ' flag{a} ', 'flag{bbb}', 'NEEDLE!', 'flag{c}']:
+            expected = next((flag.id for flag in flags if Flag.check_flag(flag, submission)), None)
+            match = matcher.match(submission)
+            assert (match.flag_id if match else None) == expected
+
+class TestFlagMatcherCache:
+    def test_reuses_compiled_matcher(self):
+        """Test flags are only loaded once while cached"""
+        cache = FlagMatcherCache(ttl=None)
+        loads = []
+        
+        def load_flags():
+            loads.append(1)
+            return [make_flag(1, 'flag{x}')]
+        
+        assert cache.get(1, load_flags).match('flag{x}')
+        assert cache.get(1, load_flags).match('flag{x}')
+        assert len(loads) == 1
+
+    def test_invalidate(self):
+        """Test invalidation rebuilds the matcher from fresh flags"""
+        cache = FlagMatcherCache(ttl=None)
+        cache.get(1, lambda: [make_flag(1, 'flag{old}')])
+        cache.invalidate(1)
+        matcher = cache.get(1, lambda: [make_flag(2, 'flag{new}')])
+        assert matcher.match('flag{old}') is None
+        assert matcher.match('flag{new}').flag_id == 2
+
+    def test_zero_ttl_always_reloads(self):
+        """Test a zero TTL disables caching"""
+        cache = FlagMatcherCache(ttl=0)
+        cache.get(1, lambda: [make_flag(1, 'flag{old}')])
+        assert cache.get(1, lambda: []).match('flag{old}') is None
+
+    def test_new_version_drops_matchers(self):
+        """Test a shared version bump from another worker forces a rebuild"""
+        cache = FlagMatcherCache(ttl=None)
+        cache.get(1, lambda: [make_flag(1, 'flag{old}')], version=3)
+        assert cache.get(1, lambda: [], version=3).match('flag{old}').flag_id == 1
+
+        matcher = cache.get(1, lambda: [make_flag(2, 'flag{new}')], version=4)
+        assert matcher.match('flag{old}') is None
+        assert matcher.match('flag{new}').flag_id == 2
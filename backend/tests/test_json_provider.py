@@ -0,0 +1,94 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from flask import Flask, jsonify, request
+from backend.utils.json_provider import IsoJSONProvider, OrjsonProvider, init_json_provider
+from backend.utils.serializers import ModelSerializer
+from backend.models.leaderboard import LeaderboardEntry
+from backend.models.user import User
+
+
+def make_app(provider):
+    app = Flask(__name__)
+    app.config['JSON_PROVIDER'] = provider
+    init_json_provider(app)
+
+    @app.route('/echo', methods=['POST'])
+    def echo():
+        return jsonify(request.get_json())
+
+    @app.route('/payload')
+    def payload():
+        return jsonify({
+            'when': datetime(2026, 10, 17, 12, 30, 5, 120),
+            'amount': Decimal('1.50')
+        })
+
+    return app
+
+
+class TestJSONProviders:
+    """Test that both providers encode and decode the same JSON"""
+
+    @pytest.mark.parametrize('provider, provider_class', [
+        ('orjson', OrjsonProvider),
+        ('stdlib', IsoJSONProvider)
+    ])
+    def test_payload(self, provider, provider_class):
+        app = make_app(provider)
+        assert isinstance(app.json, provider_class)
+
+        response = app.test_client().get('/payload')
+        assert response.mimetype == 'application/json'
+        assert response.get_json() == {
+            'when': '2026-10-17T12:30:05.000120',
+            'amount': '1.50'
+        }
+
+    @pytest.mark.parametrize('provider', ['orjson', 'stdlib'])
+    def test_request_round_trip(self, provider):
+        client = make_app(provider).test_client()
+
+        response = client.post('/echo', json={'name': 'ünïcode', 'scores': [1, 2.5, None]})
+        assert response.get_json() == {'name': 'ünïcode', 'scores': [1, 2.5, None]}
+
+        response = client.post('/echo', data='{not json', content_type='application/json')
+        assert response.status_code == 400
+
+    def test_dumps_returns_text(self):
+        app = make_app('orjson')
+        assert app.json.dumps({'b': 1, 'a': 2}, sort_keys=True) == '{"a":2,"b":1}'
+
+    def test_unknown_type_raises(self):
+        app = make_app('orjson')
+        with pytest.raises(TypeError):
+            app.json.dumps({'value': object()})
+
+
+class TestModelSerializer:
+    """Test the precomputed model serializers"""
+
+    def test_formats_datetime_keys(self):
+        serializer = ModelSerializer(('id', 'last_updated'), datetime_keys=('last_updated',))
+        entry = LeaderboardEntry(user_id=1, last_updated=datetime(2026, 1, 2, 3, 4, 5))
+        entry.id = 7
+
+        assert serializer(entry) == {'id': 7, 'last_updated': '2026-01-02T03:04:05'}
+        entry.last_updated = None
+        assert serializer(entry)['last_updated'] is None
+
+    def test_single_key(self):
+        serializer = ModelSerializer(('username',))
+        assert serializer(User(username='solo', email='solo@test.com')) == {'username': 'solo'}
+
+    def test_datetime_keys_must_be_served(self):
+        with pytest.raises(ValueError):
+            ModelSerializer(('id',), datetime_keys=('created_at',))
+
+    def test_to_dict_keys(self):
+        user = User(username='learner', email='learner@test.com', created_at=datetime(2026, 5, 1))
+        user_dict = user.to_dict()
+
+        assert user_dict['created_at'] == '2026-05-01T00:00:00'
+        assert user_dict['last_login'] is None
+        assert 'password_hash' not in user_dict
@@ -0,0 +1,196 @@
+import random
+import pytest
+from backend.utils.leaderboard_index import OrderStatisticList, InMemoryRankedIndex, RedisRankedIndex
+
+class TestOrderStatisticList:
+    def test_matches_sorted_list(self):
+        """Test random inserts and removes against a plain sorted list"""
+        rng = random.Random(42)
+        skiplist = OrderStatisticList()
+        expected = []
+
+        for _ in range(2000):
+            key = (rng.randint(0, 200), rng.randint(0, 10000))
+            if expected and rng.random() < 0.3:
+                victim = rng.choice(expected)
+                expected.remove(victim)
+                skiplist.remove(victim)
+            elif key not in expected:
+                expected.append(key)
+                skiplist.insert(key)
+
+        expected.sort()
+        assert len(skiplist) == len(expected)
+        assert list(skiplist) == expected
+        assert skiplist.slice(10, 25) == expected[10:25]
+        for position in (0, len(expected) // 2, len(expected) - 1):
+            assert skiplist[position] == expected[position]
+            assert skiplist.count_less_than(expected[position]) == position
+
+    def test_remove_missing_key(self):
+        """Test removing a key that is not stored"""
+        skiplist = OrderStatisticList()
+        skiplist.insert((1, 1))
+        with pytest.raises(KeyError):
+            skiplist.remove((2, 2))
+
+    def test_slice_out_of_range(self):
+        """Test slicing past the end of the list"""
+        skiplist = OrderStatisticList()
+        for key in range(5):
+            skiplist.insert(key)
+        assert skiplist.slice(3, 100) == [3, 4]
+        assert skiplist.slice(10, 20) == []
+
+class TestInMemoryRankedIndex:
+    @pytest.fixture
+    def index(self):
+        index = InMemoryRankedIndex(resync_interval=None)
+        index.load([(1, 1000), (2, 800), (3, 600), (4, 800), (5, 100)])
+        return index
+
+    def test_top_players(self, index):
+        """Test top players are ordered by score, ties by user id"""
+        assert index.top(3) == [(1, 1000), (2, 800), (4, 800)]
+
+    def test_rank_and_position(self, index):
+        """Test competition rank and leaderboard position"""
+        assert index.rank_of(2) == 2
+        assert index.rank_of(4) == 2
+        assert index.position_of(4) == 2
+        assert index.rank_of(3) == 4
+        assert index.rank_of(99) is None
+        assert index.position_of(99) is None
+
+    def test_competition_ranks(self, index):
+        """Test tied players share a rank on any page"""
+        assert index.competition_ranks(index.top(5)) == [1, 2, 2, 4, 5]
+        assert index.competition_ranks(index.page(2, 3), 2) == [2, 4, 5]
+        assert index.competition_ranks([]) == []
+
+    def test_update_moves_player(self, index):
+        """Test updating a score moves the player in the ranking"""
+        index.update(5, 1200)
+        assert index.top(1) == [(5, 1200)]
+        assert index.score_of(5) == 1200
+        assert index.count() == 5
+
+    def test_update_adds_new_player(self, index):
+        """Test updating an unknown player inserts them"""
+        index.update(6, 700)
+        assert index.count() == 6
+        assert index.position_of(6) == 3
+
+    def test_remove_player(self, index):
+        """Test removing a player from the index"""
+        index.remove(1)
+        assert index.count() == 4
+        assert index.top(1) == [(2, 800)]
+
+    def test_page(self, index):
+        """Test paging through the leaderboard"""
+        assert index.page(1, 2) == [(2, 800), (4, 800)]
+        assert index.page(4, 10) == [(5, 100)]
+        assert index.page(10, 10) == []
+
+    def test_position_after_cursor(self, index):
+        """Test resuming after a (score, user id) cursor"""
+        assert index.position_after(800, 2) == 2
+        assert index.page(index.position_after(800, 4), 2) == [(3, 600), (5, 100)]
+
+        # The cursor's player moved; resume after everyone scoring more
+        index.update(2, 50)
+        assert index.position_after(800, 2) == 1
+        assert index.position_after(700, 99) == 2
+
+    def test_around_user(self, index):
+        """Test fetching players around a user"""
+        start, players = index.around(3, 1)
+        assert start == 2
+        assert players == [(4, 800), (3, 600), (5, 100)]
+
+        start, players = index.around(1, 1)
+        assert start == 0
+        assert players == [(1, 1000), (2, 800)]
+
+    def test_around_unranked_user(self, index):
+        """Test fetching players around an unranked user"""
+        assert index.around(99, 5) == (None, [])
+
+    def test_needs_reload(self):
+        """Test reload scheduling"""
+        index = InMemoryRankedIndex(resync_interval=0)
+        assert index.needs_reload()
+        index.load([])
+        assert index.needs_reload()
+
+        index = InMemoryRankedIndex(resync_interval=None)
+        index.load([])
+        assert not index.needs_reload()
+
+class FakeSortedSetRedis:
+    """Just enough of a Redis client to build and swap sorted sets"""
+
+    def __init__(self):
+        self.sets = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+    def zadd(self, key, mapping):
+        self.sets.setdefault(key, {}).update(mapping)
+
+    def zcard(self, key):
+        return len(self.sets.get(key, {}))
+
+    def exists(self, key):
+        return int(key in self.sets)
+
+    def rename(self, src, dst):
+        self.sets[dst] = self.sets.pop(src)
+
+    def delete(self, key):
+        self.sets.pop(key, None)
+
+class TestRedisRankedIndex:
+    def test_reloads_after_the_shared_set_disappears(self):
+        """Test that a flushed sorted set is noticed after the check interval"""
+        redis_client = FakeSortedSetRedis()
+        index = RedisRankedIndex(redis_client, key='board', check_interval=0)
+        assert index.needs_reload()
+        index.load([(1, 100), (2, 50)])
+        assert not index.needs_reload()
+
+        redis_client.delete('board')
+        assert index.needs_reload()
+
+    def test_waits_for_the_check_interval(self):
+        """Test that existence is not checked on every read"""
+        redis_client = FakeSortedSetRedis()
+        index = RedisRankedIndex(redis_client, key='board', check_interval=60)
+        index.load([(1, 100)])
+        redis_client.delete('board')
+        assert not index.needs_reload()
+
+    def test_load_uses_a_private_scratch_key(self):
+        """Test that concurrent loads do not share a scratch key or leave one behind"""
+        redis_client = FakeSortedSetRedis()
+        index = RedisRankedIndex(redis_client, key='board')
+        scratch_keys = []
+        zadd = redis_client.zadd
+
+        def recording_zadd(key, mapping):
+            scratch_keys.append(key)
+            zadd(key, mapping)
+
+        redis_client.zadd = recording_zadd
+        index.load([(1, 100)])
+        index.load([(2, 50)])
+
+        assert len(set(scratch_keys)) == 2
+        assert all(key.startswith('board:loading:') for key in scratch_keys)
+        assert list(redis_client.sets) == ['board']
+        assert redis_client.zcard('board') == 1
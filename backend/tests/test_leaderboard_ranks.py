@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from backend.models.user import User, db
+from backend.models.leaderboard import LeaderboardEntry
+
+def _add_entries(scores):
+    """Create a user and leaderboard entry per score, returning the entries"""
+    entries = []
+    for i, score in enumerate(scores):
+        user = User(username=f'ranked{i}', email=f'ranked{i}@test.com')
+        user.password_hash = 'x'
+        db.session.add(user)
+        db.session.flush()
+        entry = LeaderboardEntry(user_id=user.id, total_score=score,
+                                 last_updated=datetime.utcnow() - timedelta(days=1))
+        db.session.add(entry)
+        entries.append(entry)
+    db.session.commit()
+    return entries
+
+def _ranks(entries):
+    return [db.session.get(LeaderboardEntry, entry.id).rank for entry in entries]
+
+class TestUpdateAllRanks:
+    def test_full_refresh(self, app, db_session):
+        """Test ranks follow score order with ties broken by user id"""
+        entries = _add_entries([50, 300, 100, 300, 0])
+        assert LeaderboardEntry.update_all_ranks(chunk_size=2) == 5
+        db.session.expire_all()
+        assert _ranks(entries) == [4, 1, 3, 2, 5]
+        assert LeaderboardEntry.update_all_ranks(chunk_size=2) == 0
+
+    def test_incremental_refresh(self, app, db_session):
+        """Test an incremental pass fixes ranks disturbed by score changes"""
+        entries = _add_entries([500, 400, 300, 200, 100])
+        LeaderboardEntry.update_all_ranks()
+        since = datetime.utcnow()
+
+        LeaderboardEntry.apply_score_delta(entries[3].user_id, 250)
+        assert LeaderboardEntry.update_all_ranks(chunk_size=2, since=since) == 3
+        db.session.expire_all()
+        assert _ranks(entries) == [1, 3, 4, 2, 5]
+
+    def test_python_fallback(self, app, db_session, monkeypatch):
+        """Test the non-window-function path assigns the same ranks"""
+        monkeypatch.setattr(LeaderboardEntry, '_supports_window_update', classmethod(lambda cls: False))
+        entries = _add_entries([10, 30, 20])
+        assert LeaderboardEntry.update_all_ranks(chunk_size=2) == 3
+        db.session.expire_all()
+        assert _ranks(entries) == [3, 1, 2]
+
+    def test_incremental_refresh_with_ties(self, app, db_session):
+        """Test many score changes, ties included, end up ranked as a full refresh would"""
+        entries = _add_entries([900, 800, 700, 600, 500, 400, 300, 200, 100, 0])
+        LeaderboardEntry.update_all_ranks()
+        since = datetime.utcnow()
+
+        for entry, delta in zip(entries[4:], (300, 250, 400, 700, 800, 50)):
+            LeaderboardEntry.apply_score_delta(entry.user_id, delta)
+        LeaderboardEntry.update_all_ranks(chunk_size=3, since=since)
+        db.session.expire_all()
+        incremental = _ranks(entries)
+
+        assert LeaderboardEntry.update_all_ranks(chunk_size=3) == 0
+        assert sorted(incremental) == list(range(1, 11))
+
+    def test_changed_positions_cost_constant_queries(self, app, db_session, count_queries):
+        """Test locating changed entries does not issue a query per entry"""
+        entries = _add_entries([100 * i for i in range(12)])
+        LeaderboardEntry.update_all_ranks()
+        since = datetime.utcnow()
+
+        LeaderboardEntry.apply_score_delta(entries[0].user_id, 50)
+        with count_queries() as one_change:
+            LeaderboardEntry._changed_rank_spans(since)
+
+        for entry in entries[1:]:
+            LeaderboardEntry.apply_score_delta(entry.user_id, 50)
+        with count_queries() as many_changes:
+            spans = LeaderboardEntry._changed_rank_spans(since)
+
+        assert len(many_changes) == len(one_change)
+        assert spans == [(0, 24)]
@@ -180,4 +180,51 @@ class TestLeaderboardRoutes:
         response = client.get('/api/leaderboard/export', headers=auth_headers)
         assert response.status_code == 200
         # Should return CSV or JSON format
-        assert response.headers['Content-Type'] in ['text/csv', 'application/json'] 
\ No newline at end of file
+        assert response.headers['Content-Type'] in ['text/csv', 'application/json'] 
+    
+    def test_leaderboard_sizes_are_clamped(self, client, auth_headers):
+        """Test oversized page and window requests are cut to the maximum"""
+        response = client.get('/api/leaderboard/?limit=100000&offset=-5', headers=auth_headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert (data['limit'], data['offset']) == (100, 0)
+        
+        user = User.query.filter_by(username='testuser').first()
+        db.session.add(LeaderboardEntry(user_id=user.id, total_score=10))
+        db.session.commit()
+        response = client.get('/api/leaderboard/around-me?range=100000', headers=auth_headers)
+        assert response.get_json()['range'] == 50
+    
+    def test_tied_players_share_a_rank(self, client, auth_headers):
+        """Test ranks count only players with a strictly higher score"""
+        me = User.query.filter_by(username='testuser').first()
+        others = [User(username=f'tied{i}', email=f'tied{i}@test.com', password='TestPass123!') for i in range(3)]
+        db.session.add_all(others)
+        db.session.commit()
+        for user, score in zip([others[0], others[1], me, others[2]], (900, 700, 700, 500)):
+            db.session.add(LeaderboardEntry(user_id=user.id, total_score=score))
+        db.session.commit()
+        
+        response = client.get('/api/leaderboard/', headers=auth_headers)
+        assert [player['rank'] for player in response.get_json()['leaderboard']] == [1, 2, 2, 4]
+        
+        response = client.get('/api/leaderboard/?limit=2&offset=2', headers=auth_headers)
+        assert [player['rank'] for player in response.get_json()['leaderboard']] == [2, 4]
+        
+        response = client.get('/api/leaderboard/my-rank', headers=auth_headers)
+        assert response.get_json()['rank_data']['rank'] == 2
+        
+        response = client.get('/api/leaderboard/around-me?range=1', headers=auth_headers)
+        data = response.get_json()
+        assert data['my_rank'] == 2
+        assert [player['rank'] for player in data['around_me']] == [1, 2, 2]
+    
+    def test_get_leaderboard_not_modified(self, client, auth_headers, sample_leaderboard):
+        """Test revalidating an unchanged leaderboard with its ETag"""
+        response = client.get('/api/leaderboard/', headers=auth_headers)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        
+        response = client.get('/api/leaderboard/', headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
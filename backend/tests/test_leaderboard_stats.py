@@ -0,0 +1,50 @@
+from backend.utils.leaderboard_stats import LeaderboardStats
+
+class TestLeaderboardStats:
+    def test_load_and_snapshot(self):
+        """Test the snapshot is derived from the loaded aggregate row"""
+        stats = LeaderboardStats(reconcile_interval=None)
+        assert stats.needs_reload()
+
+        stats.load((4, 1000, 400, 6, 9))
+        assert not stats.needs_reload()
+        assert stats.snapshot() == {
+            'total_players': 4,
+            'average_score': 250.0,
+            'highest_score': 400,
+            'total_modules_completed': 6,
+            'total_challenges_completed': 9
+        }
+
+    def test_record_scoring_batch(self):
+        """Test committed batches are folded into the totals"""
+        stats = LeaderboardStats(reconcile_interval=None)
+        stats.load((2, 300, 200, 1, 2))
+
+        stats.record(new_players=1, score_delta=450, modules_delta=1, challenges_delta=2, new_scores=[250, 500])
+
+        snapshot = stats.snapshot()
+        assert snapshot['total_players'] == 3
+        assert snapshot['average_score'] == 250.0
+        assert snapshot['highest_score'] == 500
+        assert snapshot['total_modules_completed'] == 2
+        assert snapshot['total_challenges_completed'] == 4
+
+    def test_record_before_load_is_ignored(self):
+        """Test batches before the first load don't produce partial totals"""
+        stats = LeaderboardStats(reconcile_interval=None)
+        stats.record(new_players=1, score_delta=50, new_scores=[50])
+        assert stats.needs_reload()
+
+    def test_negative_delta_forces_reload(self):
+        """Test a score decrease triggers a rebuild since the maximum may have dropped"""
+        stats = LeaderboardStats(reconcile_interval=None)
+        stats.load((1, 100, 100, 0, 1))
+        stats.record(score_delta=-100, new_scores=[0])
+        assert stats.needs_reload()
+
+    def test_reconcile_interval(self):
+        """Test an interval of zero rebuilds on every read"""
+        stats = LeaderboardStats(reconcile_interval=0)
+        stats.load((0, 0, 0, 0, 0))
+        assert stats.needs_reload()
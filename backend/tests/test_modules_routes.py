@@ -5,6 +5,7 @@ from backend.app import create_app
 from backend.models.user import User, db
 from backend.models.module import Module
 from backend.models.progress import UserProgress
+from backend.models.leaderboard import LeaderboardEntry
 
 @pytest.fixture
 def app():
@@ -183,6 +184,37 @@ class TestModulesRoutes:
         assert 'message' in data
         assert 'completed' in data
 
+    def test_complete_module_awards_points_once(self, client, auth_headers, sample_modules):
+        """Test that completing a module twice only adds its points once"""
+        module = sample_modules[0]
+        
+        first = client.post(f'/api/modules/{module.id}/complete', headers=auth_headers)
+        second = client.post(f'/api/modules/{module.id}/complete', headers=auth_headers)
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert first.get_json()['experience_gained'] == module.points
+        assert second.get_json()['experience_gained'] == 0
+        
+        user = User.query.filter_by(username='testuser').first()
+        entry = LeaderboardEntry.query.filter_by(user_id=user.id).first()
+        assert entry.total_score == module.points
+        assert entry.modules_completed == 1
+        assert LeaderboardEntry.reconcile() == []
+
+    def test_complete_zero_point_module_counts(self, client, auth_headers, sample_modules):
+        """Test that completing a module worth no points still counts it as completed"""
+        module = sample_modules[0]
+        module.points = 0
+        db.session.commit()
+        
+        response = client.post(f'/api/modules/{module.id}/complete', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.get_json()['experience_gained'] == 0
+        
+        user = User.query.filter_by(username='testuser').first()
+        entry = LeaderboardEntry.query.filter_by(user_id=user.id).first()
+        assert entry.modules_completed == 1
+
     def test_get_modules_with_inactive_filter(self, client, auth_headers, sample_modules, db_session):
         """Test that inactive modules are not returned by default"""
         # Create an inactive module
@@ -212,4 +244,48 @@ class TestModulesRoutes:
         
         # Check that modules are sorted by order
         orders = [module['order'] for module in data['modules']]
-        assert orders == sorted(orders) 
\ No newline at end of file
+        assert orders == sorted(orders) 
+
+    def test_get_modules_query_count_is_flat(self, client, auth_headers, sample_modules, count_queries):
+        """Test that listing modules does not issue queries per row"""
+        user = User.query.filter_by(username='testuser').first()
+        for module in sample_modules:
+            db.session.add(UserProgress(user_id=user.id, module_id=module.id, completed=True))
+        db.session.commit()
+        client.get('/api/modules/?limit=1', headers=auth_headers)
+        
+        # Start each request with an empty identity map so both load the same rows
+        db.session.remove()
+        with count_queries() as small_page:
+            response = client.get('/api/modules/?limit=1', headers=auth_headers)
+        assert response.status_code == 200
+        
+        db.session.remove()
+        with count_queries() as full_page:
+            response = client.get('/api/modules/?limit=3', headers=auth_headers)
+        assert response.status_code == 200
+        modules = response.get_json()['modules']
+        assert len(modules) == 3
+        assert all(module['user_progress']['completed'] for module in modules)
+        
+        assert len(full_page) == len(small_page)
+    
+    def test_get_modules_summary_view(self, client, auth_headers, sample_modules, count_queries):
+        """Test that the summary view neither selects nor serves module content"""
+        with count_queries() as statements:
+            response = client.get('/api/modules/?view=summary', headers=auth_headers)
+        assert response.status_code == 200
+        
+        modules = response.get_json()['modules']
+        assert len(modules) == 3
+        assert set(modules[0]) == set(Module.SUMMARY_FIELDS) | {'user_progress'}
+        assert not any('modules.content' in statement for statement in statements)
+    
+    def test_get_modules_with_fields(self, client, auth_headers, sample_modules):
+        """Test selecting module fields explicitly"""
+        response = client.get('/api/modules/?fields=title', headers=auth_headers)
+        assert response.status_code == 200
+        assert all(set(module) == {'id', 'title'} for module in response.get_json()['modules'])
+        
+        response = client.get('/api/modules/?fields=title,password_hash', headers=auth_headers)
+        assert response.status_code == 400
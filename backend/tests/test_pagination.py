@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import create_engine, Column, Integer, String
+from sqlalchemy.orm import declarative_base, Session
+from backend.utils.pagination import encode_cursor, decode_cursor, paginate_keyset, InvalidCursor
+
+Base = declarative_base()
+
+class Item(Base):
+    __tablename__ = 'items'
+    id = Column(Integer, primary_key=True)
+    score = Column(Integer)
+    name = Column(String(20))
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([Item(id=i, score=i % 4, name=f'item{i}') for i in range(1, 24)])
+        session.commit()
+        yield session
+
+def _walk(session, order, limit):
+    """Follow cursors from the first page to the last, collecting ids"""
+    ids, cursor = [], None
+    while True:
+        rows, cursor = paginate_keyset(session.query(Item), order, cursor, limit)
+        ids.extend(row.id for row in rows)
+        if cursor is None:
+            return ids
+
+class TestCursors:
+    def test_round_trip(self):
+        """Test cursors decode to the values they were built from"""
+        cursor = encode_cursor([800, 42])
+        assert decode_cursor(cursor, 2) == [800, 42]
+
+    @pytest.mark.parametrize('cursor', ['not-base64!', encode_cursor([1]), encode_cursor([{'a': 1}, 2]), 'e30'])
+    def test_invalid_cursor(self, cursor):
+        """Test malformed or mismatched cursors are rejected"""
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor, 2)
+
+class TestPaginateKeyset:
+    def test_walks_every_row_once(self, session):
+        """Test following cursors visits every row in order exactly once"""
+        assert _walk(session, [(Item.id, False)], 5) == list(range(1, 24))
+
+    def test_mixed_direction_order(self, session):
+        """Test a descending score with ascending id tie-breaker"""
+        expected = [item.id for item in sorted(session.query(Item), key=lambda item: (-item.score, item.id))]
+        assert _walk(session, [(Item.score, True), (Item.id, False)], 4) == expected
+
+    def test_offset_then_cursor(self, session):
+        """Test an offset page hands over to keyset pagination"""
+        rows, cursor = paginate_keyset(session.query(Item), [(Item.id, False)], None, 5, offset=10)
+        assert [row.id for row in rows] == [11, 12, 13, 14, 15]
+        rows, cursor = paginate_keyset(session.query(Item), [(Item.id, False)], cursor, 5)
+        assert [row.id for row in rows] == [16, 17, 18, 19, 20]
+
+    def test_last_page_has_no_cursor(self, session):
+        """Test no cursor is returned once the rows run out"""
+        rows, cursor = paginate_keyset(session.query(Item), [(Item.id, False)], None, 23)
+        assert len(rows) == 23
+        assert cursor is None
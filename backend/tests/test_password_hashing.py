@@ -0,0 +1,51 @@
+import pytest
+from backend.utils.password_hashing import PasswordHasher, PasswordHashingBusy
+
+class TestPasswordHasher:
+    def test_hash_and_check_inline(self):
+        """Test hashing and verification without a pool"""
+        hasher = PasswordHasher(rounds=4, workers=0)
+        password_hash = hasher.hash_password('TestPass123!')
+        assert password_hash.startswith('$2b$04$')
+        assert hasher.check_password(password_hash, 'TestPass123!')
+        assert not hasher.check_password(password_hash, 'WrongPass123!')
+
+    def test_check_without_hash(self):
+        """Test accounts without a password hash never match"""
+        hasher = PasswordHasher(rounds=4, workers=0)
+        assert not hasher.check_password(None, 'TestPass123!')
+        assert not hasher.check_password('', 'TestPass123!')
+
+    def test_needs_rehash_when_cost_changes(self):
+        """Test hashes made with another cost are flagged for rehashing"""
+        old_hash = PasswordHasher(rounds=4, workers=0).hash_password('TestPass123!')
+        assert not PasswordHasher(rounds=4, workers=0).needs_rehash(old_hash)
+        assert PasswordHasher(rounds=5, workers=0).needs_rehash(old_hash)
+        assert not PasswordHasher(rounds=5, workers=0).needs_rehash('not-a-bcrypt-hash')
+
+    def test_pool_hashing(self):
+        """Test hashing and verification in worker processes"""
+        hasher = PasswordHasher(rounds=4, workers=1)
+        try:
+            password_hash = hasher.hash_password('TestPass123!')
+            assert hasher.check_password(password_hash, 'TestPass123!')
+        finally:
+            hasher.shutdown()
+
+    def test_saturated_pool_rejects_work(self):
+        """Test work is refused once every slot is taken"""
+        hasher = PasswordHasher(rounds=4, workers=1, max_pending=0, retry_after=3)
+        assert hasher._slots.acquire(blocking=False)
+        with pytest.raises(PasswordHashingBusy) as excinfo:
+            hasher.hash_password('TestPass123!')
+        assert excinfo.value.retry_after == 3
+
+    def test_timed_out_hash_keeps_its_slot(self):
+        """Test a hash still running after the caller gave up keeps its slot until it finishes"""
+        hasher = PasswordHasher(rounds=14, workers=1, max_pending=0, timeout=0.01)
+        try:
+            with pytest.raises(PasswordHashingBusy):
+                hasher.hash_password('TestPass123!')
+            assert not hasher._slots.acquire(blocking=False)
+        finally:
+            hasher.shutdown()
@@ -0,0 +1,46 @@
+import pytest
+from backend.utils.rate_limiting import GCRALimit, GCRARateLimiter
+
+class TestGCRARateLimiter:
+    def test_allows_burst_up_to_limit(self, monkeypatch):
+        """Test the whole budget can be spent at once, then calls are refused"""
+        monkeypatch.setattr('backend.utils.rate_limiting.time.monotonic', lambda: 100.0)
+        limiter = GCRARateLimiter()
+        limit = GCRALimit('global', 3, 60)
+        assert [limiter.allow(limit) for _ in range(4)] == [True, True, True, False]
+
+    def test_budget_refills_over_time(self, monkeypatch):
+        """Test one call is regained every period / limit seconds"""
+        now = [100.0]
+        monkeypatch.setattr('backend.utils.rate_limiting.time.monotonic', lambda: now[0])
+        limiter = GCRARateLimiter()
+        limit = GCRALimit('global', 2, 60)
+        assert limiter.allow(limit) and limiter.allow(limit)
+        assert not limiter.allow(limit)
+
+        now[0] += 30
+        assert limiter.allow(limit)
+        assert not limiter.allow(limit)
+
+    def test_keys_are_independent(self, monkeypatch):
+        """Test per-user budgets don't affect each other"""
+        monkeypatch.setattr('backend.utils.rate_limiting.time.monotonic', lambda: 100.0)
+        limiter = GCRARateLimiter()
+        assert limiter.allow(GCRALimit('user:1', 1, 60))
+        assert not limiter.allow(GCRALimit('user:1', 1, 60))
+        assert limiter.allow(GCRALimit('user:2', 1, 60))
+
+    def test_denied_call_charges_nothing(self, monkeypatch):
+        """Test a call refused by one limit isn't charged against the others"""
+        monkeypatch.setattr('backend.utils.rate_limiting.time.monotonic', lambda: 100.0)
+        limiter = GCRARateLimiter()
+        global_limit = GCRALimit('global', 2, 60)
+        assert limiter.allow(global_limit, GCRALimit('user:1', 1, 60))
+        assert not limiter.allow(global_limit, GCRALimit('user:1', 1, 60))
+        assert limiter.allow(global_limit, GCRALimit('user:2', 1, 60))
+        assert not limiter.allow(global_limit, GCRALimit('user:3', 1, 60))
+
+    def test_rejects_empty_budget(self):
+        """Test a zero limit is a configuration error, not a ZeroDivisionError"""
+        with pytest.raises(ValueError, match='positive limit'):
+            GCRALimit('global', 0, 60)
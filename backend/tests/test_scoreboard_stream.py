@@ -0,0 +1,134 @@
+import json
+import pytest
+from flask import Flask
+from backend.models.user import User
+from backend.models.leaderboard import LeaderboardEntry
+from backend.database import db
+from backend.utils.scoreboard_stream import (
+    ScoreboardBroadcaster, ScoreboardSubscriber, TooManySubscribers, ScoreboardUnavailable, init_scoreboard_broadcaster
+)
+from backend.utils.leaderboard_index import InMemoryRankedIndex, RedisRankedIndex
+from backend.utils.scoring_worker import ScoringJob, apply_scoring_jobs
+
+
+def parse_frame(frame):
+    """Split a server-sent event into its event name and JSON data"""
+    fields = dict(line.split(': ', 1) for line in frame.decode('utf-8').splitlines() if line)
+    return fields['event'], json.loads(fields['data'])
+
+
+@pytest.fixture
+def players(db_session):
+    users = [User(username=f'player{i}', email=f'player{i}@test.com', password='TestPass123!') for i in range(4)]
+    db.session.add_all(users)
+    db.session.commit()
+    db.session.add_all([
+        LeaderboardEntry(user_id=user.id, total_score=score)
+        for user, score in zip(users, (400, 300, 200, 100))
+    ])
+    db.session.commit()
+    return users
+
+
+@pytest.fixture
+def broadcaster(app):
+    return ScoreboardBroadcaster(app, top_n=3, interval=0)
+
+
+class TestScoreboardBroadcaster:
+    """Test coalesced top-N publishing to stream clients"""
+
+    def test_snapshot_then_delta(self, broadcaster, players):
+        subscriber = broadcaster.subscribe()
+        assert broadcaster.tick()
+
+        event, data = parse_frame(subscriber.next_frame(0))
+        assert event == 'snapshot'
+        assert [player['user']['username'] for player in data['top_players']] == ['player0', 'player1', 'player2']
+
+        apply_scoring_jobs([ScoringJob(players[3].id, 500)])
+        assert broadcaster.tick()
+
+        event, data = parse_frame(subscriber.next_frame(0))
+        assert event == 'delta'
+        changed = {player['user_id']: player for player in data['changed']}
+        assert changed[players[3].id]['rank'] == 1
+        assert players[0].id in changed
+        assert data['removed'] == [players[2].id]
+
+    def test_unchanged_tick_sends_nothing(self, broadcaster, players):
+        subscriber = broadcaster.subscribe()
+        broadcaster.tick()
+        subscriber.next_frame(0)
+
+        broadcaster.tick()
+        assert subscriber.next_frame(0) is None
+
+    def test_late_subscriber_gets_current_snapshot(self, broadcaster, players):
+        broadcaster.subscribe()
+        broadcaster.tick()
+
+        event, data = parse_frame(broadcaster.subscribe().next_frame(0))
+        assert event == 'snapshot'
+        assert len(data['top_players']) == 3
+
+    def test_query_count_does_not_grow_with_viewers(self, app, players, count_queries):
+        one_viewer = ScoreboardBroadcaster(app, top_n=3, interval=0)
+        one_viewer.subscribe()
+        with count_queries() as single:
+            one_viewer.tick()
+
+        wall = ScoreboardBroadcaster(app, top_n=3, interval=0, max_clients=500)
+        subscribers = [wall.subscribe() for _ in range(500)]
+        with count_queries() as many:
+            wall.tick()
+
+        assert len(many) == len(single)
+        assert subscribers[0].next_frame(0) is subscribers[-1].next_frame(0)
+
+    def test_max_clients(self, app):
+        broadcaster = ScoreboardBroadcaster(app, interval=0, max_clients=1)
+        broadcaster.subscribe()
+        with pytest.raises(TooManySubscribers):
+            broadcaster.subscribe()
+
+    def test_streaming_needs_a_shared_index_with_several_workers(self):
+        bare_app = Flask(__name__)
+        bare_app.config['WEB_CONCURRENCY'] = 4
+        bare_app.extensions['leaderboard_index'] = InMemoryRankedIndex()
+        broadcaster = init_scoreboard_broadcaster(bare_app)
+        assert not broadcaster.available
+        with pytest.raises(ScoreboardUnavailable):
+            broadcaster.subscribe()
+
+        bare_app.extensions['leaderboard_index'] = RedisRankedIndex(redis_client=None)
+        assert init_scoreboard_broadcaster(bare_app).available
+
+        bare_app.config['WEB_CONCURRENCY'] = 1
+        bare_app.extensions['leaderboard_index'] = InMemoryRankedIndex()
+        assert init_scoreboard_broadcaster(bare_app).available
+
+    def test_stream_sends_heartbeats_and_unsubscribes(self, broadcaster):
+        subscriber = broadcaster.subscribe()
+        events = broadcaster.stream(subscriber, heartbeat=0.01)
+
+        assert next(events) == b'retry: 3000\n\n'
+        assert next(events) == b': keep-alive\n\n'
+        events.close()
+        assert broadcaster.subscriber_count == 0
+        assert subscriber.closed
+
+
+class TestScoreboardSubscriber:
+    """Test per-client backpressure"""
+
+    def test_slow_client_is_resynced_with_a_snapshot(self):
+        subscriber = ScoreboardSubscriber(max_pending=2)
+        subscriber.deliver(b'delta-1', b'snapshot-1')
+        for version in range(2, 5):
+            subscriber.deliver(f'delta-{version}'.encode(), f'snapshot-{version}'.encode())
+
+        assert subscriber.resyncs == 1
+        assert subscriber.next_frame(0) == b'snapshot-3'
+        assert subscriber.next_frame(0) == b'delta-4'
+        assert subscriber.next_frame(0) is None
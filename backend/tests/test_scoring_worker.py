@@ -0,0 +1,82 @@
+from flask import Flask
+from backend.utils import scoring_worker
+from backend.utils.scoring_worker import ScoringJob, ThreadScoringQueue, coalesce_jobs
+
+class TestScoringWorker:
+    def test_coalesce_jobs(self):
+        """Test jobs for the same user are summed into one"""
+        jobs = [
+            ScoringJob(user_id=1, score_delta=50, experience_delta=50, challenges_delta=1),
+            ScoringJob(user_id=2, score_delta=10, experience_delta=10, modules_delta=1),
+            ScoringJob(user_id=1, score_delta=20, experience_delta=25, challenges_delta=1)
+        ]
+        assert coalesce_jobs(jobs) == [
+            ScoringJob(1, 70, 75, 0, 2),
+            ScoringJob(2, 10, 10, 1, 0)
+        ]
+
+    def test_thread_queue_applies_jobs_in_batches(self, monkeypatch):
+        """Test the worker thread drains queued jobs in a batch"""
+        batches = []
+        monkeypatch.setattr(scoring_worker, 'commit_scoring_jobs', lambda jobs: batches.append(list(jobs)) or jobs)
+        monkeypatch.setattr(scoring_worker, 'publish_scoring_results', lambda result: None)
+        scoring_queue = ThreadScoringQueue(Flask(__name__), batch_size=10, batch_interval=0.2)
+
+        for user_id in (1, 2, 1):
+            scoring_queue.submit(ScoringJob(user_id=user_id, score_delta=5))
+        scoring_queue.shutdown(timeout=5)
+
+        assert sum(len(batch) for batch in batches) == 3
+        assert len(batches) == 1
+
+    def test_thread_queue_retries_failed_batch(self, monkeypatch):
+        """Test a failing batch is retried before giving up"""
+        attempts = []
+
+        def flaky_commit(jobs):
+            attempts.append(jobs)
+            if len(attempts) == 1:
+                raise RuntimeError('database unavailable')
+            return jobs
+
+        monkeypatch.setattr(scoring_worker, 'commit_scoring_jobs', flaky_commit)
+        monkeypatch.setattr(scoring_worker, 'publish_scoring_results', lambda result: None)
+        monkeypatch.setattr(scoring_worker.time, 'sleep', lambda seconds: None)
+        scoring_queue = ThreadScoringQueue(Flask(__name__), batch_size=10, batch_interval=0)
+
+        scoring_queue.submit(ScoringJob(user_id=1, score_delta=5))
+        scoring_queue.shutdown(timeout=5)
+
+        assert len(attempts) == 2
+
+    def test_committed_batch_is_not_retried(self, monkeypatch):
+        """Test a failure after the commit does not apply the batch again"""
+        commits = []
+        monkeypatch.setattr(scoring_worker, 'commit_scoring_jobs', lambda jobs: commits.append(jobs) or jobs)
+
+        def failing_publish(result):
+            raise RuntimeError('index unavailable')
+
+        monkeypatch.setattr(scoring_worker, 'publish_scoring_results', failing_publish)
+        monkeypatch.setattr(scoring_worker.time, 'sleep', lambda seconds: None)
+        scoring_queue = ThreadScoringQueue(Flask(__name__), batch_size=10, batch_interval=0)
+
+        scoring_queue.submit(ScoringJob(user_id=1, score_delta=5))
+        scoring_queue.shutdown(timeout=5)
+
+        assert len(commits) == 1
+
+    def test_failed_batch_is_dead_lettered(self, monkeypatch):
+        """Test a batch that never commits is kept instead of dropped"""
+        def failing_commit(jobs):
+            raise RuntimeError('database unavailable')
+
+        monkeypatch.setattr(scoring_worker, 'commit_scoring_jobs', failing_commit)
+        monkeypatch.setattr(scoring_worker.time, 'sleep', lambda seconds: None)
+        scoring_queue = ThreadScoringQueue(Flask(__name__), batch_size=10, batch_interval=0)
+
+        job = ScoringJob(user_id=1, score_delta=5)
+        scoring_queue.submit(job)
+        scoring_queue.shutdown(timeout=5)
+
+        assert list(scoring_queue.dead_letters) == [job]
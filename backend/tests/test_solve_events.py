@@ -0,0 +1,96 @@
+import pytest
+from backend.models.user import User, db
+from backend.models.module import Module
+from backend.models.challenge import Challenge, Flag
+from backend.models.progress import UserProgress
+from backend.models.leaderboard import LeaderboardEntry
+from backend.models.events import SolveEvent, AttemptEvent, AppendOnlyError
+from backend.utils.event_projections import solve_totals, leaderboard_totals, backfill_solve_events
+
+@pytest.fixture
+def challenge(db_session):
+    """Create a module with one challenge and its flag"""
+    module = Module(title='Cryptography Basics', description='Learn encryption fundamentals',
+                    category='Cryptography', points=20)
+    db.session.add(module)
+    db.session.commit()
+
+    challenge = Challenge(title='Caesar Cipher', description='Decrypt the message',
+                          category='Cryptography', points=50, module_id=module.id)
+    db.session.add(challenge)
+    db.session.commit()
+
+    db.session.add(Flag(flag_value='flag{caesar}', points=40, challenge_id=challenge.id))
+    db.session.commit()
+    return challenge
+
+def _add_user(name):
+    user = User(username=name, email=f'{name}@test.com')
+    user.password_hash = 'x'
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+class TestSolveEventLog:
+    def test_submissions_are_logged(self, client, auth_headers, challenge):
+        """Test every submission logs an attempt and only the first solve logs a solve"""
+        url = f'/api/challenges/{challenge.id}/submit'
+        client.post(url, json={'flag': 'flag{wrong}'}, headers=auth_headers)
+        client.post(url, json={'flag': 'flag{caesar}'}, headers=auth_headers)
+        client.post(url, json={'flag': 'flag{caesar}'}, headers=auth_headers)
+
+        attempts = AttemptEvent.query.filter_by(challenge_id=challenge.id).order_by(AttemptEvent.id).all()
+        assert [attempt.correct for attempt in attempts] == [False, True, True]
+
+        solves = SolveEvent.query.filter_by(challenge_id=challenge.id).all()
+        assert len(solves) == 1
+        assert (solves[0].score, solves[0].experience) == (50, 40)
+
+    def test_events_are_append_only(self, app, db_session):
+        """Test logged events cannot be changed or deleted through the ORM"""
+        user = _add_user('appender')
+        solve = SolveEvent(user_id=user.id, score=10)
+        db.session.add(solve)
+        db.session.commit()
+
+        solve.score = 1000
+        with pytest.raises(AppendOnlyError):
+            db.session.commit()
+        db.session.rollback()
+
+        db.session.delete(solve)
+        with pytest.raises(AppendOnlyError):
+            db.session.commit()
+        db.session.rollback()
+
+class TestEventProjections:
+    def test_solve_totals(self, app, db_session, challenge):
+        """Test totals are summed per user and the checkpoint advances"""
+        alice, bob = _add_user('alice'), _add_user('bob')
+        db.session.add_all([
+            SolveEvent(user_id=alice.id, module_id=challenge.module_id, score=20, experience=20),
+            SolveEvent(user_id=alice.id, challenge_id=challenge.id, score=50, experience=40),
+            SolveEvent(user_id=bob.id, challenge_id=challenge.id, score=50, experience=40)
+        ])
+        db.session.commit()
+
+        jobs, last_id = solve_totals()
+        totals = {job.user_id: job for job in jobs}
+        assert totals[alice.id][1:] == (70, 60, 1, 1)
+        assert totals[bob.id][1:] == (50, 40, 0, 1)
+
+        assert solve_totals(since_id=last_id) == ([], last_id)
+
+    def test_backfill_from_progress(self, app, db_session, challenge):
+        """Test completed progress is backfilled once and reconciles with the leaderboard"""
+        user = _add_user('veteran')
+        db.session.add_all([
+            UserProgress(user_id=user.id, module_id=challenge.module_id, completed=True, score=20),
+            UserProgress(user_id=user.id, challenge_id=challenge.id, completed=True, score=40),
+            LeaderboardEntry(user_id=user.id, total_score=70, modules_completed=1, challenges_completed=1)
+        ])
+        db.session.commit()
+
+        assert backfill_solve_events() == 2
+        assert backfill_solve_events() == 0
+        assert LeaderboardEntry.reconcile(expected=leaderboard_totals()) == []
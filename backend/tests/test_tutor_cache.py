@@ -0,0 +1,57 @@
+from backend.utils.tutor_cache import TutorResponseCache, normalize_prompt, prompt_vector, cosine_similarity
+
+class TestTutorResponseCache:
+    def test_normalize_prompt(self):
+        """Test case, whitespace and trailing punctuation are ignored"""
+        assert normalize_prompt('  What is a   Caesar cipher?? ') == 'what is a caesar cipher'
+
+    def test_exact_hit(self):
+        """Test repeat questions are answered from the cache"""
+        cache = TutorResponseCache(max_entries=10, ttl=60)
+        cache.set('What is a Caesar cipher?', 'gpt', 'A shift cipher.')
+        assert cache.get('what is a caesar cipher', 'gpt') == 'A shift cipher.'
+        assert cache.get('What is a Caesar cipher?', 'other-model') is None
+        assert cache.stats()['exact_hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_similar_hit(self):
+        """Test rephrased questions reuse an answer above the threshold"""
+        cache = TutorResponseCache(max_entries=10, ttl=60, similarity_threshold=0.6)
+        cache.set('What is a Caesar cipher?', 'gpt', 'A shift cipher.')
+        assert cache.get('Can you explain what a Caesar cipher is?', 'gpt') == 'A shift cipher.'
+        assert cache.get('How does SQL injection work?', 'gpt') is None
+        stats = cache.stats()
+        assert stats['similar_hits'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_similarity_disabled_by_default(self):
+        """Test only exact matches are used without a threshold"""
+        cache = TutorResponseCache(max_entries=10, ttl=60)
+        cache.set('What is a Caesar cipher?', 'gpt', 'A shift cipher.')
+        assert cache.get('Can you explain what a Caesar cipher is?', 'gpt') is None
+
+    def test_lru_eviction(self):
+        """Test the least recently used answer is evicted when full"""
+        cache = TutorResponseCache(max_entries=2, ttl=60)
+        cache.set('one', 'gpt', '1')
+        cache.set('two', 'gpt', '2')
+        cache.get('one', 'gpt')
+        cache.set('three', 'gpt', '3')
+        assert cache.get('two', 'gpt') is None
+        assert cache.get('one', 'gpt') == '1'
+        assert cache.stats()['evictions'] == 1
+
+    def test_expired_answers(self, monkeypatch):
+        """Test answers expire after the TTL"""
+        now = [100.0]
+        monkeypatch.setattr('backend.utils.tutor_cache.time.monotonic', lambda: now[0])
+        cache = TutorResponseCache(max_entries=10, ttl=10)
+        cache.set('one', 'gpt', '1')
+        now[0] += 11
+        assert cache.get('one', 'gpt') is None
+
+    def test_prompt_vector_similarity(self):
+        """Test identical prompts have similarity 1 and unrelated ones less"""
+        a = prompt_vector('what is a caesar cipher')
+        assert round(cosine_similarity(a, a), 6) == 1
+        assert cosine_similarity(a, prompt_vector('explain rsa keys')) < 0.5
@@ -0,0 +1,44 @@
+from flask_jwt_extended import create_access_token
+from backend.utils.user_loader import UserSnapshotCache
+
+class TestUserSnapshotCache:
+    def test_disabled_by_default(self):
+        """Test a zero TTL disables the cross-request cache"""
+        assert not UserSnapshotCache().enabled
+        assert UserSnapshotCache(ttl=30).enabled
+
+    def test_get_and_invalidate(self):
+        """Test snapshots are returned until invalidated"""
+        cache = UserSnapshotCache(ttl=30)
+        cache.set(1, {'id': 1, 'username': 'alice'})
+        cache.set(2, {'id': 2, 'username': 'bob'})
+        assert cache.get(1) == {'id': 1, 'username': 'alice'}
+
+        cache.invalidate(1)
+        assert cache.get(1) is None
+        assert cache.get(2) == {'id': 2, 'username': 'bob'}
+
+        cache.invalidate()
+        assert cache.get(2) is None
+
+    def test_snapshots_expire(self, monkeypatch):
+        """Test snapshots expire after the TTL"""
+        now = [500.0]
+        monkeypatch.setattr('backend.utils.user_loader.time.monotonic', lambda: now[0])
+        cache = UserSnapshotCache(ttl=5)
+        cache.set(1, {'id': 1})
+
+        now[0] += 4
+        assert cache.get(1) == {'id': 1}
+        now[0] += 2
+        assert cache.get(1) is None
+
+
+class TestUserLookup:
+    def test_token_for_missing_user_is_unauthorized(self, app, client, db_session):
+        """Test a valid token whose user no longer exists is rejected with 401"""
+        with app.app_context():
+            token = create_access_token(identity='999999')
+        response = client.get('/api/auth/me', headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 401
+        assert response.get_json() == {'error': 'User not found'}
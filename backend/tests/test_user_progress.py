@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from backend.models.user import User, db
+from backend.models.module import Module
+from backend.models.progress import UserProgress
+
+@pytest.fixture
+def learner(db_session):
+    """Create a user and a module"""
+    user = User(username='learner', email='learner@test.com')
+    user.password_hash = 'x'
+    module = Module(title='Hashing', description='Hash functions', category='Cryptography')
+    db.session.add_all([user, module])
+    db.session.commit()
+    return user, module
+
+class TestUserProgressUniqueness:
+    def test_duplicate_rows_are_rejected(self, app, learner):
+        """Test the unique index stops a second progress row for the same item"""
+        user, module = learner
+        db.session.add(UserProgress(user_id=user.id, module_id=module.id))
+        db.session.commit()
+
+        db.session.add(UserProgress(user_id=user.id, module_id=module.id))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+    def test_get_or_create_reuses_row(self, app, learner):
+        """Test get_or_create returns the existing row on later calls"""
+        user, module = learner
+        first = UserProgress.get_or_create(user.id, module_id=module.id)
+        db.session.commit()
+        assert UserProgress.get_or_create(user.id, module_id=module.id).id == first.id
+
+    def test_get_or_create_loses_race(self, app, learner, monkeypatch):
+        """Test a concurrent first insert is picked up instead of failing"""
+        user, module = learner
+        db.session.add(UserProgress(user_id=user.id, module_id=module.id, attempts=3))
+        db.session.commit()
+
+        # Pretend the row didn't exist yet when this request looked for it
+        original_first = type(UserProgress.query).first
+        lookups = []
+
+        def stale_first(query):
+            lookups.append(query)
+            return None if len(lookups) == 1 else original_first(query)
+
+        monkeypatch.setattr(type(UserProgress.query), 'first', stale_first)
+        progress = UserProgress.get_or_create(user.id, module_id=module.id)
+
+        assert progress.attempts == 3
+        assert UserProgress.query.filter_by(user_id=user.id, module_id=module.id).count() == 1
+
+class TestUserProgressCompletion:
+    def test_claim_completion_once(self, app, learner):
+        """Test only the first claim on a progress row succeeds"""
+        user, module = learner
+        progress = UserProgress.get_or_create(user.id, module_id=module.id)
+
+        assert progress.claim_completion(score=10)
+        assert progress.completed and progress.score == 10
+        assert not progress.claim_completion(score=10)
+        db.session.commit()
+
+    def test_claim_completion_loses_race(self, app, learner):
+        """Test a request that read completed=False still loses to a concurrent completion"""
+        user, module = learner
+        progress = UserProgress.get_or_create(user.id, module_id=module.id)
+        db.session.commit()
+        assert not progress.completed
+
+        # Another request completes the row after this one loaded it
+        db.session.execute(
+            UserProgress.__table__.update().where(UserProgress.id == progress.id).values(completed=True, score=7)
+        )
+
+        assert not progress.claim_completion(score=10)
+        assert progress.completed and progress.score == 7
+        db.session.commit()
@@ -0,0 +1,164 @@
+"""
+Read-through cache for the module and challenge catalog
+
+Catalog content changes only through the admin routes, so serialized
+listings, details and filter values are cached under a catalog version.
+Admin writes bump the version, which makes every older entry unreachable
+at once. Entries live in a per-process LRU and, optionally, in Redis.
+Whenever Redis is reachable the version counter lives there, so an admin
+change made through one worker is seen by every other worker within
+``version_check_interval`` seconds instead of after the entry TTL.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from utils.rate_limiting import get_shared_redis_client
+
+_MISSING = object()
+
+
+class CatalogCache:
+    """Versioned two-tier (local LRU + optional Redis) cache of JSON-able values"""
+
+    def __init__(self, max_entries=1024, ttl=300, redis_client=None, share_entries=True,
+                 key_prefix='cipherquest:catalog', version_check_interval=1.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis = redis_client
+        # Without it Redis only holds the version counter
+        self.share_entries = share_entries and redis_client is not None
+        self.key_prefix = key_prefix
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self._version_checked_at = None
+
+    @property
+    def enabled(self):
+        return bool(self.ttl) and self.max_entries > 0
+
+    @property
+    def _version_key(self):
+        return f'{self.key_prefix}:version'
+
+    def version(self):
+        """Current catalog version, shared through Redis when available"""
+        if self.redis is None:
+            return self._version
+
+        now = time.monotonic()
+        if self._version_checked_at is None or now - self._version_checked_at >= self.version_check_interval:
+            try:
+                self._version = int(self.redis.get(self._version_key) or 0)
+                self._version_checked_at = now
+            except Exception:
+                current_app.logger.warning("Catalog cache could not read version from Redis")
+        return self._version
+
+    def _make_key(self, namespace, params):
+        encoded = json.dumps(params or {}, sort_keys=True, separators=(',', ':'))
+        return f'{self.key_prefix}:v{self.version()}:{namespace}:{encoded}'
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, namespace, params, build):
+        """
+        Return the cached value for (namespace, params), building it on a miss
+
+        Args:
+            namespace (str): Kind of catalog value, e.g. 'modules:list'
+            params (dict): Filter/pagination parameters identifying the value
+            build (callable): Produces the JSON-serializable value on a miss
+        """
+        if not self.enabled:
+            return build()
+
+        key = self._make_key(namespace, params)
+        value = self._get_local(key)
+        if value is not _MISSING:
+            return value
+
+        if self.share_entries:
+            try:
+                cached = self.redis.get(key)
+                if cached is not None:
+                    value = json.loads(cached)
+                    self._set_local(key, value)
+                    return value
+            except Exception:
+                current_app.logger.warning("Catalog cache could not read from Redis")
+
+        value = build()
+        self._set_local(key, value)
+
+        if self.share_entries:
+            try:
+                self.redis.setex(key, self.ttl, json.dumps(value))
+            except Exception:
+                current_app.logger.warning("Catalog cache could not write to Redis")
+
+        return value
+
+    def invalidate(self):
+        """Bump the catalog version so every cached entry is bypassed"""
+        with self._lock:
+            self._entries.clear()
+            self._version += 1
+
+        if self.redis is not None:
+            try:
+                self._version = int(self.redis.incr(self._version_key))
+                self._version_checked_at = time.monotonic()
+            except Exception:
+                current_app.logger.warning("Catalog cache could not bump version in Redis")
+
+
+def init_catalog_cache(app):
+    """Create the catalog cache and attach it to the app"""
+    ttl = app.config.get('CATALOG_CACHE_TTL', 300)
+    cache = CatalogCache(
+        max_entries=app.config.get('CATALOG_CACHE_SIZE', 1024),
+        ttl=ttl,
+        # The version is always shared when Redis is reachable; the entries only on request
+        redis_client=get_shared_redis_client(app) if ttl else None,
+        share_entries=app.config.get('CATALOG_CACHE_REDIS', False),
+        version_check_interval=app.config.get('CATALOG_CACHE_VERSION_CHECK', 1.0)
+    )
+    app.extensions['catalog_cache'] = cache
+    return cache
+
+
+def get_catalog_cache():
+    """Get the app's catalog cache"""
+    cache = current_app.extensions.get('catalog_cache')
+    if cache is None:
+        cache = init_catalog_cache(current_app)
+    return cache
+
+
+def invalidate_catalog():
+    """Invalidate every cached catalog entry after an admin change"""
+    get_catalog_cache().invalidate()
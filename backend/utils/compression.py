@@ -0,0 +1,228 @@
+"""
+Response compression
+
+JSON, CSV and text responses are compressed when the client accepts it:
+brotli if the ``brotli`` package is installed and the client prefers it
+at least as much as gzip, otherwise gzip. Bodies smaller than
+``COMPRESSION_MIN_SIZE`` are sent as they are; they gain too little to be
+worth the CPU. Streamed responses are compressed chunk by chunk, flushing
+after each chunk so the client receives it as soon as it is produced.
+
+Responses with a strong ETag (the catalog and leaderboard, see
+utils/conditional.py) name their content exactly, so their compressed
+bytes are kept in a per-worker LRU keyed by ETag and encoding: a large
+module payload is compressed once per catalog version rather than on
+every request. Compressed responses carry the weak form of that ETag,
+which conditional requests still match.
+"""
+
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class GzipEncoder:
+    """gzip for whole bodies and streams"""
+
+    name = 'gzip'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        # A fixed mtime keeps the output identical for identical bodies
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def stream(self, chunks):
+        # wbits=31 writes the gzip header and trailer
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class BrotliEncoder:
+    """Brotli for whole bodies and streams"""
+
+    name = 'br'
+
+    def __init__(self, quality=4):
+        self.quality = quality
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self, chunks):
+        compressor = brotli.Compressor(quality=self.quality)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+class CompressedBodyCache:
+    """Per-worker LRU of compressed bodies keyed by (ETag, encoding), bounded by size"""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get_or_compress(self, etag, encoder, data):
+        """Cached compressed bytes for ``etag``, compressing ``data`` on a miss"""
+        if not self.enabled:
+            return encoder.compress(data)
+
+        key = (etag, encoder.name)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        # Compress outside the lock; a concurrent miss just does the work twice
+        compressed = encoder.compress(data)
+        if len(compressed) > self.max_bytes:
+            return compressed
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = compressed
+            self._size += len(compressed)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+        return compressed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Hit-rate metrics"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class ResponseCompressor:
+    """Negotiates an encoding and compresses eligible responses"""
+
+    def __init__(self, min_size=500, mimetypes=('application/json',), gzip_level=6,
+                 brotli_quality=4, cache=None):
+        self.min_size = min_size
+        self.mimetypes = frozenset(mimetypes)
+        self.cache = cache if cache is not None else CompressedBodyCache(0)
+        # In order of preference when the client accepts several equally
+        self.encoders = OrderedDict()
+        if brotli is not None:
+            self.encoders['br'] = BrotliEncoder(brotli_quality)
+        self.encoders['gzip'] = GzipEncoder(gzip_level)
+
+    def select_encoder(self, accept_encodings):
+        """The preferred encoder the client accepts, or None"""
+        return self.encoders.get(accept_encodings.best_match(list(self.encoders)))
+
+    def _compressible(self, response):
+        return (
+            200 <= response.status_code < 300
+            and response.status_code != 204
+            and not response.direct_passthrough
+            and 'Content-Encoding' not in response.headers
+            and response.mimetype in self.mimetypes
+            and not response.cache_control.no_transform
+        )
+
+    @staticmethod
+    def _stream(body, chunks, encoder):
+        try:
+            yield from encoder.stream(chunks)
+        finally:
+            close = getattr(body, 'close', None)
+            if close is not None:
+                close()
+
+    def compress(self, response):
+        """Compress ``response`` in place if the client and the response allow it"""
+        if not self._compressible(response):
+            return response
+
+        # The representation depends on Accept-Encoding even when sent as is
+        response.vary.add('Accept-Encoding')
+        encoder = self.select_encoder(request.accept_encodings)
+        if encoder is None:
+            return response
+
+        etag, weak = response.get_etag()
+        if response.is_streamed:
+            response.response = self._stream(response.response, response.iter_encoded(), encoder)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            if etag and not weak:
+                response.set_data(self.cache.get_or_compress(etag, encoder, data))
+            else:
+                response.set_data(encoder.compress(data))
+
+        response.headers['Content-Encoding'] = encoder.name
+        if etag and not weak:
+            # Same content, different bytes: the strong validator no longer applies
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def init_compression(app):
+    """Create the response compressor and register it as the outermost after_request hook"""
+    compressor = ResponseCompressor(
+        min_size=app.config.get('COMPRESSION_MIN_SIZE', 500),
+        mimetypes=app.config.get('COMPRESSION_MIMETYPES', ('application/json',)),
+        gzip_level=app.config.get('COMPRESSION_GZIP_LEVEL', 6),
+        brotli_quality=app.config.get('COMPRESSION_BROTLI_QUALITY', 4),
+        cache=CompressedBodyCache(app.config.get('COMPRESSION_CACHE_BYTES', 16 * 1024 * 1024))
+    )
+    app.extensions['response_compressor'] = compressor
+
+    if app.config.get('COMPRESSION_ENABLED', True):
+        # after_request hooks run in reverse order, so hooks registered
+        # later still see the uncompressed response
+        app.after_request(compressor.compress)
+    return compressor
+
+
+def get_response_compressor():
+    """Get the app's response compressor (hooks cannot be registered lazily)"""
+    return current_app.extensions['response_compressor']
@@ -0,0 +1,116 @@
+"""
+HTTP conditional requests
+
+Catalog and scoreboard screens poll the same URLs over and over, and most
+polls get back exactly what they already have. Routes compute a strong
+ETag from cheap validators - a stamp of the catalog tables, the user's
+progress, the ranked index page - before loading rows or serializing
+anything, and answer a matching ``If-None-Match`` with ``304 Not Modified``.
+
+Validators describe content rather than a per-worker counter, so every
+worker computes the same ETag for the same representation. No
+Last-Modified is sent: deleting a row or shifting a page's membership
+changes these responses without moving any timestamp forward, so dates
+would produce stale 304s.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import func, select
+
+from utils.catalog_cache import get_catalog_cache
+
+
+def make_etag(*parts):
+    """Strong ETag for JSON-able validator values"""
+    payload = json.dumps(parts, default=str, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def request_params():
+    """The query parameters in a canonical order, as part of an ETag"""
+    return sorted(request.args.items(multi=True))
+
+
+def add_validators(response, etag):
+    """Set the ETag and require revalidation on every use"""
+    response.set_etag(etag)
+    # Responses are per user: private caches may keep them but must ask first
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag):
+    """
+    A 304 response if the client already holds this representation
+
+    Returns:
+        Response or None: None when the full response must be sent
+    """
+    if not request.if_none_match or not request.if_none_match.contains_weak(etag):
+        return None
+    return add_validators(current_app.response_class(status=304), etag)
+
+
+def catalog_stamp():
+    """
+    Validator for the module and challenge catalog
+
+    Row counts and the latest update of modules, challenges and flags,
+    cached with the catalog so it is recomputed only after admin changes.
+
+    Returns:
+        list: validator values
+    """
+    from database import db
+    from models.module import Module
+    from models.challenge import Challenge, Flag
+
+    def build():
+        row = db.session.execute(select(
+            select(func.count(Module.id)).scalar_subquery(),
+            select(func.max(Module.updated_at)).scalar_subquery(),
+            select(func.count(Challenge.id)).scalar_subquery(),
+            select(func.max(Challenge.updated_at)).scalar_subquery(),
+            select(func.count(Flag.id)).scalar_subquery()
+        )).one()
+        # Cached values must stay JSON-able
+        return [value.isoformat() if isinstance(value, datetime) else value for value in row]
+
+    return get_catalog_cache().get_or_set('catalog:stamp', None, build)
+
+
+def catalog_validators(namespace, user_id=None):
+    """
+    ETag for a catalog response
+
+    Pass ``user_id`` when the response includes that user's progress.
+    """
+    from models.progress import UserProgress
+
+    progress = None
+    if user_id is not None:
+        count, updated_at = UserProgress.get_user_stamp(user_id)
+        progress = [user_id, count, updated_at]
+
+    return make_etag(namespace, request_params(), catalog_stamp(), progress)
+
+
+def leaderboard_validators(namespace, ranked_players, *parts):
+    """
+    ETag for a page of ranked players
+
+    The ranked (user_id, score) pairs come from the index for free; the
+    latest entry and profile updates among those players cover the
+    remaining fields of the page.
+    """
+    from models.leaderboard import LeaderboardEntry
+
+    entries_updated, users_updated = LeaderboardEntry.get_page_stamp(
+        [user_id for user_id, _ in ranked_players]
+    )
+    return make_etag(namespace, request_params(), list(ranked_players), parts, entries_updated, users_updated)
@@ -0,0 +1,171 @@
+"""
+Database connection pool configuration and metrics
+
+Every gunicorn worker process gets its own SQLAlchemy pool, so the pool is
+sized from the connection budget the MySQL server allows
+(``DB_MAX_CONNECTIONS``) divided by the worker count (``WEB_CONCURRENCY``,
+which gunicorn also reads). Connections are pinged before use and recycled
+before MySQL or a proxy drops them as idle, which is what produced the
+"MySQL server has gone away" stalls.
+
+The pool records checkouts, time spent waiting for a connection, timeouts
+and invalidated connections; the admin API serves them together with the
+live pool size, checked-out and overflow counts summed over the
+primary and replica engines.
+"""
+
+import os
+import threading
+import time
+import weakref
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Counters for one app's connection pool"""
+
+    def __init__(self, slow_checkout=0.1):
+        # Checkouts waiting longer than this many seconds are counted as slow
+        self.slow_checkout = slow_checkout
+        self._lock = threading.Lock()
+        self._pools = weakref.WeakSet()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connects = 0
+        self.invalidations = 0
+
+    def track(self, pool):
+        # One pool per engine (primary and any replicas)
+        self._pools.add(pool)
+
+    def record_checkout(self, waited):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if waited >= self.slow_checkout:
+                self.slow_checkouts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self):
+        """Counters plus the live state of the tracked pools"""
+        pools = [pool for pool in list(self._pools) if isinstance(pool, QueuePool)]
+        with self._lock:
+            stats = {
+                'checkouts': self.checkouts,
+                'slow_checkouts': self.slow_checkouts,
+                'timeouts': self.timeouts,
+                'average_wait_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.wait_max * 1000, 3),
+                'connects': self.connects,
+                'invalidations': self.invalidations
+            }
+        if pools:
+            stats.update({
+                'pool_size': sum(pool.size() for pool in pools),
+                'checked_out': sum(pool.checkedout() for pool in pools),
+                'checked_in': sum(pool.checkedin() for pool in pools),
+                'overflow': sum(max(pool.overflow(), 0) for pool in pools)
+            })
+        return stats
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that reports checkout waits to a PoolMetrics"""
+
+    metrics = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # recreate() builds a new instance of the same class after a dispose
+        self.metrics.track(self)
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+
+def metered_pool_class(metrics):
+    """A MeteredQueuePool subclass bound to ``metrics``"""
+    pool_class = type('MeteredQueuePool', (MeteredQueuePool,), {'metrics': metrics})
+    event.listen(pool_class, 'connect', lambda dbapi_connection, record: metrics.record_connect())
+    event.listen(pool_class, 'invalidate', lambda dbapi_connection, record, exception: metrics.record_invalidation())
+    return pool_class
+
+
+def pool_sizing(max_connections, workers, max_overflow):
+    """
+    Split the server's connection budget between worker processes
+
+    Returns:
+        tuple: (pool_size, max_overflow) for each worker
+    """
+    per_worker = max(max_connections // max(workers, 1), 2)
+    overflow = min(max_overflow, per_worker // 2)
+    return per_worker - overflow, overflow
+
+
+def init_db_pool(app):
+    """
+    Set pooling engine options from the app config
+
+    Must run before the SQLAlchemy extension creates its engine. Options
+    already present in ``SQLALCHEMY_ENGINE_OPTIONS`` win. SQLite (tests)
+    keeps SQLAlchemy's own pool.
+    """
+    metrics = PoolMetrics(slow_checkout=app.config.get('DB_POOL_SLOW_CHECKOUT', 0.1))
+    app.extensions['db_pool_metrics'] = metrics
+
+    if app.config.get('SQLALCHEMY_DATABASE_URI', '').startswith('sqlite'):
+        return metrics
+
+    workers = app.config.get('WEB_CONCURRENCY') or int(os.environ.get('WEB_CONCURRENCY', 1))
+    pool_size, max_overflow = pool_sizing(
+        app.config.get('DB_MAX_CONNECTIONS', 100),
+        workers,
+        app.config.get('DB_MAX_OVERFLOW', 10)
+    )
+    if app.config.get('DB_POOL_SIZE'):
+        pool_size = app.config['DB_POOL_SIZE']
+
+    options = {
+        'poolclass': metered_pool_class(metrics),
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': app.config.get('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': app.config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': app.config.get('DB_POOL_PRE_PING', True)
+    }
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    return metrics
+
+
+def get_db_pool_stats():
+    """Current pool metrics for the app"""
+    metrics = current_app.extensions.get('db_pool_metrics')
+    return metrics.snapshot() if metrics is not None else {}
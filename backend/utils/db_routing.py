@@ -0,0 +1,156 @@
+"""
+Read-replica routing
+
+Most traffic is GETs on the leaderboard, catalog and profile endpoints, so
+read-only requests can be served by MySQL replicas while everything else
+goes to the primary. Replicas are configured as extra binds
+(``DB_REPLICA_URIS``) and ``RoutingSession`` picks the engine per
+statement:
+
+* writes, flushes and anything outside a request use the primary
+* ``GET``/``HEAD``/``OPTIONS`` requests read from one replica, chosen per
+  request
+* a user who just wrote something (e.g. submitted a solve) stays on the
+  primary for ``DB_REPLICA_STICKY_SECONDS`` so they read their own writes
+  despite replication lag
+
+Stickiness is tracked per worker, or in Redis so that every worker sees it
+(``DB_REPLICA_STICKINESS_BACKEND``).
+"""
+
+import random
+import threading
+import time
+
+from flask import current_app, g, has_app_context, request
+from flask_jwt_extended import decode_token
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from utils.rate_limiting import get_shared_redis_client
+
+SAFE_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+
+class RoutingSession(Session):
+    """Session that sends reads in read-only requests to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase):
+            replica_key = g.get('db_replica') if has_app_context() else None
+            if replica_key is not None and replica_key in self._db.engines:
+                return self._db.engines[replica_key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class StickinessTracker:
+    """Remembers users who must read from the primary for a while"""
+
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_id] = now + self.ttl
+            # Drop expired entries now and then so the map stays small
+            if len(self._until) > 10000:
+                self._until = {key: until for key, until in self._until.items() if until > now}
+
+    def is_sticky(self, user_id):
+        until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+
+class RedisStickinessTracker(StickinessTracker):
+    """Stickiness shared by all workers through Redis keys that expire"""
+
+    def __init__(self, redis_client, ttl=5, key_prefix='cipherquest:primary:'):
+        super().__init__(ttl)
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+
+    def mark(self, user_id):
+        try:
+            self.redis.set(f'{self.key_prefix}{user_id}', 1, px=int(self.ttl * 1000))
+        except Exception:
+            current_app.logger.warning("Could not record replica stickiness in Redis")
+        # Always remember locally so at least this worker stays consistent
+        super().mark(user_id)
+
+    def is_sticky(self, user_id):
+        if super().is_sticky(user_id):
+            return True
+        try:
+            return bool(self.redis.exists(f'{self.key_prefix}{user_id}'))
+        except Exception:
+            # Fail towards the primary rather than serving stale reads
+            return True
+
+
+def replica_binds(uris):
+    """Bind keys for replica URIs, in the shape of SQLALCHEMY_BINDS"""
+    return {f'{REPLICA_BIND_PREFIX}{i}': uri for i, uri in enumerate(uris)}
+
+
+def _request_identity():
+    """User id from the bearer token, without loading the user"""
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        claims = decode_token(header[len('Bearer '):])
+    except Exception:
+        return None
+    return str(claims.get(current_app.config.get('JWT_IDENTITY_CLAIM', 'sub')))
+
+
+def init_db_routing(app):
+    """
+    Register replica binds and the per-request routing hooks
+
+    Must run before the SQLAlchemy extension is initialized so the replica
+    engines are created with the other binds.
+    """
+    uris = [uri for uri in app.config.get('DB_REPLICA_URIS', []) if uri]
+    binds = replica_binds(uris)
+    if not binds:
+        return None
+
+    app.config['SQLALCHEMY_BINDS'] = dict(app.config.get('SQLALCHEMY_BINDS') or {}, **binds)
+
+    ttl = app.config.get('DB_REPLICA_STICKY_SECONDS', 5)
+    tracker = None
+    if app.config.get('DB_REPLICA_STICKINESS_BACKEND', 'memory') == 'redis':
+        redis_client = get_shared_redis_client(app)
+        if redis_client is not None:
+            tracker = RedisStickinessTracker(redis_client, ttl=ttl)
+        else:
+            app.logger.warning("Redis not available for replica stickiness, tracking per worker")
+    if tracker is None:
+        tracker = StickinessTracker(ttl=ttl)
+    app.extensions['db_stickiness'] = tracker
+
+    replica_keys = list(binds)
+
+    @app.before_request
+    def route_reads_to_replica():
+        g.db_identity = _request_identity()
+        if request.method not in SAFE_METHODS:
+            return
+        if g.db_identity is not None and tracker.is_sticky(g.db_identity):
+            return
+        g.db_replica = random.choice(replica_keys)
+
+    @app.after_request
+    def stick_writers_to_primary(response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            if g.get('db_identity') is not None:
+                tracker.mark(g.db_identity)
+        return response
+
+    return tracker
@@ -0,0 +1,93 @@
+"""
+Projections over the solve event log
+
+``solve_events`` is append-only, so any aggregate derived from it can be
+rebuilt from zero with one GROUP BY instead of walking ``user_progress``.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, select, insert, exists, and_
+
+from models.events import SolveEvent, db
+from utils.scoring_worker import ScoringJob
+
+
+def solve_totals(since_id=None):
+    """
+    Sum solve events per user in a single query
+
+    Returns ``(jobs, last_id)``: one ScoringJob of totals per user, and the
+    highest event id included (to use as the next checkpoint).
+    """
+    query = db.session.query(
+        SolveEvent.user_id,
+        func.coalesce(func.sum(SolveEvent.score), 0),
+        func.coalesce(func.sum(SolveEvent.experience), 0),
+        func.count(SolveEvent.module_id),
+        func.count(SolveEvent.challenge_id),
+        func.max(SolveEvent.id)
+    )
+    if since_id is not None:
+        query = query.filter(SolveEvent.id > since_id)
+
+    jobs = []
+    last_id = since_id
+    for user_id, score, experience, modules, challenges, max_id in query.group_by(SolveEvent.user_id):
+        jobs.append(ScoringJob(user_id, score, experience, modules, challenges))
+        last_id = max_id if last_id is None else max(last_id, max_id)
+    return jobs, last_id
+
+
+def leaderboard_totals():
+    """Expected leaderboard totals per user, for LeaderboardEntry.reconcile()"""
+    jobs, _ = solve_totals()
+    return {
+        job.user_id: {
+            'total_score': job.score_delta,
+            'modules_completed': job.modules_delta,
+            'challenges_completed': job.challenges_delta
+        }
+        for job in jobs
+    }
+
+
+def backfill_solve_events():
+    """
+    Create solve events for completed progress recorded before the log existed
+
+    Runs one INSERT ... SELECT per item type and skips progress that
+    already has an event. Returns the number of events created.
+    """
+    from models.progress import UserProgress
+    from models.module import Module
+    from models.challenge import Challenge
+
+    columns = ['user_id', 'module_id', 'challenge_id', 'score', 'experience', 'created_at']
+    completed_at = func.coalesce(UserProgress.completed_at, datetime.utcnow())
+    created = 0
+
+    for item, item_column, event_column in (
+        (Module, UserProgress.module_id, SolveEvent.module_id),
+        (Challenge, UserProgress.challenge_id, SolveEvent.challenge_id)
+    ):
+        already_logged = exists().where(and_(
+            SolveEvent.user_id == UserProgress.user_id,
+            event_column == item_column
+        ))
+        source = select(
+            UserProgress.user_id,
+            UserProgress.module_id,
+            UserProgress.challenge_id,
+            func.coalesce(item.points, 0),
+            func.coalesce(UserProgress.score, 0),
+            completed_at
+        ).join(item, item.id == item_column).where(
+            UserProgress.completed.is_(True),
+            ~already_logged
+        )
+        result = db.session.execute(insert(SolveEvent).from_select(columns, source))
+        created += result.rowcount or 0
+
+    db.session.commit()
+    return created
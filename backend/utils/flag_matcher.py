@@ -0,0 +1,150 @@
+"""
+Compiled flag matchers
+
+Caches, per challenge, everything needed to check a submission without
+touching the flags table: exact flags in a hash map, pre-compiled regex
+patterns and lowercased ``contains`` needles. Admin routes invalidate a
+challenge's matcher when its flags change. Flag changes also bump the
+catalog version, which is shared through Redis when it is reachable, so
+other workers drop their matchers as soon as they see the new version;
+entries also expire after a TTL as a fallback.
+"""
+
+import re
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+from utils.catalog_cache import get_catalog_cache
+
+FlagMatch = namedtuple('FlagMatch', ['flag_id', 'points'])
+
+
+class CompiledFlagMatcher:
+    """Checks submissions against a challenge's active flags"""
+
+    def __init__(self, flags):
+        # Every lookup table keeps the flag's original position so that the
+        # first matching flag wins, exactly as when flags were checked in order
+        self._exact = {}
+        self._patterns = []
+        self._needles = []
+
+        for order, flag in enumerate(flags):
+            match = FlagMatch(flag.id, flag.points)
+            if flag.flag_type == 'exact':
+                self._exact.setdefault(flag.flag_value.strip(), (order, match))
+            elif flag.flag_type == 'regex':
+                try:
+                    self._patterns.append((order, re.compile(flag.flag_value), match))
+                except re.error:
+                    # Invalid patterns never match
+                    continue
+            elif flag.flag_type == 'contains':
+                self._needles.append((order, flag.flag_value.lower(), match))
+
+    def match(self, submitted_flag):
+        """
+        Find the flag matched by a submission
+
+        Returns:
+            FlagMatch: The first matching flag, or None
+        """
+        stripped = submitted_flag.strip()
+        best = self._exact.get(stripped)
+
+        for order, pattern, match in self._patterns:
+            if best is not None and order > best[0]:
+                break
+            if pattern.match(stripped):
+                best = (order, match)
+                break
+
+        if self._needles:
+            lowered = submitted_flag.lower()
+            for order, needle, match in self._needles:
+                if best is not None and order > best[0]:
+                    break
+                if needle in lowered:
+                    best = (order, match)
+                    break
+
+        return best[1] if best is not None else None
+
+
+class FlagMatcherCache:
+    """Per-process cache of CompiledFlagMatcher objects keyed by challenge id"""
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._matchers = {}
+        self._generation = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, challenge_id, load_flags, version=None):
+        """
+        Get a challenge's matcher, building it from ``load_flags()`` on a miss
+
+        A ``version`` different from the one the cached matchers were built
+        under (flags changed in another worker) drops them all first.
+        """
+        if version is not None and version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._generation += 1
+                    self._matchers.clear()
+                    self._version = version
+
+        entry = self._matchers.get(challenge_id)
+        now = time.monotonic()
+        if entry is not None and (self.ttl is None or now - entry[0] < self.ttl):
+            return entry[1]
+
+        generation = self._generation
+        matcher = CompiledFlagMatcher(load_flags())
+        with self._lock:
+            # Don't store a matcher built from flags that were invalidated meanwhile
+            if generation == self._generation:
+                self._matchers[challenge_id] = (now, matcher)
+        return matcher
+
+    def invalidate(self, challenge_id=None):
+        """Drop one challenge's matcher, or every matcher if no id is given"""
+        with self._lock:
+            self._generation += 1
+            if challenge_id is None:
+                self._matchers.clear()
+            else:
+                self._matchers.pop(challenge_id, None)
+
+
+def init_flag_matcher_cache(app):
+    """Create the flag matcher cache and attach it to the app"""
+    cache = FlagMatcherCache(ttl=app.config.get('FLAG_MATCHER_CACHE_TTL', 60))
+    app.extensions['flag_matcher_cache'] = cache
+    return cache
+
+
+def _get_cache():
+    cache = current_app.extensions.get('flag_matcher_cache')
+    if cache is None:
+        cache = init_flag_matcher_cache(current_app)
+    return cache
+
+
+def get_flag_matcher(challenge_id):
+    """Get the compiled matcher for a challenge's active flags"""
+    from models.challenge import Flag
+
+    def load_flags():
+        return Flag.query.filter_by(challenge_id=challenge_id, is_active=True).order_by(Flag.id).all()
+
+    return _get_cache().get(challenge_id, load_flags, version=get_catalog_cache().version())
+
+
+def invalidate_flag_matcher(challenge_id=None):
+    """Forget cached matchers after flags change"""
+    _get_cache().invalidate(challenge_id)
@@ -0,0 +1,461 @@
+"""
+Ranked leaderboard index
+
+Keeps every player's total score in an order-statistic structure so that
+top-N, rank-of-user, around-me and page lookups run in O(log n) instead of
+sorting and counting ``leaderboard_entries`` on every request.
+
+Two backends are available:
+
+* ``memory`` - an indexable skip list held in the worker process. Each
+  worker keeps its own copy, so it is periodically reloaded from the
+  database to pick up scores written by other workers.
+* ``redis`` - a Redis sorted set shared by all workers, using the same
+  connection settings as the RateLimitManager.
+"""
+
+import random
+import threading
+import time
+import uuid
+from typing import Iterable, List, Optional, Tuple
+
+from flask import current_app
+
+from utils.rate_limiting import get_shared_redis_client
+
+# (user_id, total_score) pairs, ordered best first
+RankedPlayers = List[Tuple[int, int]]
+
+
+class _SkipNode:
+    """Skip list node with per-level forward links and link widths"""
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        self.width = [1] * level
+
+
+class OrderStatisticList:
+    """
+    Sorted container supporting positional access
+
+    An indexable skip list: every forward link records how many bottom-level
+    nodes it skips, which lets insert, remove, rank and index lookups all run
+    in expected O(log n).
+    """
+
+    MAX_LEVEL = 24  # comfortably covers 2**24 entries
+
+    def __init__(self):
+        self._nil = _SkipNode(None, 0)
+        self._head = _SkipNode(None, self.MAX_LEVEL)
+        self._head.next = [self._nil] * self.MAX_LEVEL
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, key):
+        """Insert a key, keeping the list sorted"""
+        chain = [None] * self.MAX_LEVEL
+        steps_at_level = [0] * self.MAX_LEVEL
+        node = self._head
+        steps = 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not self._nil and node.next[level].key < key:
+                steps += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            steps_at_level[level] = steps
+
+        new_node = _SkipNode(key, self._random_level())
+        for level in range(len(new_node.next)):
+            prev = chain[level]
+            skipped = steps - steps_at_level[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - skipped
+            prev.width[level] = skipped + 1
+        for level in range(len(new_node.next), self.MAX_LEVEL):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        """Remove a key, raising KeyError if it is not present"""
+        chain = [None] * self.MAX_LEVEL
+        node = self._head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not self._nil and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is self._nil or target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self.MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def count_less_than(self, key):
+        """Number of stored keys strictly smaller than ``key``"""
+        node = self._head
+        steps = 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not self._nil and node.next[level].key < key:
+                steps += node.width[level]
+                node = node.next[level]
+        return steps
+
+    def slice(self, start, stop):
+        """Keys at positions ``start`` (inclusive) to ``stop`` (exclusive)"""
+        start = max(start, 0)
+        stop = min(stop, self._size)
+        if start >= stop:
+            return []
+
+        # Walk down to the node at position ``start``
+        node = self._head
+        remaining = start + 1
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+
+        keys = []
+        for _ in range(stop - start):
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('OrderStatisticList index out of range')
+        return self.slice(index, index + 1)[0]
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not self._nil:
+            yield node.key
+            node = node.next[0]
+
+
+class RankedIndex:
+    """Interface for leaderboard rank lookups"""
+
+    def needs_reload(self) -> bool:
+        """Whether the index should be rebuilt from the database"""
+        raise NotImplementedError
+
+    def load(self, scores: Iterable[Tuple[int, int]]):
+        """Replace the index contents with (user_id, total_score) pairs"""
+        raise NotImplementedError
+
+    def update(self, user_id: int, score: int):
+        """Insert or move a player to a new total score"""
+        raise NotImplementedError
+
+    def remove(self, user_id: int):
+        """Drop a player from the index"""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Number of ranked players"""
+        raise NotImplementedError
+
+    def score_of(self, user_id: int) -> Optional[int]:
+        """Player's indexed score, or None if unranked"""
+        raise NotImplementedError
+
+    def position_of(self, user_id: int) -> Optional[int]:
+        """Zero-based position in leaderboard order, or None if unranked"""
+        raise NotImplementedError
+
+    def rank_of(self, user_id: int) -> Optional[int]:
+        """Competition rank (1 + players with a strictly higher score)"""
+        raise NotImplementedError
+
+    def page(self, offset: int, limit: int) -> RankedPlayers:
+        """Players at positions ``offset`` to ``offset + limit``"""
+        raise NotImplementedError
+
+    def position_after(self, score: int, user_id: int) -> int:
+        """
+        Position of the first player ordered after a (score, user_id) cursor
+
+        If the cursor's player still has the cursor score this is exact;
+        otherwise the page resumes after every player with a higher score.
+        """
+        if self.score_of(user_id) == score:
+            return self.position_of(user_id) + 1
+        return self.count_above(score)
+
+    def count_above(self, score: int) -> int:
+        """Number of players with a strictly higher score"""
+        raise NotImplementedError
+
+    def top(self, limit: int) -> RankedPlayers:
+        """Best ``limit`` players"""
+        return self.page(0, limit)
+
+    def competition_ranks(self, ranked_players: RankedPlayers, start_position: int = 0) -> List[int]:
+        """
+        Competition ranks for consecutive players starting at ``start_position``
+
+        Tied players share a rank. Only the first player of a page that
+        does not start the leaderboard needs a lookup; every later player
+        either ties the one before or is ranked by its position.
+        """
+        ranks = []
+        previous_score = None
+        for position, (_, score) in enumerate(ranked_players, start=start_position):
+            if ranks and score == previous_score:
+                ranks.append(ranks[-1])
+            elif not ranks and position > 0:
+                ranks.append(self.count_above(score) + 1)
+            else:
+                ranks.append(position + 1)
+            previous_score = score
+        return ranks
+
+    def around(self, user_id: int, range_size: int) -> Tuple[Optional[int], RankedPlayers]:
+        """
+        Players within ``range_size`` positions of a user
+
+        Returns:
+            tuple: (start position of the window, ranked players), or
+            (None, []) if the user is not ranked
+        """
+        position = self.position_of(user_id)
+        if position is None:
+            return None, []
+        start = max(0, position - range_size)
+        return start, self.page(start, position + range_size + 1 - start)
+
+
+class InMemoryRankedIndex(RankedIndex):
+    """Per-process ranked index backed by an OrderStatisticList"""
+
+    def __init__(self, resync_interval=60):
+        # Seconds between reloads from the database; 0 reloads on every
+        # access and None never reloads after the first load
+        self.resync_interval = resync_interval
+        self._lock = threading.RLock()
+        self._scores = {}
+        self._ranking = OrderStatisticList()
+        self._loaded_at = None
+
+    @staticmethod
+    def _key(user_id, score):
+        # Best score first, ties broken by user id
+        return (-score, user_id)
+
+    def needs_reload(self):
+        if self._loaded_at is None:
+            return True
+        if self.resync_interval is None:
+            return False
+        return time.monotonic() - self._loaded_at >= self.resync_interval
+
+    def load(self, scores):
+        ranking = OrderStatisticList()
+        score_map = {}
+        for user_id, score in scores:
+            user_id = int(user_id)
+            score = score or 0
+            score_map[user_id] = score
+            ranking.insert(self._key(user_id, score))
+        with self._lock:
+            self._scores = score_map
+            self._ranking = ranking
+            self._loaded_at = time.monotonic()
+
+    def update(self, user_id, score):
+        user_id = int(user_id)
+        score = score or 0
+        with self._lock:
+            previous = self._scores.get(user_id)
+            if previous == score:
+                return
+            if previous is not None:
+                self._ranking.remove(self._key(user_id, previous))
+            self._ranking.insert(self._key(user_id, score))
+            self._scores[user_id] = score
+
+    def remove(self, user_id):
+        user_id = int(user_id)
+        with self._lock:
+            previous = self._scores.pop(user_id, None)
+            if previous is not None:
+                self._ranking.remove(self._key(user_id, previous))
+
+    def count(self):
+        return len(self._ranking)
+
+    def score_of(self, user_id):
+        return self._scores.get(int(user_id))
+
+    def position_of(self, user_id):
+        user_id = int(user_id)
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                return None
+            return self._ranking.count_less_than(self._key(user_id, score))
+
+    def rank_of(self, user_id):
+        with self._lock:
+            score = self._scores.get(int(user_id))
+            if score is None:
+                return None
+            return self.count_above(score) + 1
+
+    def position_after(self, score, user_id):
+        # Every key up to and including the cursor sorts before (-score, user_id + 1)
+        with self._lock:
+            return self._ranking.count_less_than(self._key(int(user_id) + 1, score))
+
+    def count_above(self, score):
+        # Every key with a higher score sorts before (-score, -inf)
+        with self._lock:
+            return self._ranking.count_less_than((-score, float('-inf')))
+
+    def page(self, offset, limit):
+        with self._lock:
+            keys = self._ranking.slice(offset, offset + limit)
+        return [(user_id, -neg_score) for neg_score, user_id in keys]
+
+
+class RedisRankedIndex(RankedIndex):
+    """
+    Ranked index stored in a Redis sorted set shared by all workers
+
+    Players with equal scores are ordered by Redis' member ordering rather
+    than by user id.
+    """
+
+    LOAD_BATCH_SIZE = 5000
+
+    def __init__(self, redis_client, key='cipherquest:leaderboard', check_interval=5):
+        self.redis = redis_client
+        self.key = key
+        # Seconds between checks that the shared set still exists, so a
+        # flushed or evicted set is rebuilt instead of serving empty boards
+        self.check_interval = check_interval
+        self._checked_at = None
+
+    def needs_reload(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return False
+        # Another worker may already have populated the shared set
+        self._checked_at = now
+        return not self.redis.exists(self.key)
+
+    def load(self, scores):
+        # Build into a scratch key of our own and swap it in atomically, so
+        # workers reloading at the same time never mix their batches
+        scratch_key = f'{self.key}:loading:{uuid.uuid4().hex}'
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            batch = {}
+            for user_id, score in scores:
+                batch[str(user_id)] = score or 0
+                if len(batch) >= self.LOAD_BATCH_SIZE:
+                    pipe.zadd(scratch_key, batch)
+                    batch = {}
+            if batch:
+                pipe.zadd(scratch_key, batch)
+            pipe.execute()
+
+            if self.redis.exists(scratch_key):
+                self.redis.rename(scratch_key, self.key)
+            else:
+                self.redis.delete(self.key)
+        finally:
+            self.redis.delete(scratch_key)
+        self._checked_at = time.monotonic()
+
+    def update(self, user_id, score):
+        self.redis.zadd(self.key, {str(user_id): score or 0})
+
+    def remove(self, user_id):
+        self.redis.zrem(self.key, str(user_id))
+
+    def count(self):
+        return self.redis.zcard(self.key)
+
+    def score_of(self, user_id):
+        score = self.redis.zscore(self.key, str(user_id))
+        return int(score) if score is not None else None
+
+    def position_of(self, user_id):
+        return self.redis.zrevrank(self.key, str(user_id))
+
+    def rank_of(self, user_id):
+        score = self.redis.zscore(self.key, str(user_id))
+        if score is None:
+            return None
+        return self.redis.zcount(self.key, f'({score}', '+inf') + 1
+
+    def count_above(self, score):
+        return self.redis.zcount(self.key, f'({score}', '+inf')
+
+    def page(self, offset, limit):
+        if limit <= 0:
+            return []
+        members = self.redis.zrevrange(self.key, offset, offset + limit - 1, withscores=True)
+        return [(int(member), int(score)) for member, score in members]
+
+
+def init_leaderboard_index(app):
+    """Create the configured ranked index and attach it to the app"""
+    backend = app.config.get('LEADERBOARD_INDEX_BACKEND', 'memory')
+    index = None
+
+    if backend == 'redis':
+        redis_client = get_shared_redis_client(app)
+        if redis_client is not None:
+            index = RedisRankedIndex(
+                redis_client,
+                key=app.config.get('LEADERBOARD_INDEX_KEY', 'cipherquest:leaderboard'),
+                check_interval=app.config.get('LEADERBOARD_INDEX_CHECK_SECONDS', 5)
+            )
+        else:
+            app.logger.warning("Redis not available for leaderboard index, using in-memory index")
+
+    if index is None:
+        index = InMemoryRankedIndex(
+            resync_interval=app.config.get('LEADERBOARD_INDEX_RESYNC_SECONDS', 60)
+        )
+
+    app.extensions['leaderboard_index'] = index
+    return index
+
+
+def get_leaderboard_index():
+    """Get the app's ranked index, (re)loading it from the database if needed"""
+    index = current_app.extensions.get('leaderboard_index')
+    if index is None:
+        index = init_leaderboard_index(current_app)
+
+    if index.needs_reload():
+        from models.leaderboard import LeaderboardEntry, db
+        index.load(db.session.query(LeaderboardEntry.user_id, LeaderboardEntry.total_score).all())
+
+    return index
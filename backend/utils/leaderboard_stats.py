@@ -0,0 +1,114 @@
+"""
+Leaderboard statistics aggregate
+
+``/api/leaderboard/stats`` reports player count, average and highest score
+and completion totals. Instead of aggregating ``leaderboard_entries`` on
+every request, each worker keeps running totals that the scoring worker
+updates after every committed batch, so reading them is O(1).
+
+The totals are rebuilt with a single aggregate query on first use, after
+``invalidate()``, and every ``reconcile_interval`` seconds to pick up
+changes applied by other workers or made outside the scoring path.
+"""
+
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func
+
+
+def aggregate_leaderboard():
+    """Compute all leaderboard statistics in one query"""
+    from models.leaderboard import LeaderboardEntry, db
+
+    return db.session.query(
+        func.count(LeaderboardEntry.id),
+        func.coalesce(func.sum(LeaderboardEntry.total_score), 0),
+        func.coalesce(func.max(LeaderboardEntry.total_score), 0),
+        func.coalesce(func.sum(LeaderboardEntry.modules_completed), 0),
+        func.coalesce(func.sum(LeaderboardEntry.challenges_completed), 0)
+    ).one()
+
+
+class LeaderboardStats:
+    """Incrementally maintained leaderboard totals"""
+
+    def __init__(self, reconcile_interval=300):
+        # Seconds between rebuilds from the database; 0 rebuilds on every
+        # read and None never rebuilds after the first load
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self.total_players = 0
+        self.total_score = 0
+        self.highest_score = 0
+        self.total_modules = 0
+        self.total_challenges = 0
+
+    def needs_reload(self):
+        if self._loaded_at is None:
+            return True
+        if self.reconcile_interval is None:
+            return False
+        return time.monotonic() - self._loaded_at >= self.reconcile_interval
+
+    def load(self, row):
+        """Replace the totals with a row from aggregate_leaderboard()"""
+        with self._lock:
+            (self.total_players, self.total_score, self.highest_score,
+             self.total_modules, self.total_challenges) = (int(value or 0) for value in row)
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Force a rebuild on the next read"""
+        with self._lock:
+            self._loaded_at = None
+
+    def record(self, new_players=0, score_delta=0, modules_delta=0, challenges_delta=0, new_scores=()):
+        """Fold a committed scoring batch into the totals"""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            if score_delta < 0:
+                # The highest score can't be maintained when scores go down
+                self._loaded_at = None
+                return
+            self.total_players += new_players
+            self.total_score += score_delta
+            self.total_modules += modules_delta
+            self.total_challenges += challenges_delta
+            self.highest_score = max([self.highest_score, *new_scores])
+
+    def snapshot(self):
+        """Statistics in the shape served by the API"""
+        with self._lock:
+            average = self.total_score / self.total_players if self.total_players else 0
+            return {
+                'total_players': self.total_players,
+                'average_score': round(average, 2),
+                'highest_score': self.highest_score,
+                'total_modules_completed': self.total_modules,
+                'total_challenges_completed': self.total_challenges
+            }
+
+
+def init_leaderboard_stats(app):
+    """Create the leaderboard statistics aggregate and attach it to the app"""
+    stats = LeaderboardStats(
+        reconcile_interval=app.config.get('LEADERBOARD_STATS_RECONCILE_SECONDS', 300)
+    )
+    app.extensions['leaderboard_stats'] = stats
+    return stats
+
+
+def get_leaderboard_stats():
+    """Get the app's statistics aggregate, rebuilding it from the database if needed"""
+    stats = current_app.extensions.get('leaderboard_stats')
+    if stats is None:
+        stats = init_leaderboard_stats(current_app)
+
+    if stats.needs_reload():
+        stats.load(aggregate_leaderboard())
+
+    return stats
@@ -1,46 +1,96 @@
 import os
-import openai
-import time
-from threading import Lock
-
-# Load OpenAI API key from environment variable
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-openai.api_key = OPENAI_API_KEY
-
-# Simple in-memory rate limiter (per-process, not distributed)
-class RateLimiter:
-    def __init__(self, max_calls, period):
-        self.max_calls = max_calls
-        self.period = period
-        self.calls = []
-        self.lock = Lock()
-
-    def allow(self):
-        with self.lock:
-            now = time.time()
-            # Remove calls outside the period
-            self.calls = [t for t in self.calls if now - t < self.period]
-            if len(self.calls) < self.max_calls:
-                self.calls.append(now)
-                return True
-            return False
-
-# Example: 60 calls per minute
-llm_rate_limiter = RateLimiter(max_calls=60, period=60)
-
-def send_prompt_to_llm(prompt, model="gpt-3.5-turbo"):
-    if not OPENAI_API_KEY:
-        return {'error': 'AI service is currently unavailable. Please contact support.'}
-    if not llm_rate_limiter.allow():
+
+from flask import current_app, has_app_context, has_request_context
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_limiter.util import get_remote_address
+
+from database import db
+
+from utils.rate_limiting import GCRALimit, create_gcra_rate_limiter
+from utils.tutor_service import get_tutor_service, TutorServiceError
+from utils.tutor_cache import get_tutor_cache
+
+def init_llm_rate_limiter(app):
+    """Create the LLM call limiter (shared through Redis, or per process)"""
+    limiter = create_gcra_rate_limiter(
+        app,
+        backend=app.config.get('LLM_RATE_LIMIT_BACKEND', 'redis'),
+        key_prefix='cipherquest:llm'
+    )
+    app.extensions['llm_rate_limiter'] = limiter
+    return limiter
+
+def get_llm_rate_limiter():
+    """Get the app's LLM call limiter"""
+    limiter = current_app.extensions.get('llm_rate_limiter')
+    if limiter is None:
+        limiter = init_llm_rate_limiter(current_app)
+    return limiter
+
+def _caller_key():
+    """Rate limit key for the current caller: their user id, else their IP"""
+    if not has_request_context():
+        return None
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    return f'user:{identity}' if identity else f'ip:{get_remote_address()}'
+
+def get_api_key():
+    """OpenAI API key from the app config, falling back to the environment"""
+    if has_app_context() and current_app.config.get('OPENAI_API_KEY'):
+        return current_app.config['OPENAI_API_KEY']
+    return os.getenv('OPENAI_API_KEY')
+
+def check_api_key():
+    """Return an error dict if no API key is configured, else None"""
+    if not get_api_key():
+        return {'error': 'AI service is currently unavailable: no API key configured.'}
+    return None
+
+def check_rate_limit():
+    """Return an error dict if the upstream call budget is exhausted, else None"""
+    config = current_app.config
+    period = config.get('LLM_RATE_LIMIT_PERIOD', 60)
+    # A limit of 0 turns that budget off
+    limits = []
+    if config.get('LLM_RATE_LIMIT', 60):
+        limits.append(GCRALimit('global', config.get('LLM_RATE_LIMIT', 60), period))
+    caller = _caller_key()
+    if caller and config.get('LLM_USER_RATE_LIMIT', 10):
+        limits.append(GCRALimit(caller, config.get('LLM_USER_RATE_LIMIT', 10), period))
+    if limits and not get_llm_rate_limiter().allow(*limits):
         return {'error': 'Rate limit exceeded. Please try again later.'}
+    return None
+
+def get_cached_response(prompt, model=None):
+    """Cached tutor answer for a prompt, or None"""
+    return get_tutor_cache().get(prompt, model or get_tutor_service().model)
+
+def cache_response(prompt, response, model=None):
+    """Remember a tutor answer for repeat questions"""
+    get_tutor_cache().set(prompt, model or get_tutor_service().model, response)
+
+def send_prompt_to_llm(prompt, model=None):
+    unavailable = check_api_key()
+    if unavailable:
+        return unavailable
+    # Cached answers don't cost an upstream call, so they skip the rate limit
+    cached = get_cached_response(prompt, model)
+    if cached is not None:
+        return {'response': cached, 'cached': True}
+    limited = check_rate_limit()
+    if limited:
+        return limited
+    # Don't hold a pooled connection (checked out by the user lookup) while waiting on the model
+    db.session.remove()
     try:
-        response = openai.ChatCompletion.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        answer = response['choices'][0]['message']['content']
+        answer = get_tutor_service().complete(prompt, model=model)
+        cache_response(prompt, answer, model)
         return {'response': answer}
-    except openai.error.OpenAIError as e:
-        return {'error': f'OpenAI API error: {str(e)}'}
+    except TutorServiceError as e:
+        return {'error': str(e)}
     except Exception as e:
-        return {'error': f'Unexpected error: {str(e)}'} 
\ No newline at end of file
+        return {'error': f'Unexpected error: {str(e)}'}
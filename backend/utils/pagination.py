@@ -0,0 +1,93 @@
+"""
+Keyset (cursor) pagination
+
+OFFSET pagination makes the database walk and discard every row before the
+requested page, so deep pages get slower and slower. Keyset pagination
+instead remembers the sort key of the last row served and asks for rows
+that sort after it, which an index on the sort columns answers in the
+same time for page 1000 as for page 1.
+
+Cursors are opaque to clients: the sort key values of the last row,
+JSON-encoded and base64url'd. The sort key must end in a unique column
+(usually the primary key) so that no two rows compare equal.
+"""
+
+import base64
+import binascii
+import json
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor can't be decoded for the requested ordering"""
+
+
+def encode_cursor(values):
+    """Encode sort key values as an opaque cursor"""
+    payload = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """
+    Decode a cursor into its sort key values
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or has the wrong number of values
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, ValueError, UnicodeError):
+        raise InvalidCursor('Invalid cursor')
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Invalid cursor')
+    if any(isinstance(value, (dict, list)) for value in values):
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def keyset_after(order, values):
+    """
+    Predicate matching rows that sort after ``values``
+
+    ``order`` is a list of (column, descending) pairs. Builds
+    ``c1 > v1 OR (c1 = v1 AND c2 > v2) OR ...`` with the comparison flipped
+    for descending columns.
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(order):
+        after = column < values[i] if descending else column > values[i]
+        equal_prefix = [order[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, after) if equal_prefix else after)
+    return or_(*clauses)
+
+
+def paginate_keyset(query, order, cursor, limit, offset=0):
+    """
+    Fetch one page of ``query`` ordered by ``order``, starting after ``cursor``
+
+    Without a cursor the page starts at ``offset``, which keeps old
+    offset-based clients working; its next_cursor continues by keyset.
+
+    Returns:
+        tuple: (rows, next_cursor), where next_cursor is None on the last page
+    """
+    if cursor:
+        query = query.filter(keyset_after(order, decode_cursor(cursor, len(order))))
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column, descending in order])
+
+    if offset and not cursor:
+        query = query.offset(offset)
+
+    # One extra row tells us whether there is a next page without counting
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, column.key) for column, _ in order)
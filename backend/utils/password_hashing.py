@@ -0,0 +1,129 @@
+"""
+Offloaded password hashing
+
+bcrypt is deliberately slow (~250ms at cost 12), so hashing and verification
+run in a small process pool instead of on the request thread. The number
+of in-flight operations is bounded: once every worker is busy and the
+queue is full, callers get PasswordHashingBusy immediately and the auth
+routes answer 503 with a Retry-After header instead of piling up.
+
+With ``PASSWORD_HASH_WORKERS = 0`` hashing runs inline, which is what the
+test configuration uses.
+"""
+
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+from flask import current_app, jsonify
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool cannot take more work"""
+
+    def __init__(self, retry_after=1):
+        super().__init__('Password hashing pool is saturated')
+        self.retry_after = retry_after
+
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _check_password(password, password_hash):
+    return bcrypt.checkpw(password, password_hash)
+
+
+class PasswordHasher:
+    """Bounded bcrypt executor shared by a worker process"""
+
+    def __init__(self, rounds=12, workers=0, max_pending=None, timeout=10, retry_after=1):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending if max_pending is not None else workers * 4
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max(workers + self.max_pending, 1))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created lazily so each forked web worker gets its own pool
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy(self.retry_after)
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # cancel() cannot stop a hash that already started, so the slot is
+        # held until the task finishes rather than until we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHashingBusy(self.retry_after)
+
+    def hash_password(self, password):
+        """Hash a password with the configured cost"""
+        return self._run(_hash_password, password.encode('utf-8'), self.rounds)
+
+    def check_password(self, password_hash, password):
+        """Check a password against a stored hash"""
+        if not password_hash or password is None:
+            return False
+        return self._run(_check_password, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with a different cost than configured"""
+        try:
+            # Hashes look like $2b$12$<salt+digest>
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return False
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def init_password_hasher(app):
+    """Create the password hasher and attach it to the app"""
+    workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+    hasher = PasswordHasher(
+        rounds=app.config.get('BCRYPT_LOG_ROUNDS', 12),
+        workers=workers,
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', workers * 4),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 10),
+        retry_after=app.config.get('PASSWORD_HASH_RETRY_AFTER', 1)
+    )
+    app.extensions['password_hasher'] = hasher
+    return hasher
+
+
+def get_password_hasher():
+    """Get the app's password hasher"""
+    hasher = current_app.extensions.get('password_hasher')
+    if hasher is None:
+        hasher = init_password_hasher(current_app)
+    return hasher
+
+
+def hashing_busy_response(error):
+    """503 response telling the client when to retry"""
+    response = jsonify({'error': 'Server is busy, please try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
@@ -3,6 +3,7 @@ from flask_limiter.util import get_remote_address
 from functools import wraps
 from flask import request, jsonify, current_app
 import redis
+import threading
 import time
 from typing import Optional, Callable, Dict, Any
 
@@ -58,6 +59,39 @@ class RateLimitConfig:
     SEARCH_CHALLENGES = "60 per minute"
     SEARCH_USERS = "30 per minute"
 
+def create_redis_client(app) -> Optional[redis.Redis]:
+    """
+    Create a Redis client from the app configuration
+    
+    Returns:
+        redis.Redis: Connected client, or None if Redis is unreachable
+    """
+    try:
+        client = redis.Redis(
+            host=app.config.get('REDIS_HOST', 'localhost'),
+            port=app.config.get('REDIS_PORT', 6379),
+            db=app.config.get('REDIS_DB', 0),
+            decode_responses=True
+        )
+        # Test Redis connection
+        client.ping()
+        return client
+    except Exception as e:
+        app.logger.warning(f"Redis connection failed: {e}")
+        return None
+
+def get_shared_redis_client(app) -> Optional[redis.Redis]:
+    """
+    Get the Redis connection owned by the RateLimitManager, if any
+    
+    Falls back to opening a new connection with the same settings when the
+    manager has not been initialized for this app.
+    """
+    manager = app.extensions.get('rate_limit_manager')
+    if manager is not None:
+        return manager.redis_client
+    return create_redis_client(app)
+
 class RateLimitManager:
     """Manages rate limiting across the application"""
     
@@ -74,18 +108,12 @@ class RateLimitManager:
         self.app = app
         
         # Initialize Redis for rate limiting storage
-        try:
-            self.redis_client = redis.Redis(
-                host=app.config.get('REDIS_HOST', 'localhost'),
-                port=app.config.get('REDIS_PORT', 6379),
-                db=app.config.get('REDIS_DB', 0),
-                decode_responses=True
-            )
-            # Test Redis connection
-            self.redis_client.ping()
-        except Exception as e:
-            app.logger.warning(f"Redis not available for rate limiting: {e}")
-            self.redis_client = None
+        self.redis_client = create_redis_client(app)
+        if self.redis_client is None:
+            app.logger.warning("Redis not available for rate limiting")
+        
+        # Expose the manager so other components can share its Redis connection
+        app.extensions['rate_limit_manager'] = self
         
         # Initialize Flask-Limiter
         self.limiter = Limiter(
@@ -122,6 +150,18 @@ def create_rate_limiter(app):
     rate_limit_manager = RateLimitManager(app)
     return rate_limit_manager.limiter
 
+def get_app_limiter():
+    """
+    The Flask-Limiter instance registered on the current app, if any
+    
+    Flask-Limiter 3 registers a set of limiters under ``extensions['limiter']``
+    rather than the limiter itself.
+    """
+    limiters = current_app.extensions.get('limiter')
+    if isinstance(limiters, (set, frozenset, list, tuple)):
+        return next(iter(limiters), None)
+    return limiters
+
 def rate_limit_by_user_role(role_limits: Dict[str, str]):
     """
     Decorator to apply different rate limits based on user role
@@ -139,7 +179,7 @@ def rate_limit_by_user_role(role_limits: Dict[str, str]):
             rate_limit = role_limits.get(user_role, role_limits.get('default', '60 per minute'))
             
             # Apply rate limiting
-            limiter = current_app.extensions.get('limiter')
+            limiter = get_app_limiter()
             if limiter:
                 with limiter.limit(rate_limit):
                     return f(*args, **kwargs)
@@ -152,14 +192,12 @@ def rate_limit_by_user_role(role_limits: Dict[str, str]):
 def get_user_role_from_request() -> str:
     """Get user role from the current request"""
     try:
-        from flask_jwt_extended import get_jwt_identity
-        from models.user import User
+        from flask_jwt_extended import get_current_user
         
-        user_id = get_jwt_identity()
-        if user_id:
-            user = User.query.get(user_id)
-            if user:
-                return user.role if hasattr(user, 'role') else 'user'
+        # Reuses the user already loaded for this request's JWT
+        user = get_current_user()
+        if user:
+            return user.role if hasattr(user, 'role') else 'user'
     except Exception:
         pass
     
@@ -175,7 +213,7 @@ def rate_limit_by_ip(limit: str):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            limiter = current_app.extensions.get('limiter')
+            limiter = get_app_limiter()
             if limiter:
                 with limiter.limit(limit, key_func=lambda: request.remote_addr):
                     return f(*args, **kwargs)
@@ -202,7 +240,7 @@ def rate_limit_by_user_id(limit: str):
                 except Exception:
                     return f"ip:{request.remote_addr}"
             
-            limiter = current_app.extensions.get('limiter')
+            limiter = get_app_limiter()
             if limiter:
                 with limiter.limit(limit, key_func=get_user_key):
                     return f(*args, **kwargs)
@@ -224,7 +262,7 @@ def rate_limit_by_endpoint(endpoint_limits: Dict[str, str]):
             endpoint = request.endpoint
             limit = endpoint_limits.get(endpoint, endpoint_limits.get('default', '60 per minute'))
             
-            limiter = current_app.extensions.get('limiter')
+            limiter = get_app_limiter()
             if limiter:
                 with limiter.limit(limit):
                     return f(*args, **kwargs)
@@ -274,8 +312,8 @@ class AdaptiveRateLimiter:
     def _get_user_reputation(self, user_id: str) -> float:
         """Get user reputation score (0.0 to 1.0)"""
         try:
-            from models.user import User
-            user = User.query.get(user_id)
+            from models.user import User, db
+            user = db.session.get(User, int(user_id))
             if user:
                 # Calculate reputation based on various factors
                 factors = []
@@ -317,6 +355,121 @@ def create_adaptive_rate_limiter(base_limit: str, max_limit: str, min_limit: str
     """Create an adaptive rate limiter"""
     return AdaptiveRateLimiter(base_limit, max_limit, min_limit)
 
+class GCRALimit:
+    """A budget of ``limit`` calls per ``period`` seconds for one key"""
+    
+    def __init__(self, key: str, limit: int, period: float):
+        if limit <= 0 or period <= 0:
+            raise ValueError(f'GCRA limit for {key} needs a positive limit and period, got {limit}/{period}s')
+        self.key = key
+        self.limit = limit
+        self.period = period
+        # Time each call "costs"; the whole budget may be spent as a burst
+        self.emission_interval = period / limit
+    
+    def __repr__(self):
+        return f'<GCRALimit {self.key} {self.limit}/{self.period}s>'
+
+class GCRARateLimiter:
+    """
+    Generic cell rate algorithm limiter
+    
+    Each key stores a single "theoretical arrival time" (TAT), so checking
+    and charging a call is O(1) regardless of the limit. A call is allowed
+    while the TAT it would produce stays within one period of now.
+    """
+    
+    SWEEP_EVERY = 1000
+    
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+    
+    def allow(self, *limits: GCRALimit) -> bool:
+        """Charge one call against every limit, only if all of them allow it"""
+        now = time.monotonic()
+        with self._lock:
+            new_tats = []
+            for limit in limits:
+                new_tat = max(self._tats.get(limit.key, now), now) + limit.emission_interval
+                if new_tat - now > limit.period:
+                    return False
+                new_tats.append(new_tat)
+            
+            for limit, new_tat in zip(limits, new_tats):
+                self._tats[limit.key] = new_tat
+            
+            self._calls += 1
+            if self._calls % self.SWEEP_EVERY == 0:
+                # Keys whose TAT has passed are back to a full budget
+                self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+            return True
+    
+    def reset(self):
+        with self._lock:
+            self._tats.clear()
+
+class RedisGCRARateLimiter:
+    """GCRA limiter whose state lives in Redis, shared by all workers and nodes"""
+    
+    # Checks every key before charging any, all in one atomic script run
+    SCRIPT = """
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local new_tats = {}
+    for i, key in ipairs(KEYS) do
+        local interval = tonumber(ARGV[2 * i - 1])
+        local period = tonumber(ARGV[2 * i])
+        local tat = tonumber(redis.call('GET', key)) or now
+        if tat < now then tat = now end
+        local new_tat = tat + interval
+        if new_tat - now > period then return 0 end
+        new_tats[i] = new_tat
+    end
+    for i, key in ipairs(KEYS) do
+        local ttl = math.ceil((new_tats[i] - now) * 1000)
+        redis.call('SET', key, string.format('%.6f', new_tats[i]), 'PX', ttl)
+    end
+    return 1
+    """
+    
+    def __init__(self, redis_client: redis.Redis, key_prefix: str = 'cipherquest:gcra', fallback: Optional[GCRARateLimiter] = None):
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self.fallback = fallback or GCRARateLimiter()
+        self._script = redis_client.register_script(self.SCRIPT)
+    
+    def allow(self, *limits: GCRALimit) -> bool:
+        args = []
+        for limit in limits:
+            args.extend([limit.emission_interval, limit.period])
+        try:
+            keys = [f'{self.key_prefix}:{limit.key}' for limit in limits]
+            return bool(self._script(keys=keys, args=args))
+        except redis.RedisError as e:
+            current_app.logger.warning(f"Redis rate limiter unavailable, limiting per process: {e}")
+            return self.fallback.allow(*limits)
+    
+    def reset(self):
+        self.fallback.reset()
+
+def create_gcra_rate_limiter(app, backend: str = 'memory', key_prefix: str = 'cipherquest:gcra'):
+    """
+    Create a GCRA limiter shared through Redis, or a per-process one
+    
+    Args:
+        backend (str): 'redis' to share budgets across workers (when Redis is
+            reachable) or 'memory' to keep them per process
+        key_prefix (str): Namespace for the Redis keys
+    """
+    if backend == 'redis':
+        redis_client = get_shared_redis_client(app)
+        if redis_client is not None:
+            return RedisGCRARateLimiter(redis_client, key_prefix=key_prefix)
+        app.logger.warning("Redis not available for rate limiting, using per-process limiter")
+    return GCRARateLimiter()
+
 # Predefined rate limit decorators for common use cases
 def auth_rate_limit(f):
     """Rate limit for authentication endpoints"""
@@ -0,0 +1,258 @@
+"""
+Live scoreboard stream
+
+Scoreboard screens used to poll /api/leaderboard/top, so database load
+grew with the number of viewers. Instead every worker process runs one
+ScoreboardBroadcaster that fans a single top-N view out to all of its
+server-sent-events clients:
+
+* updates are coalesced into ticks at most ``SCOREBOARD_STREAM_INTERVAL``
+  apart. A tick compares the ranked index's top N with the last view
+  (no SQL); only a change, or a local solve reported by the scoring
+  worker, loads the players - one query per tick however many clients
+  are connected
+* each frame is encoded once and the same bytes go to every client
+* each client has a bounded queue of pending frames. A client that falls
+  behind has its backlog dropped and gets a full snapshot instead, so a
+  slow connection never slows the publisher or holds more than
+  ``SCOREBOARD_STREAM_MAX_PENDING`` frames
+
+Clients receive a ``snapshot`` event (the full top N) when they connect and
+after falling behind, then ``delta`` events with the changed and removed
+players.
+
+Each tick reads the top N from the ranked index, so with several worker
+processes the index must be the shared Redis one: a solve applied by one
+worker then reaches every worker's viewers within a tick. With per-process
+in-memory indexes the other workers would only see it at their next
+resync, so streaming is refused and clients keep polling.
+"""
+
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+
+
+class ScoreboardUnavailable(Exception):
+    """The worker cannot stream the scoreboard; clients should poll instead"""
+
+
+class TooManySubscribers(ScoreboardUnavailable):
+    """The worker already streams to SCOREBOARD_STREAM_MAX_CLIENTS clients"""
+
+
+class ScoreboardSubscriber:
+    """One connected client: a bounded queue of encoded frames"""
+
+    def __init__(self, max_pending=16):
+        self.max_pending = max_pending
+        self.closed = False
+        self.resyncs = 0
+        self._frames = deque()
+        self._condition = threading.Condition()
+        self._needs_snapshot = True
+
+    def deliver(self, delta_frame, snapshot_frame):
+        """
+        Queue a tick's frame without ever blocking the publisher
+
+        The snapshot is queued instead of the delta when the client has not
+        had one yet, or when its backlog is full; ``delta_frame`` may be
+        None to only bring new clients up to date.
+        """
+        with self._condition:
+            if self._needs_snapshot or len(self._frames) >= self.max_pending:
+                if not self._needs_snapshot:
+                    self.resyncs += 1
+                self._frames.clear()
+                self._frames.append(snapshot_frame)
+                self._needs_snapshot = False
+            elif delta_frame is not None:
+                self._frames.append(delta_frame)
+            else:
+                return
+            self._condition.notify()
+
+    def next_frame(self, timeout=None):
+        """The next queued frame, or None if none arrived within ``timeout`` seconds"""
+        with self._condition:
+            if not self._frames and not self.closed:
+                self._condition.wait(timeout)
+            return self._frames.popleft() if self._frames else None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+
+class ScoreboardBroadcaster:
+    """Per-process publisher of top-N scoreboard updates"""
+
+    def __init__(self, app, top_n=25, interval=1.0, max_pending=16, max_clients=128, available=True):
+        self.app = app
+        # False when other workers' solves would not reach this worker's index
+        self.available = available
+        self.top_n = top_n
+        # Seconds between ticks; 0 starts no publisher thread and leaves
+        # calling tick() to the caller
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_clients = max_clients
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._dirty = True
+        self._version = 0
+        self._ranked = None
+        self._players = {}
+        self._snapshot_frame = None
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """Register a client; it gets the current snapshot on the next tick at the latest"""
+        if not self.available:
+            raise ScoreboardUnavailable()
+        subscriber = ScoreboardSubscriber(self.max_pending)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                raise TooManySubscribers()
+            self._subscribers.add(subscriber)
+            if self._snapshot_frame is not None:
+                subscriber.deliver(None, self._snapshot_frame)
+            self._ensure_publisher()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+        subscriber.close()
+
+    def notify(self):
+        """Mark the scoreboard as changed so the next tick reloads it"""
+        self._dirty = True
+
+    def _ensure_publisher(self):
+        # Called with the lock held
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='scoreboard-publisher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._subscribers:
+                    # Restarted by the next subscribe()
+                    self._thread = None
+                    return
+            try:
+                with self.app.app_context():
+                    self.tick()
+            except Exception as e:
+                self.app.logger.warning(f"Scoreboard tick failed: {e}")
+
+    def _frame(self, event, payload):
+        data = current_app.json.dumps(dict(payload, version=self._version))
+        return f'id: {self._version}\nevent: {event}\ndata: {data}\n\n'.encode('utf-8')
+
+    def tick(self):
+        """
+        Publish what changed since the last tick
+
+        Must run inside an app context. Returns True if the players were
+        loaded from the database.
+        """
+        from models.leaderboard import LeaderboardEntry
+        from utils.leaderboard_index import get_leaderboard_index
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return False
+
+        # Clear the flag first so a solve committed during this tick is not lost
+        dirty, self._dirty = self._dirty, False
+        index = get_leaderboard_index()
+        ranked = index.top(self.top_n)
+        if not dirty and ranked == self._ranked:
+            # Nothing changed; clients that joined since the last change still need a snapshot
+            for subscriber in subscribers:
+                subscriber.deliver(None, self._snapshot_frame)
+            return False
+
+        players = LeaderboardEntry.serialize_ranked(ranked, index.competition_ranks(ranked))
+        players_by_user = {player['user_id']: player for player in players}
+        changed = [player for player in players if self._players.get(player['user_id']) != player]
+        removed = [user_id for user_id in self._players if user_id not in players_by_user]
+
+        delta_frame = None
+        if changed or removed or self._snapshot_frame is None:
+            self._version += 1
+            delta_frame = self._frame('delta', {'changed': changed, 'removed': removed})
+            self._snapshot_frame = self._frame('snapshot', {'top_players': players})
+        self._ranked = ranked
+        self._players = players_by_user
+
+        for subscriber in subscribers:
+            subscriber.deliver(delta_frame, self._snapshot_frame)
+        return True
+
+    def stream(self, subscriber, heartbeat=15):
+        """
+        Server-sent events for one client
+
+        A comment line is sent after ``heartbeat`` idle seconds so proxies
+        keep the connection open and a closed one is noticed.
+        """
+        try:
+            # Reconnect after 3 seconds if the connection drops
+            yield b'retry: 3000\n\n'
+            while True:
+                frame = subscriber.next_frame(timeout=heartbeat)
+                if frame is not None:
+                    yield frame
+                elif subscriber.closed:
+                    return
+                else:
+                    yield b': keep-alive\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+
+def init_scoreboard_broadcaster(app):
+    """Create the scoreboard broadcaster and attach it to the app"""
+    from utils.leaderboard_index import RedisRankedIndex
+
+    workers = app.config.get('WEB_CONCURRENCY') or 1
+    shared_index = isinstance(app.extensions.get('leaderboard_index'), RedisRankedIndex)
+    available = workers <= 1 or shared_index
+    if not available:
+        app.logger.warning(
+            f"Scoreboard streaming is off: {workers} workers need LEADERBOARD_INDEX_BACKEND=redis "
+            "(with Redis reachable) to see each other's solves"
+        )
+
+    broadcaster = ScoreboardBroadcaster(
+        app,
+        top_n=app.config.get('SCOREBOARD_STREAM_TOP', 25),
+        interval=app.config.get('SCOREBOARD_STREAM_INTERVAL', 1.0),
+        max_pending=app.config.get('SCOREBOARD_STREAM_MAX_PENDING', 16),
+        max_clients=app.config.get('SCOREBOARD_STREAM_MAX_CLIENTS', 128),
+        available=available
+    )
+    app.extensions['scoreboard_broadcaster'] = broadcaster
+    return broadcaster
+
+
+def get_scoreboard_broadcaster():
+    """Get the app's scoreboard broadcaster"""
+    broadcaster = current_app.extensions.get('scoreboard_broadcaster')
+    if broadcaster is None:
+        broadcaster = init_scoreboard_broadcaster(current_app)
+    return broadcaster
@@ -0,0 +1,486 @@
+"""
+Background scoring worker
+
+Solving a challenge or completing a module only has to record the user's
+progress inside the request. The leaderboard and XP side effects are
+submitted as ScoringJobs and applied by a worker in batches, with every
+job for the same user coalesced into one leaderboard write and one XP
+write.
+
+Backends (``SCORING_QUEUE_BACKEND``):
+
+* ``thread`` - an in-process queue drained by a daemon thread. Jobs still
+  queued when a worker process dies are lost; ``reconcile_scores.py --fix``
+  repairs the leaderboard totals afterwards.
+* ``redis`` - jobs are pushed onto a Redis list before the response is
+  sent and drained by a thread in every web worker. A worker moves each
+  batch onto its own processing list and removes it only once the batch
+  is committed; the processing list of a worker that stopped sending
+  heartbeats is moved back onto the queue by the others, so jobs survive
+  process restarts and crashes. Delivery is at least once: a crash
+  between the commit and the acknowledgement applies that batch again.
+* ``inline`` - jobs are applied immediately in the request (tests).
+"""
+
+import atexit
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+
+from flask import current_app
+
+from utils.rate_limiting import get_shared_redis_client
+
+ScoringJob = namedtuple('ScoringJob', [
+    'user_id', 'score_delta', 'experience_delta', 'modules_delta', 'challenges_delta'
+])
+ScoringJob.__new__.__defaults__ = (0, 0, 0, 0)
+
+# A committed batch: coalesced jobs, new total score per scored user, and
+# the users who got their first leaderboard entry
+ScoringResult = namedtuple('ScoringResult', ['jobs', 'totals', 'new_players'])
+
+
+def coalesce_jobs(jobs):
+    """Sum jobs per user, keeping the order in which users first appear"""
+    totals = {}
+    for job in jobs:
+        current = totals.get(job.user_id)
+        if current is None:
+            totals[job.user_id] = job
+        else:
+            totals[job.user_id] = ScoringJob(
+                job.user_id,
+                current.score_delta + job.score_delta,
+                current.experience_delta + job.experience_delta,
+                current.modules_delta + job.modules_delta,
+                current.challenges_delta + job.challenges_delta
+            )
+    return list(totals.values())
+
+
+def commit_scoring_jobs(jobs):
+    """
+    Apply a batch of jobs to the database in one transaction
+
+    Must run inside an app context. Nothing is committed when it raises, so
+    it is safe to retry. Returns a ScoringResult for publish_scoring_results().
+    """
+    from models.leaderboard import LeaderboardEntry, db
+    from models.user import User
+
+    coalesced = coalesce_jobs(jobs)
+    totals = {}
+    scored_ids = [job.user_id for job in coalesced
+                  if job.score_delta or job.modules_delta or job.challenges_delta]
+    existing_ids = set()
+    if scored_ids:
+        existing_ids = {user_id for user_id, in db.session.query(LeaderboardEntry.user_id).filter(
+            LeaderboardEntry.user_id.in_(scored_ids)
+        )}
+    try:
+        for job in coalesced:
+            if job.experience_delta:
+                User.apply_experience_delta(job.user_id, job.experience_delta, commit=False)
+            if job.score_delta or job.modules_delta or job.challenges_delta:
+                totals[job.user_id] = LeaderboardEntry.apply_score_delta(
+                    job.user_id,
+                    job.score_delta,
+                    modules_delta=job.modules_delta,
+                    challenges_delta=job.challenges_delta,
+                    commit=False
+                )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return ScoringResult(coalesced, totals, set(totals) - existing_ids)
+
+
+def publish_scoring_results(result):
+    """
+    Bring in-process state in line with a committed batch
+
+    Must run inside an app context, once per committed batch. Every step is
+    best effort: a failure is logged and left to the index resync or the
+    stats reconcile, because retrying would apply the batch's deltas again.
+    """
+    from utils.leaderboard_index import get_leaderboard_index
+    from utils.user_loader import invalidate_user
+
+    def attempt(step, action):
+        try:
+            action()
+        except Exception as e:
+            current_app.logger.warning(f"Scoring batch committed but {step} failed: {e}")
+
+    def update_index():
+        # Keep the ranked index in step with the committed values
+        index = get_leaderboard_index()
+        for user_id, total_score in result.totals.items():
+            index.update(user_id, total_score)
+
+    def invalidate_users():
+        for job in result.jobs:
+            if job.experience_delta:
+                invalidate_user(job.user_id)
+
+    def record_stats():
+        stats = current_app.extensions.get('leaderboard_stats')
+        if stats is not None and result.totals:
+            stats.record(
+                new_players=len(result.new_players),
+                score_delta=sum(job.score_delta for job in result.jobs if job.user_id in result.totals),
+                modules_delta=sum(job.modules_delta for job in result.jobs),
+                challenges_delta=sum(job.challenges_delta for job in result.jobs),
+                new_scores=[score or 0 for score in result.totals.values()]
+            )
+
+    def notify_scoreboard():
+        broadcaster = current_app.extensions.get('scoreboard_broadcaster')
+        if broadcaster is not None and result.totals:
+            broadcaster.notify()
+
+    attempt('updating the ranked index', update_index)
+    attempt('invalidating cached users', invalidate_users)
+    attempt('recording leaderboard stats', record_stats)
+    attempt('notifying the scoreboard stream', notify_scoreboard)
+
+
+def apply_scoring_jobs(jobs):
+    """
+    Apply a batch of jobs in one transaction and publish the results
+
+    Must run inside an app context. Returns the number of users updated.
+    """
+    result = commit_scoring_jobs(jobs)
+    publish_scoring_results(result)
+    return len(result.jobs)
+
+
+class ScoringQueue:
+    """Interface for scoring job queues"""
+
+    def submit(self, job):
+        """Queue a job for the worker"""
+        raise NotImplementedError
+
+    def flush(self, timeout=None):
+        """Wait until every job submitted so far has been applied"""
+
+    def shutdown(self, timeout=5):
+        """Apply outstanding jobs and stop the worker"""
+
+
+class InlineScoringQueue(ScoringQueue):
+    """Applies each job immediately in the caller's app context"""
+
+    def submit(self, job):
+        apply_scoring_jobs([job])
+
+
+class _BatchingWorker(ScoringQueue):
+    """Shared worker thread logic: take a batch, apply it, retry on failure"""
+
+    MAX_ATTEMPTS = 3
+    MAX_DEAD_LETTERS = 10000
+
+    def __init__(self, app, batch_size=100, batch_interval=0.5):
+        self.app = app
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        # Batches that failed every attempt; the leaderboard side can also
+        # be repaired from progress with ``reconcile_scores.py --fix``
+        self.dead_letters = deque(maxlen=self.MAX_DEAD_LETTERS)
+
+    def _ensure_worker(self):
+        # Started lazily so each forked web worker runs its own thread
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='scoring-worker', daemon=True)
+                    self._thread.start()
+
+    def _next_batch(self):
+        """Block briefly for jobs; returns a (possibly empty) list"""
+        raise NotImplementedError
+
+    def _done(self, count):
+        """Called after ``count`` jobs were handled"""
+
+    def _apply(self, jobs):
+        # Only the transaction is retried; once it has committed, retrying
+        # would count the deltas again
+        result = None
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            try:
+                with self.app.app_context():
+                    result = commit_scoring_jobs(jobs)
+                break
+            except Exception as e:
+                self.app.logger.warning(f"Scoring batch failed (attempt {attempt}): {e}")
+                time.sleep(min(0.1 * 2 ** attempt, 2))
+
+        if result is None:
+            self._dead_letter(jobs)
+            return
+        self._committed()
+        with self.app.app_context():
+            publish_scoring_results(result)
+
+    def _committed(self):
+        """Called once the current batch is committed"""
+
+    def _dead_letter(self, jobs):
+        """Keep a batch that could not be committed, for replay or reconcile"""
+        self.app.logger.error(
+            f"Dead-lettering {len(jobs)} scoring jobs after {self.MAX_ATTEMPTS} attempts: "
+            f"{json.dumps([job._asdict() for job in jobs])}"
+        )
+        self.dead_letters.extend(jobs)
+
+    def requeue_dead_letters(self):
+        """Submit dead-lettered jobs again; returns how many were requeued"""
+        jobs = []
+        while self.dead_letters:
+            jobs.append(self.dead_letters.popleft())
+        for job in jobs:
+            self.submit(job)
+        return len(jobs)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            jobs = self._next_batch()
+            if jobs:
+                try:
+                    self._apply(jobs)
+                finally:
+                    self._done(len(jobs))
+
+    def shutdown(self, timeout=5):
+        self.flush(timeout)
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+class ThreadScoringQueue(_BatchingWorker):
+    """In-process queue drained by a daemon thread"""
+
+    def __init__(self, app, batch_size=100, batch_interval=0.5):
+        super().__init__(app, batch_size, batch_interval)
+        self._queue = queue.Queue()
+
+    def submit(self, job):
+        self._queue.put(job)
+        self._ensure_worker()
+
+    def _next_batch(self):
+        try:
+            jobs = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        # Give other solves a moment to join this batch
+        deadline = time.monotonic() + self.batch_interval
+        while len(jobs) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                jobs.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return jobs
+
+    def _done(self, count):
+        for _ in range(count):
+            self._queue.task_done()
+
+    def flush(self, timeout=None):
+        if self._thread is None:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            time.sleep(0.01)
+
+
+class RedisScoringQueue(_BatchingWorker):
+    """Queue stored in a Redis list, shared by every web worker"""
+
+    # Seconds without a heartbeat after which a worker's batch is requeued
+    HEARTBEAT_TTL = 60
+
+    def __init__(self, app, redis_client, key='cipherquest:scoring', batch_size=100, batch_interval=0.5):
+        super().__init__(app, batch_size, batch_interval)
+        self.redis = redis_client
+        self.key = key
+        self._recovered_at = None
+
+    @property
+    def consumer_id(self):
+        # Evaluated on use: web workers are forked after the queue is created
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    @property
+    def processing_key(self):
+        return f'{self.key}:processing:{self.consumer_id}'
+
+    def _heartbeat_key(self, consumer_id):
+        return f'{self.key}:consumer:{consumer_id}'
+
+    def _recover_orphans(self):
+        """Requeue batches taken by workers that stopped sending heartbeats"""
+        now = time.monotonic()
+        if self._recovered_at is not None and now - self._recovered_at < self.HEARTBEAT_TTL / 2:
+            return
+        self._recovered_at = now
+
+        prefix = f'{self.key}:processing:'
+        for processing_key in self.redis.scan_iter(match=f'{prefix}*'):
+            if self.redis.exists(self._heartbeat_key(processing_key[len(prefix):])):
+                continue
+            moved = 0
+            while self.redis.rpoplpush(processing_key, self.key) is not None:
+                moved += 1
+            if moved:
+                self.app.logger.warning(f"Requeued {moved} scoring jobs from stopped worker {processing_key}")
+
+    def submit(self, job):
+        self.redis.lpush(self.key, json.dumps(job._asdict()))
+        self._ensure_worker()
+
+    def _next_batch(self):
+        try:
+            self.redis.set(self._heartbeat_key(self.consumer_id), 1, ex=self.HEARTBEAT_TTL)
+            self._recover_orphans()
+
+            # A batch this worker took but never committed or dead-lettered goes first
+            payloads = self.redis.lrange(self.processing_key, 0, -1)
+            if payloads:
+                return [ScoringJob(**json.loads(payload)) for payload in payloads]
+
+            # Jobs stay on this worker's processing list until the batch is committed
+            payload = self.redis.brpoplpush(self.key, self.processing_key, timeout=1)
+            if payload is None:
+                return []
+            payloads = [payload]
+
+            time.sleep(self.batch_interval)
+            pipe = self.redis.pipeline(transaction=False)
+            for _ in range(self.batch_size - 1):
+                pipe.rpoplpush(self.key, self.processing_key)
+            payloads.extend(payload for payload in pipe.execute() if payload is not None)
+        except Exception as e:
+            self.app.logger.warning(f"Could not read scoring jobs from Redis: {e}")
+            time.sleep(1)
+            return []
+        return [ScoringJob(**json.loads(payload)) for payload in payloads]
+
+    @property
+    def dead_key(self):
+        return f'{self.key}:dead'
+
+    def _committed(self):
+        try:
+            self.redis.delete(self.processing_key)
+        except Exception as e:
+            # The batch would be requeued and applied again once this worker stops
+            self.app.logger.error(f"Could not acknowledge committed scoring batch: {e}")
+
+    def _dead_letter(self, jobs):
+        # Keep failed batches in Redis so they outlive this process
+        try:
+            pipe = self.redis.pipeline()
+            pipe.lpush(self.dead_key, *[json.dumps(job._asdict()) for job in jobs])
+            pipe.delete(self.processing_key)
+            pipe.execute()
+            self.app.logger.error(
+                f"Moved {len(jobs)} scoring jobs to {self.dead_key} after {self.MAX_ATTEMPTS} attempts"
+            )
+        except Exception:
+            super()._dead_letter(jobs)
+
+    def requeue_dead_letters(self):
+        count = 0
+        while self.redis.rpoplpush(self.dead_key, self.key) is not None:
+            count += 1
+        if count:
+            self._ensure_worker()
+        return count + super().requeue_dead_letters()
+
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.redis.llen(self.key) or self.redis.llen(self.processing_key):
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            time.sleep(0.05)
+
+
+def init_scoring_queue(app):
+    """Create the configured scoring queue and attach it to the app"""
+    backend = app.config.get('SCORING_QUEUE_BACKEND', 'thread')
+    batch_size = app.config.get('SCORING_BATCH_SIZE', 100)
+    batch_interval = app.config.get('SCORING_BATCH_INTERVAL', 0.5)
+    scoring_queue = None
+
+    if backend == 'redis':
+        redis_client = get_shared_redis_client(app)
+        if redis_client is not None:
+            scoring_queue = RedisScoringQueue(
+                app, redis_client,
+                key=app.config.get('SCORING_QUEUE_KEY', 'cipherquest:scoring'),
+                batch_size=batch_size,
+                batch_interval=batch_interval
+            )
+        else:
+            app.logger.warning("Redis not available for scoring queue, using in-process queue")
+            backend = 'thread'
+
+    if backend == 'inline':
+        scoring_queue = InlineScoringQueue()
+    elif scoring_queue is None:
+        scoring_queue = ThreadScoringQueue(app, batch_size=batch_size, batch_interval=batch_interval)
+
+    atexit.register(scoring_queue.shutdown)
+    app.extensions['scoring_queue'] = scoring_queue
+    return scoring_queue
+
+
+def get_scoring_queue():
+    """Get the app's scoring queue"""
+    scoring_queue = current_app.extensions.get('scoring_queue')
+    if scoring_queue is None:
+        scoring_queue = init_scoring_queue(current_app)
+    return scoring_queue
+
+
+def submit_scoring_job(job):
+    """
+    Queue a job for a solve the caller has already committed
+
+    The solve must not be reported as failed once it is recorded, so if
+    the queue rejects the job (e.g. Redis is down) it is applied inline
+    instead. If that fails too the error is logged and reconcile_scores.py
+    restores the totals.
+    """
+    try:
+        get_scoring_queue().submit(job)
+        return
+    except Exception as e:
+        current_app.logger.warning(f"Scoring queue rejected job, applying it inline: {e}")
+
+    try:
+        apply_scoring_jobs([job])
+    except Exception as e:
+        current_app.logger.error(f"Scoring job lost, run reconcile_scores.py: {json.dumps(job._asdict())} ({e})")
@@ -0,0 +1,85 @@
+"""
+Model serializers
+
+``to_dict()`` runs for every row of every listing. A model declares the keys
+it serves once, and a ModelSerializer copies them straight out of the
+instance ``__dict__``, where SQLAlchemy keeps loaded column values, instead
+of going through an instrumented attribute descriptor per field. Only the
+declared datetime keys are formatted.
+
+Instances with expired or unloaded attributes (e.g. right after a commit)
+fall back to normal attribute access, which loads them.
+
+List endpoints also accept sparse fieldsets: ``?fields=id,title`` or
+``?view=summary``. ``parse_fields`` resolves them and ``only()`` gives a
+serializer for just those keys, so that the query can defer every other
+column.
+"""
+
+
+class ModelSerializer:
+    """Precomputed attribute-to-key serializer for one model"""
+
+    def __init__(self, keys, datetime_keys=()):
+        self.keys = tuple(keys)
+        self.datetime_keys = tuple(datetime_keys)
+        if not set(self.datetime_keys) <= set(self.keys):
+            raise ValueError('datetime_keys must be a subset of keys')
+        self._subsets = {}
+
+    def __call__(self, obj):
+        state = obj.__dict__
+        try:
+            data = {key: state[key] for key in self.keys}
+        except KeyError:
+            data = {key: getattr(obj, key) for key in self.keys}
+
+        for key in self.datetime_keys:
+            value = data[key]
+            if value is not None:
+                data[key] = value.isoformat()
+        return data
+
+    def only(self, fields):
+        """Serializer for the keys in ``fields``, keeping this serializer's order"""
+        fields = frozenset(fields)
+        subset = self._subsets.get(fields)
+        if subset is None:
+            subset = ModelSerializer(
+                [key for key in self.keys if key in fields],
+                [key for key in self.datetime_keys if key in fields]
+            )
+            self._subsets[fields] = subset
+        return subset
+
+
+class InvalidFields(ValueError):
+    """Raised when a fieldset names unknown fields or views"""
+
+
+def parse_fields(fields, view, allowed, summary):
+    """
+    Resolve the ``fields`` and ``view`` query parameters
+
+    ``fields`` is a comma separated list of keys from ``allowed`` and wins
+    over ``view``, which is ``full`` (the default) or ``summary``. The
+    ``id`` key is always served.
+
+    Returns:
+        frozenset: Keys to serve, or None for every key
+
+    Raises:
+        InvalidFields: If a field or the view is unknown
+    """
+    if fields:
+        requested = {field.strip() for field in fields.split(',') if field.strip()}
+        unknown = requested - set(allowed)
+        if unknown:
+            raise InvalidFields(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return frozenset(requested | {'id'})
+
+    if not view or view == 'full':
+        return None
+    if view == 'summary':
+        return frozenset(summary)
+    raise InvalidFields('view must be summary or full')
@@ -0,0 +1,166 @@
+"""
+AI tutor response cache
+
+Students keep asking the tutor the same questions about the same modules,
+so answers are cached per model in two tiers:
+
+* exact - keyed on the normalized prompt (case, whitespace and trailing
+  punctuation are ignored)
+* similar (optional) - if no exact entry exists, the cached prompt whose
+  hashed bag-of-words vector has the highest cosine similarity is used,
+  provided it reaches ``similarity_threshold``
+
+Entries expire after a TTL and the least recently used entry is evicted
+when the cache is full. Hit/miss counters are kept for the admin API.
+"""
+
+import math
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from flask import current_app
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize_prompt(prompt):
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return ' '.join(prompt.lower().split()).rstrip(' ?!.')
+
+
+def prompt_vector(prompt, dimensions=4096):
+    """
+    L2-normalized sparse vector of hashed unigrams and bigrams
+
+    A cheap local stand-in for an embedding: good at matching rephrasings
+    that share most of their words, with no model to download or call.
+    """
+    tokens = _TOKEN_RE.findall(prompt.lower())
+    features = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+    vector = {}
+    for feature in features:
+        bucket = zlib.crc32(feature.encode('utf-8')) % dimensions
+        vector[bucket] = vector.get(bucket, 0) + 1
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if not norm:
+        return {}
+    return {bucket: value / norm for bucket, value in vector.items()}
+
+
+def cosine_similarity(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(bucket, 0) for bucket, value in a.items())
+
+
+class TutorResponseCache:
+    """In-process exact + similarity cache of tutor answers"""
+
+    def __init__(self, max_entries=2048, ttl=86400, similarity_threshold=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # 0 disables the similarity tier
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return bool(self.ttl) and self.max_entries > 0
+
+    def _find_similar(self, model, vector, now):
+        best_key, best_score = None, 0
+        for key, (expires_at, _, entry_vector) in self._entries.items():
+            if key[0] != model or expires_at <= now:
+                continue
+            score = cosine_similarity(vector, entry_vector)
+            if score > best_score:
+                best_key, best_score = key, score
+        if best_key is not None and best_score >= self.similarity_threshold:
+            return best_key
+        return None
+
+    def get(self, prompt, model):
+        """Cached answer for a prompt, or None"""
+        if not self.enabled:
+            return None
+
+        key = (model, normalize_prompt(prompt))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+
+            if entry is not None:
+                self.exact_hits += 1
+            elif self.similarity_threshold:
+                similar_key = self._find_similar(model, prompt_vector(key[1]), now)
+                if similar_key is not None:
+                    key, entry = similar_key, self._entries[similar_key]
+                    self.similar_hits += 1
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, prompt, model, response):
+        """Cache an answer"""
+        if not self.enabled or not response:
+            return
+
+        normalized = normalize_prompt(prompt)
+        vector = prompt_vector(normalized) if self.similarity_threshold else None
+        with self._lock:
+            self._entries[(model, normalized)] = (time.monotonic() + self.ttl, response, vector)
+            self._entries.move_to_end((model, normalized))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit-rate metrics"""
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'exact_hits': self.exact_hits,
+            'similar_hits': self.similar_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round((self.exact_hits + self.similar_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+def init_tutor_cache(app):
+    """Create the tutor response cache and attach it to the app"""
+    cache = TutorResponseCache(
+        max_entries=app.config.get('TUTOR_CACHE_SIZE', 2048),
+        ttl=app.config.get('TUTOR_CACHE_TTL', 86400),
+        similarity_threshold=app.config.get('TUTOR_CACHE_SIMILARITY_THRESHOLD', 0)
+    )
+    app.extensions['tutor_cache'] = cache
+    return cache
+
+
+def get_tutor_cache():
+    """Get the app's tutor response cache"""
+    cache = current_app.extensions.get('tutor_cache')
+    if cache is None:
+        cache = init_tutor_cache(current_app)
+    return cache
@@ -0,0 +1,185 @@
+"""
+Async LLM tutor client
+
+All tutor calls from a worker process go through one ``openai.AsyncOpenAI``
+client running on a dedicated event loop thread, so HTTP connections to the
+model provider are pooled and reused across requests. Each call has a
+timeout, and a semaphore bounds how many completions are in flight at once.
+
+Flask views stay synchronous: ``complete()`` waits for the coroutine's
+result, while ``stream()`` yields text deltas as they arrive so the AI
+routes can forward them as server-sent events.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import openai
+from flask import current_app
+
+
+class TutorServiceError(Exception):
+    """Raised when the model provider cannot produce a response"""
+
+
+class TutorTimeoutError(TutorServiceError):
+    """Raised when the model provider doesn't answer in time"""
+
+
+class TutorService:
+    """Pooled, concurrency-bounded chat completion client"""
+
+    def __init__(self, api_key, base_url=None, model='gpt-3.5-turbo', timeout=30,
+                 max_concurrency=8, max_retries=1):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        if self._loop is not None:
+            return self._loop
+
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='tutor-service', daemon=True)
+                thread.start()
+                asyncio.run_coroutine_threadsafe(self._setup(), loop).result()
+                self._thread = thread
+                self._loop = loop
+        return self._loop
+
+    async def _setup(self):
+        # The client and semaphore must be created on the loop that uses them
+        self._client = openai.AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url or None,
+            timeout=self.timeout,
+            max_retries=self.max_retries
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def _messages(self, prompt):
+        return [{"role": "user", "content": prompt}]
+
+    async def _complete(self, prompt, model):
+        async with self._semaphore:
+            response = await self._client.chat.completions.create(
+                model=model or self.model,
+                messages=self._messages(prompt)
+            )
+        return response.choices[0].message.content or ''
+
+    async def _stream(self, prompt, model, emit):
+        async with self._semaphore:
+            stream = await self._client.chat.completions.create(
+                model=model or self.model,
+                messages=self._messages(prompt),
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    emit(chunk.choices[0].delta.content)
+
+    def complete(self, prompt, model=None):
+        """
+        Get a full completion for a prompt
+
+        The calling thread waits at most ``timeout`` seconds, including any
+        wait for a free concurrency slot.
+
+        Raises:
+            TutorTimeoutError: If no answer arrives within the timeout
+            TutorServiceError: If the provider returns an error
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(self._complete(prompt, model), self.timeout), loop
+        )
+        try:
+            return future.result(timeout=self.timeout)
+        except (asyncio.TimeoutError, FutureTimeoutError):
+            future.cancel()
+            raise TutorTimeoutError('AI service timed out')
+        except openai.OpenAIError as e:
+            raise TutorServiceError(f'OpenAI API error: {str(e)}')
+
+    def stream(self, prompt, model=None):
+        """
+        Yield completion text deltas as the provider produces them
+
+        The timeout applies to the gap between deltas. Closing the generator
+        (e.g. when the client disconnects) cancels the upstream request.
+        """
+        loop = self._ensure_loop()
+        deltas = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                await self._stream(prompt, model, deltas.put_nowait)
+            except Exception as e:
+                deltas.put_nowait(e)
+            finally:
+                deltas.put_nowait(finished)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), loop)
+        try:
+            while True:
+                try:
+                    item = deltas.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TutorTimeoutError('AI service timed out')
+                if item is finished:
+                    break
+                if isinstance(item, openai.OpenAIError):
+                    raise TutorServiceError(f'OpenAI API error: {str(item)}')
+                if isinstance(item, Exception):
+                    raise TutorServiceError(f'Unexpected error: {str(item)}')
+                yield item
+        finally:
+            future.cancel()
+
+    def close(self):
+        """Close the HTTP client and stop the event loop thread"""
+        with self._lock:
+            if self._loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+
+
+def init_tutor_service(app):
+    """Create the tutor service and attach it to the app"""
+    service = TutorService(
+        api_key=app.config.get('OPENAI_API_KEY') or os.getenv('OPENAI_API_KEY'),
+        base_url=app.config.get('LLM_BASE_URL') or os.getenv('LLM_BASE_URL'),
+        model=app.config.get('LLM_MODEL', 'gpt-3.5-turbo'),
+        timeout=app.config.get('LLM_TIMEOUT', 30),
+        max_concurrency=app.config.get('LLM_MAX_CONCURRENCY', 8),
+        max_retries=app.config.get('LLM_MAX_RETRIES', 1)
+    )
+    app.extensions['tutor_service'] = service
+    return service
+
+
+def get_tutor_service():
+    """Get the app's tutor service"""
+    service = current_app.extensions.get('tutor_service')
+    if service is None:
+        service = init_tutor_service(current_app)
+    return service
@@ -0,0 +1,137 @@
+"""
+Authenticated user loading
+
+Registers a user lookup callback with JWTManager so the user behind an
+access token is loaded once per request and shared through
+``flask_jwt_extended.current_user`` / ``get_current_user()`` by routes,
+decorators and rate limiting.
+
+Optionally (``USER_CACHE_TTL`` > 0) the user's column values are also kept
+for a few seconds across requests. Snapshots are only served to read-only
+requests, are dropped whenever this worker flushes a change to the user,
+and simply expire on other workers.
+"""
+
+import threading
+import time
+
+from flask import current_app, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models.user import User, db
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class UserSnapshotCache:
+    """Short-lived per-process cache of user column values keyed by user id"""
+
+    def __init__(self, ttl=0):
+        self.ttl = ttl
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.ttl)
+
+    def get(self, user_id):
+        entry = self._snapshots.get(user_id)
+        if entry is None:
+            return None
+        expires_at, values = entry
+        if time.monotonic() >= expires_at:
+            self.invalidate(user_id)
+            return None
+        return values
+
+    def set(self, user_id, values):
+        with self._lock:
+            self._snapshots[user_id] = (time.monotonic() + self.ttl, values)
+
+    def invalidate(self, user_id=None):
+        """Drop one user's snapshot, or every snapshot if no id is given"""
+        with self._lock:
+            if user_id is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(user_id, None)
+
+
+def _snapshot(user):
+    return {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+
+
+def _from_snapshot(values):
+    # Rebuild a clean, persistent instance without querying the database
+    user = User.__mapper__.class_manager.new_instance()
+    for key, value in values.items():
+        set_committed_value(user, key, value)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def _get_cache():
+    cache = current_app.extensions.get('user_snapshot_cache')
+    if cache is None:
+        cache = UserSnapshotCache(ttl=current_app.config.get('USER_CACHE_TTL', 0))
+        current_app.extensions['user_snapshot_cache'] = cache
+    return cache
+
+
+def load_user(user_id):
+    """
+    Load a user by id, using a cached snapshot for read-only requests
+
+    Args:
+        user_id: The JWT identity
+
+    Returns:
+        User: The user, or None if it doesn't exist
+    """
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    cache = _get_cache()
+    if cache.enabled and request.method in SAFE_METHODS:
+        values = cache.get(user_id)
+        if values is not None:
+            return _from_snapshot(values)
+
+    user = db.session.get(User, user_id)
+    if user is not None and cache.enabled:
+        cache.set(user_id, _snapshot(user))
+    return user
+
+
+def invalidate_user(user_id=None):
+    """Forget cached user snapshots after a user changes"""
+    _get_cache().invalidate(int(user_id) if user_id is not None else None)
+
+
+def init_user_loader(app, jwt):
+    """Register the JWT user lookup callbacks and the snapshot cache"""
+    app.extensions['user_snapshot_cache'] = UserSnapshotCache(ttl=app.config.get('USER_CACHE_TTL', 0))
+
+    @jwt.user_lookup_loader
+    def user_lookup_callback(jwt_header, jwt_data):
+        return load_user(jwt_data[app.config.get('JWT_IDENTITY_CLAIM', 'sub')])
+
+    @jwt.user_lookup_error_loader
+    def user_lookup_error_callback(jwt_header, jwt_data):
+        # The token is valid but its user is gone, so the caller must authenticate again
+        return jsonify({'error': 'User not found'}), 401
+
+    return app.extensions['user_snapshot_cache']
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_changed_user(mapper, connection, target):
+    cache = current_app.extensions.get('user_snapshot_cache') if current_app else None
+    if cache is not None:
+        cache.invalidate(target.id)
@@ -9,6 +9,30 @@ const MODEL_OPTIONS = [
 const DEFAULT_MODEL = 'gpt-3.5-turbo';
 const DEFAULT_TEMPERATURE = 0.7;
 
+// Calls onEvent(event, data) for each server-sent event in a fetch response
+const readEventStream = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message';
+      const data = [];
+      block.split('\n').forEach(line => {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data.push(line.slice(6));
+      });
+      if (data.length) onEvent(event, JSON.parse(data.join('\n')));
+    }
+  }
+};
+
 const AIAssistantPage = () => {
   const [messages, setMessages] = useState([
     {
@@ -58,34 +82,62 @@ const AIAssistantPage = () => {
     setInputMessage('');
     setIsTyping(true);
 
+    const showError = (message) => {
+      let displayError = message;
+      if (displayError && displayError.includes('AI service is currently unavailable')) {
+        displayError = 'AI service is currently unavailable. Please contact support.';
+      }
+      setError(displayError || 'An error occurred.');
+      setMessages(prev => [...prev, {
+        id: Date.now() + 1,
+        content: `❌ ${displayError || 'An error occurred.'}`,
+        timestamp: new Date(),
+        type: 'ai'
+      }]);
+    };
+
     try {
-      const response = await fetch('/api/ai/chat', {
+      // Stream the reply so it shows up as the model writes it, not after the whole completion
+      const response = await fetch('/api/ai/chat/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
           prompt: userMessage.content,
           model,
-          temperature,
-          stream: streaming
+          temperature
         })
       });
-      const data = await response.json();
-      let displayError = data.error;
-      if (displayError && displayError.includes('AI service is currently unavailable')) {
-        displayError = 'AI service is currently unavailable. Please contact support.';
+      if (!response.ok) {
+        const data = await response.json();
+        showError(data.error);
+        return;
       }
-      if (!response.ok || data.error) {
-        setError(displayError || 'An error occurred.');
-        setMessages(prev => [...prev, {
-          id: Date.now() + 1,
-          content: `❌ ${displayError || 'An error occurred.'}`,
-          timestamp: new Date(),
-          type: 'ai'
-        }]);
-      } else {
+
+      const replyId = Date.now() + 1;
+      let reply = '';
+      let streamError = null;
+      if (streaming) {
+        setMessages(prev => [...prev, { id: replyId, content: '', timestamp: new Date(), type: 'ai' }]);
+      }
+      await readEventStream(response, (event, data) => {
+        if (event === 'error') {
+          streamError = data.error;
+        } else if (data.delta) {
+          reply += data.delta;
+          if (streaming) {
+            setMessages(prev => prev.map(message => (
+              message.id === replyId ? { ...message, content: reply } : message
+            )));
+          }
+        }
+      });
+
+      if (streamError) {
+        showError(streamError);
+      } else if (!streaming) {
         setMessages(prev => [...prev, {
-          id: Date.now() + 1,
-          content: data.response,
+          id: replyId,
+          content: reply,
           timestamp: new Date(),
           type: 'ai'
         }]);